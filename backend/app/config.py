@@ -8,10 +8,117 @@ class Settings(BaseSettings):
     # Database
     DATABASE_URL: str = "sqlite+aiosqlite:///./monitor_rpa.db"
     
+    # Connection pools: writes use the read-write pool, read-only endpoints
+    # (dashboard, listings, history) a separate read-only one. On SQLite the
+    # read-write pool always has a single connection (one writer at a time)
+    DB_POOL_SIZE: int = 5
+    DB_READ_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0  # seconds to wait for a free connection
+    DB_POOL_RECYCLE: int = 1800  # replace connections older than this (seconds, -1 never)
+    
+    # PostgreSQL (DATABASE_URL=postgresql+asyncpg://...): prepared statements
+    # cached per connection (0 disables, e.g. behind pgbouncer in transaction
+    # mode) and the timeout of a single statement in seconds
+    PG_STATEMENT_CACHE_SIZE: int = 500
+    PG_COMMAND_TIMEOUT: float = 60.0
+    
+    # SQLite storage profile, applied to every connection. WAL lets reads run
+    # alongside the writer; synchronous=NORMAL is durable enough under WAL (a
+    # power loss may drop the last commits but never corrupts the file)
+    SQLITE_JOURNAL_MODE: str = "WAL"
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000  # wait this long for the write lock
+    SQLITE_WRITE_POOL_TIMEOUT: float = 10.0  # seconds to wait for the read-write connection
+    SQLITE_CACHE_SIZE_KB: int = 65536  # page cache, per connection
+    SQLITE_MMAP_SIZE_MB: int = 256  # memory-mapped reads (0 disables)
+    # Checkpoint the WAL into the database every N pages, then truncate the
+    # WAL file down to SQLITE_JOURNAL_SIZE_LIMIT_MB
+    SQLITE_WAL_AUTOCHECKPOINT: int = 1000
+    SQLITE_JOURNAL_SIZE_LIMIT_MB: int = 64
+    
     # API
     API_PREFIX: str = "/api"
     DEBUG: bool = False
     
+    # Dashboard stats are cached for this many seconds (invalidated on new events)
+    DASHBOARD_CACHE_TTL: float = 5.0
+    
+    # Execution/ping history totals are cached for this many seconds, so
+    # paging through a long history doesn't count it again on every page
+    HISTORY_TOTAL_CACHE_TTL: float = 30.0
+    
+    # History exports (/export/executions, /export/pings) read this many rows
+    # per query, each query its own short read transaction
+    EXPORT_CHUNK_SIZE: int = 2000
+    
+    # Webhook ingestion: "sync" writes each execution in the request,
+    # "batched" queues it and writes in batches from a background task
+    WEBHOOK_INGESTION_MODE: str = "sync"
+    INGESTION_QUEUE_SIZE: int = 10000
+    INGESTION_BATCH_SIZE: int = 500
+    INGESTION_FLUSH_INTERVAL: float = 0.5  # seconds
+    INGESTION_ENQUEUE_TIMEOUT: float = 2.0  # seconds to wait for room before rejecting
+    # Most executions accepted by one POST /webhook/batch
+    WEBHOOK_BATCH_MAX_ITEMS: int = 1000
+    
+    # Execution payloads (the webhook fields without a column of their own)
+    # are stored as compact JSON, zlib-compressed from
+    # PAYLOAD_COMPRESS_MIN_BYTES up. Larger than PAYLOAD_MAX_BYTES (0 for no
+    # limit), only a marker with their size is kept
+    PAYLOAD_COMPRESS_MIN_BYTES: int = 256
+    PAYLOAD_MAX_BYTES: int = 65536
+    
+    # System pings: "full" stores every heartbeat, "coalesced" stores status
+    # changes plus one rollup row per system and interval
+    SYSTEM_PING_STORAGE: str = "full"
+    SYSTEM_PING_ROLLUP_MINUTES: int = 15
+    
+    # Local time zone, as an offset from UTC in hours, used for calendar
+    # periods and scheduled times (Natal - RN: UTC-3)
+    LOCAL_UTC_OFFSET_HOURS: float = -3
+    
+    # Seconds between missed-execution detector passes (each pass only
+    # touches scripts whose next period boundary has passed)
+    MISSED_CHECK_INTERVAL: int = 60
+    # Minutes a scheduled time or calendar period may run over before it is
+    # recorded as missed (long-running scripts report when they finish)
+    MISSED_GRACE_MINUTES: int = 15
+    
+    # Server-sent events: each client buffers at most SSE_QUEUE_SIZE events.
+    # When full, "drop_oldest" discards old events (and disconnects clients
+    # that stay full for SSE_SLOW_CONSUMER_TIMEOUT seconds), "disconnect"
+    # closes the client right away
+    SSE_QUEUE_SIZE: int = 256
+    SSE_OVERFLOW_POLICY: str = "drop_oldest"
+    SSE_SLOW_CONSUMER_TIMEOUT: float = 30.0
+    # Seconds of silence before a keep-alive comment is sent
+    SSE_HEARTBEAT_INTERVAL: float = 20.0
+    # Recent events kept for Last-Event-ID replay on reconnect
+    SSE_REPLAY_SIZE: int = 1000
+    
+    # Retention: raw executions and pings older than RETENTION_DAYS local
+    # days are folded into daily stats and deleted (0 keeps them forever).
+    # Runs every RETENTION_INTERVAL seconds, deleting RETENTION_BATCH_SIZE
+    # rows per transaction with RETENTION_BATCH_PAUSE seconds in between,
+    # then frees up to RETENTION_VACUUM_PAGES pages per step (SQLite)
+    RETENTION_DAYS: int = 0
+    RETENTION_INTERVAL: int = 3600
+    RETENTION_BATCH_SIZE: int = 500
+    RETENTION_BATCH_PAUSE: float = 0.05
+    RETENTION_VACUUM_PAGES: int = 1000
+    
+    # Prometheus metrics at /metrics (request latency, database statements,
+    # SSE fan-out, background task passes)
+    METRICS_ENABLED: bool = True
+    
+    # Workers: "single" runs everything in this process; "multi" is for
+    # uvicorn --workers N. The worker holding WORKER_LOCK_FILE leads: it
+    # prepares the database and runs the background monitors, and relays SSE
+    # events and cache/token changes between the workers over localhost
+    WORKER_MODE: str = "single"
+    WORKER_LOCK_FILE: str = "./monitor_rpa.lock"
+    
     # CORS
     CORS_ORIGINS: list[str] = ["http://localhost:5173", "http://localhost:3000"]
     
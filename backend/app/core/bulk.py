@@ -0,0 +1,34 @@
+"""
+Bulk writes.
+
+Rows whose generated ids aren't needed back are written with COPY on
+PostgreSQL, and with a single executemany INSERT elsewhere. (ORM flushes,
+used where the ids are needed, already batch into multi-row
+INSERT ... RETURNING statements.)
+"""
+from sqlalchemy import Table, insert
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+
+async def copy_records(connection: AsyncConnection, table: Table, columns: list[str], records: list[tuple]):
+    """COPY records into a PostgreSQL table, inside the connection's transaction."""
+    raw_connection = await connection.get_raw_connection()
+    await raw_connection.driver_connection.copy_records_to_table(
+        table.name, records=records, columns=columns, schema_name=table.schema
+    )
+
+
+async def insert_rows(connection: AsyncConnection, table: Table, rows: list[dict]) -> int:
+    """
+    Insert rows (dicts with the same keys) in one round trip. Column
+    defaults are not applied by COPY, so rows must carry every value. Does
+    not commit. Returns the number of rows written.
+    """
+    if not rows:
+        return 0
+    if connection.dialect.name == "postgresql":
+        columns = list(rows[0])
+        await copy_records(connection, table, columns, [tuple(row[column] for column in columns) for row in rows])
+    else:
+        await connection.execute(insert(table), rows)
+    return len(rows)
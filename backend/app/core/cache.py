@@ -0,0 +1,90 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Hashable
+
+from app.config import get_settings
+from app.core.cluster import cluster
+
+
+class TTLCache:
+    """
+    Small in-process cache for computed values with a time-to-live and explicit invalidation.
+    
+    Invalidations are relayed to the caches of the same name in the other workers.
+    """
+    def __init__(self, name: str, ttl: float):
+        self.name = name
+        self.ttl = ttl
+        self._entries: dict[Hashable, tuple[float, Any]] = {}
+        # Per-key load locks, with how many callers hold or wait on each;
+        # dropped by the last one so keys that are gone don't keep a lock
+        self._locks: dict[Hashable, tuple[asyncio.Lock, int]] = {}
+        self._generation = 0
+
+    def _get_fresh(self, key: Hashable):
+        entry = self._entries.get(key)
+        if entry and entry[0] > time.monotonic():
+            return entry
+        return None
+
+    async def get_or_set(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Return the cached value for key, computing it with factory on a miss.
+        
+        Concurrent misses for the same key wait for a single computation.
+        """
+        entry = self._get_fresh(key)
+        if entry:
+            return entry[1]
+
+        lock, users = self._locks.get(key) or (asyncio.Lock(), 0)
+        self._locks[key] = (lock, users + 1)
+        try:
+            async with lock:
+                entry = self._get_fresh(key)
+                if entry:
+                    return entry[1]
+
+                generation = self._generation
+                value = await factory()
+                # Don't store a value that was invalidated while it was being computed
+                if generation == self._generation:
+                    self._entries[key] = (time.monotonic() + self.ttl, value)
+                return value
+        finally:
+            lock, users = self._locks[key]
+            if users == 1:
+                del self._locks[key]
+            else:
+                self._locks[key] = (lock, users - 1)
+
+    def invalidate(self, key: Hashable = None, relay: bool = True):
+        """Drop one key, or everything when no key is given."""
+        if relay:
+            cluster.publish("cache", {"name": self.name, "key": key})
+        self._generation += 1
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+# Global instances
+dashboard_cache = TTLCache("dashboard", ttl=get_settings().DASHBOARD_CACHE_TTL)
+history_totals = TTLCache("history_totals", ttl=get_settings().HISTORY_TOTAL_CACHE_TTL)
+
+_caches = {cache.name: cache for cache in (dashboard_cache, history_totals)}
+
+
+def _invalidate_relayed(message: dict):
+    # Tuple keys arrive as JSON lists
+    key = message["key"]
+    _caches[message["name"]].invalidate(tuple(key) if isinstance(key, list) else key, relay=False)
+
+
+def _invalidate_all():
+    for cache in _caches.values():
+        cache.invalidate(relay=False)
+
+
+cluster.subscribe("cache", _invalidate_relayed)
+cluster.on_resync(_invalidate_all)
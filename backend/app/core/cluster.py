@@ -0,0 +1,278 @@
+"""
+Cluster coordination, for running several workers (uvicorn --workers N).
+
+With WORKER_MODE="multi" the workers elect a leader by taking an exclusive
+lock on WORKER_LOCK_FILE. The leader prepares the database, runs the
+background monitors and hosts a small message hub on a localhost port, which
+it announces (with a random token) in WORKER_LOCK_FILE + ".bus". The other
+workers connect to the hub. The lock is released when the leader exits, and
+the first follower to notice takes over.
+
+Modules keep their process-local state (SSE clients, caches, token indexes,
+timeout deadlines) in step through the hub:
+
+    cluster.publish("events", message)      # relay to every other worker
+    cluster.subscribe("events", handler)    # handler(message), for the others' messages
+    cluster.on_resync(callback)             # messages may have been missed (reconnect, takeover)
+
+With the default WORKER_MODE="single" this process is the leader and
+publish does nothing.
+"""
+import asyncio
+import inspect
+import json
+import logging
+import os
+import secrets
+import sys
+from typing import Callable, Optional
+
+from app.config import get_settings
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+# Seconds between attempts to reach (or replace) the leader
+RETRY_INTERVAL = 1.0
+# Longest message, and the most a worker may leave unread before it is dropped
+MAX_MESSAGE_SIZE = 16 * 1024 * 1024
+
+if sys.platform == "win32":
+    import msvcrt
+
+    def _try_lock(fd: int) -> bool:
+        try:
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+            return True
+        except OSError:
+            return False
+else:
+    import fcntl
+
+    def _try_lock(fd: int) -> bool:
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except OSError:
+            return False
+
+
+class Cluster:
+    """Leader election and message relay between the workers of one host."""
+    def __init__(self, multi_worker: bool, lock_path: str):
+        self.multi_worker = multi_worker
+        self.lock_path = lock_path
+        self.bus_path = lock_path + ".bus"
+        self.is_leader = not multi_worker
+
+        self._handlers: dict[str, list[Callable[[object], None]]] = {}
+        self._resync_callbacks: list[Callable] = []
+        self._leader_callbacks: list[Callable[[], None]] = []
+
+        self._lock_fd: Optional[int] = None
+        # Leader: the hub and a writer per follower
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._token: Optional[str] = None
+        self._peers: set[asyncio.StreamWriter] = set()
+        # Follower: the connection to the hub
+        self._hub_reader: Optional[asyncio.StreamReader] = None
+        self._hub: Optional[asyncio.StreamWriter] = None
+        self._follow_task: Optional[asyncio.Task] = None
+
+    def subscribe(self, channel: str, handler: Callable[[object], None]):
+        """Call handler(payload) for every message other workers publish on channel."""
+        self._handlers.setdefault(channel, []).append(handler)
+
+    def on_resync(self, callback: Callable):
+        """Call callback() (a function or coroutine function) when relayed messages may have been lost."""
+        self._resync_callbacks.append(callback)
+
+    def run_as_leader(self, start: Callable[[], None]):
+        """Call start() now if this worker leads, or when it takes over."""
+        if self.is_leader:
+            start()
+        else:
+            self._leader_callbacks.append(start)
+
+    def publish(self, channel: str, payload):
+        """Relay a JSON-serializable payload to every other worker. No-op with a single worker."""
+        if not self.multi_worker:
+            return
+        line = json.dumps({"channel": channel, "payload": payload}).encode() + b"\n"
+        if self.is_leader:
+            for peer in list(self._peers):
+                self._send(peer, line)
+        elif self._hub is not None:
+            self._send(self._hub, line)
+
+    def _send(self, writer: asyncio.StreamWriter, line: bytes):
+        if writer.is_closing():
+            return
+        # A worker that stopped reading is cut off; it resyncs when it reconnects
+        if writer.transport.get_write_buffer_size() > MAX_MESSAGE_SIZE:
+            logger.warning("Dropping the connection to a worker that stopped reading")
+            writer.close()
+            return
+        writer.write(line)
+
+    def _dispatch(self, line: bytes):
+        message = json.loads(line)
+        for handler in self._handlers.get(message["channel"], ()):
+            try:
+                handler(message["payload"])
+            except Exception:
+                logger.exception(f"Error handling a relayed {message['channel']} message")
+
+    async def _resync(self):
+        for callback in self._resync_callbacks:
+            try:
+                result = callback()
+                if inspect.isawaitable(result):
+                    await result
+            except Exception:
+                logger.exception("Error resyncing after a gap in relayed messages")
+
+    def elect(self) -> bool:
+        """Try to become the leader. Always succeeds with a single worker."""
+        if self.is_leader:
+            return True
+        fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT)
+        if not _try_lock(fd):
+            os.close(fd)
+            return False
+        # Held (and the lock with it) until close() or the process exits
+        self._lock_fd = fd
+        self.is_leader = True
+        return True
+
+    async def start(self) -> bool:
+        """
+        Elect a leader. Returns True if this worker leads; otherwise waits
+        until the leader serves (after preparing the database) and follows it.
+        """
+        if self.elect():
+            return True
+        while not await self._connect():
+            await asyncio.sleep(RETRY_INTERVAL)
+            if self.elect():
+                return True
+        self._follow_task = asyncio.create_task(self._follow())
+        logger.info(f"Worker {os.getpid()} following the leader")
+        return False
+
+    async def serve(self):
+        """Leader: start the hub and announce it to the other workers."""
+        if not self.multi_worker:
+            return
+        self._token = secrets.token_hex(16)
+        self._server = await asyncio.start_server(self._serve_peer, "127.0.0.1", 0, limit=MAX_MESSAGE_SIZE)
+        port = self._server.sockets[0].getsockname()[1]
+        announcement = self.bus_path + ".tmp"
+        with open(announcement, "w") as f:
+            json.dump({"port": port, "token": self._token}, f)
+        os.replace(announcement, self.bus_path)
+        logger.info(f"Worker {os.getpid()} leading, relaying messages on 127.0.0.1:{port}")
+
+    async def _serve_peer(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            hello = json.loads(await asyncio.wait_for(reader.readline(), timeout=5))
+            if not secrets.compare_digest(str(hello.get("token")), self._token):
+                return
+            writer.write(b'{"ok": true}\n')
+            self._peers.add(writer)
+            async for line in reader:
+                self._dispatch(line)
+                for peer in list(self._peers):
+                    if peer is not writer:
+                        self._send(peer, line)
+        except (OSError, ValueError, KeyError, asyncio.TimeoutError):
+            pass
+        finally:
+            self._peers.discard(writer)
+            writer.close()
+
+    async def _connect(self) -> bool:
+        """Follower: connect to the hub announced in the bus file, if it is up."""
+        writer = None
+        try:
+            with open(self.bus_path) as f:
+                address = json.load(f)
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection("127.0.0.1", address["port"], limit=MAX_MESSAGE_SIZE), timeout=5
+            )
+            writer.write(json.dumps({"token": address["token"]}).encode() + b"\n")
+            reply = json.loads(await asyncio.wait_for(reader.readline(), timeout=5))
+            if reply.get("ok"):
+                self._hub_reader, self._hub = reader, writer
+                return True
+        except (OSError, ValueError, KeyError, asyncio.TimeoutError):
+            # Not announced yet, or announced by a leader that is gone
+            pass
+        if writer is not None:
+            writer.close()
+        return False
+
+    async def _follow(self):
+        """Follower: handle relayed messages; on disconnect, reconnect or take over."""
+        while True:
+            try:
+                async for line in self._hub_reader:
+                    self._dispatch(line)
+            except (OSError, ValueError, KeyError):
+                pass
+            self._hub.close()
+            self._hub = None
+            logger.warning(f"Worker {os.getpid()} lost the connection to the leader")
+
+            while not await self._connect():
+                if self.elect():
+                    await self._take_over()
+                    return
+                await asyncio.sleep(RETRY_INTERVAL)
+            await self._resync()
+
+    async def _take_over(self):
+        logger.info(f"Worker {os.getpid()} taking over as the leader")
+        await self.serve()
+        for start in self._leader_callbacks:
+            start()
+        self._leader_callbacks.clear()
+        await self._resync()
+
+    async def close(self):
+        """Leave the cluster: stop relaying and release the leadership."""
+        if self._follow_task is not None:
+            self._follow_task.cancel()
+        if self._hub is not None:
+            self._hub.close()
+        if self._server is not None:
+            self._server.close()
+            for peer in list(self._peers):
+                peer.close()
+            try:
+                os.remove(self.bus_path)
+            except OSError:
+                pass
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+    def stats(self) -> dict:
+        """This worker's role in the cluster."""
+        stats = {
+            "mode": "multi" if self.multi_worker else "single",
+            "pid": os.getpid(),
+            "role": "leader" if self.is_leader else "follower",
+        }
+        if self.multi_worker and self.is_leader:
+            stats["followers"] = len(self._peers)
+        elif self.multi_worker:
+            stats["connected"] = self._hub is not None
+        return stats
+
+# Global instances
+cluster = Cluster(settings.WORKER_MODE == "multi", settings.WORKER_LOCK_FILE)
+
+metrics.gauge("worker_is_leader", "Whether this worker runs the background monitors", collect=lambda: int(cluster.is_leader))
@@ -0,0 +1,251 @@
+"""
+Metrics.
+
+A small in-process registry of counters, gauges and histograms, served in
+the Prometheus text format at /metrics. Recording a value is a dict lookup
+and a few additions, cheap enough to leave on in production; metrics that
+mirror state kept elsewhere (SSE subscribers, queue depths) take a
+`collect` function and are only read when scraped.
+
+Each module defines its metrics next to its global instances:
+
+    broadcast_seconds = metrics.histogram("sse_broadcast_duration_seconds", "Time to fan out one event")
+    broadcast_seconds.observe(elapsed)
+"""
+import bisect
+import time
+from contextvars import ContextVar
+from typing import Callable, Optional, Union
+
+from sqlalchemy import event
+from starlette.routing import NoMatchFound
+
+# Seconds: 0.5 ms to 10 s
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Statements per request
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+
+# Collect functions return a value, or {label values tuple: value}
+Collected = Union[float, dict[tuple, float]]
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Metric:
+    """Base class: a named family of samples, one per combination of label values."""
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labels: tuple = (), collect: Optional[Callable[[], Collected]] = None):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.collect = collect
+        self._values: dict[tuple, float] = {}
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(labels[name] for name in self.labels)
+
+    def _current(self) -> dict[tuple, float]:
+        if self.collect is None:
+            return self._values
+        collected = self.collect()
+        return collected if isinstance(collected, dict) else {(): collected}
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for key, value in self._current().items():
+            lines.append(f"{self.name}{_format_labels(self.labels, key)} {value}")
+        return lines
+
+
+class Counter(Metric):
+    """A value that only goes up."""
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    """A value that goes up and down."""
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        self._values[self._key(labels)] = value
+
+
+class Histogram(Metric):
+    """Observations counted in cumulative buckets, with their sum and count."""
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+        # {label values: [count per bucket (+Inf last), sum, count]}
+        self._series: dict[tuple, list] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for key, (counts, total, count) in self._series.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += bucket_count
+                le = f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Every metric of the process, rendered together."""
+    def __init__(self):
+        self._metrics: dict[str, Metric] = {}
+
+    def _register(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labels: tuple = (), collect: Optional[Callable[[], Collected]] = None) -> Counter:
+        return self._register(Counter(name, help, labels, collect))
+
+    def gauge(self, name: str, help: str, labels: tuple = (), collect: Optional[Callable[[], Collected]] = None) -> Gauge:
+        return self._register(Gauge(name, help, labels, collect))
+
+    def histogram(self, name: str, help: str, labels: tuple = (), buckets: tuple = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help, labels, buckets))
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# Global instances
+metrics = MetricsRegistry()
+
+http_requests = metrics.counter(
+    "http_requests_total", "HTTP requests by route and status", ("method", "route", "status")
+)
+http_request_seconds = metrics.histogram(
+    "http_request_duration_seconds", "Time until the response headers are sent", ("method", "route")
+)
+http_request_queries = metrics.histogram(
+    "http_request_db_queries", "Database statements issued per request", ("method", "route"), QUERY_COUNT_BUCKETS
+)
+http_request_db_seconds = metrics.histogram(
+    "http_request_db_seconds", "Time spent in database statements per request", ("method", "route")
+)
+db_queries = metrics.counter("db_queries_total", "Database statements executed", ("pool",))
+db_query_seconds = metrics.histogram("db_query_duration_seconds", "Database statement execution time", ("pool",))
+monitor_pass_seconds = metrics.histogram(
+    "monitor_pass_duration_seconds", "Duration of one pass of a background task", ("monitor",)
+)
+monitor_rows = metrics.counter(
+    "monitor_rows_examined_total", "Rows loaded or written by background tasks", ("monitor",)
+)
+
+# [statements, seconds] of the request being served, if any
+_request_queries: ContextVar[Optional[list]] = ContextVar("request_queries", default=None)
+
+
+def instrument_engine(engine, pool: str):
+    """Count and time every statement run through an (async) engine."""
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context._metrics_started = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - context._metrics_started
+        db_queries.inc(pool=pool)
+        db_query_seconds.observe(elapsed, pool=pool)
+        tracked = _request_queries.get()
+        if tracked is not None:
+            tracked[0] += 1
+            tracked[1] += elapsed
+
+
+def _route_template(scope) -> str:
+    """Path template of the matched route, e.g. /api/scripts/{script_id}."""
+    route = scope.get("route")
+    if route is None:
+        return "unmatched"
+    # FastAPI leaves the include_router prefix out of route.path: it is what
+    # precedes the route's own path, rebuilt from the path parameters
+    try:
+        own_path = route.url_path_for(route.name, **scope.get("path_params", {}))
+    except NoMatchFound:
+        return route.path
+    if not scope["path"].endswith(own_path):
+        return route.path
+    return scope["path"][:len(scope["path"]) - len(own_path)] + route.path
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording each request's latency and database work per
+    route template (so /api/scripts/1 and /api/scripts/2 share a series).
+    Latency is measured until the response starts, which keeps streaming
+    responses such as /api/events meaningful.
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        queries = [0, 0.0]
+        token = _request_queries.set(queries)
+        recorded = False
+
+        def record(status: int):
+            nonlocal recorded
+            recorded = True
+            labels = {"method": scope["method"], "route": _route_template(scope)}
+            http_requests.inc(status=status, **labels)
+            http_request_seconds.observe(time.perf_counter() - started, **labels)
+            http_request_queries.observe(queries[0], **labels)
+            http_request_db_seconds.observe(queries[1], **labels)
+
+        async def send_with_metrics(message):
+            if message["type"] == "http.response.start" and not recorded:
+                record(message["status"])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        except Exception:
+            if not recorded:
+                record(500)
+            raise
+        finally:
+            _request_queries.reset(token)
@@ -1,37 +1,225 @@
 import asyncio
-from typing import List
+import json
+import logging
+import time
+import uuid
+from collections import deque
+from typing import Optional
+
+from app.config import get_settings
+from app.core.cluster import cluster
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+RESYNC = json.dumps({"type": "resync", "data": {}})
+
+
+class Subscriber:
+    """
+    One SSE client: a bounded buffer of encoded frames.
+
+    When the buffer is full, "drop_oldest" discards the oldest frame and
+    "disconnect" closes the subscriber. Either way a client that stays full
+    for longer than slow_timeout seconds is considered stalled. A client
+    that lost frames gets a "resync" frame in their place (with the id of
+    the last one dropped), so it knows to refetch.
+    """
+    def __init__(self, max_pending: int, overflow: str, slow_timeout: float):
+        self.max_pending = max_pending
+        self.overflow = overflow
+        self.slow_timeout = slow_timeout
+        self.closed = False
+        self.dropped = 0
+        self._frames: deque[bytes] = deque()
+        self._resync: Optional[bytes] = None
+        self._ready = asyncio.Event()
+        self._full_since: Optional[float] = None
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+    def push(self, frame: bytes, now: float) -> bool:
+        """Buffer a frame without blocking. Returns False if the subscriber must be evicted."""
+        if len(self._frames) >= self.max_pending:
+            if self.overflow == "disconnect":
+                return False
+            if self._full_since is None:
+                self._full_since = now
+            elif now - self._full_since > self.slow_timeout:
+                return False
+            event_id = self._frames.popleft().partition(b"\n")[0]
+            self._resync = event_id + b"\ndata: " + RESYNC.encode() + b"\n\n"
+            self.dropped += 1
+        self._frames.append(frame)
+        self._ready.set()
+        return True
+
+    async def get(self) -> Optional[bytes]:
+        """Wait for the next frame. Returns None once the subscriber is closed."""
+        while not self._frames:
+            if self.closed:
+                return None
+            self._ready.clear()
+            await self._ready.wait()
+        if self._resync is not None:
+            frame, self._resync = self._resync, None
+            return frame
+        if self._full_since is not None and len(self._frames) < self.max_pending:
+            self._full_since = None
+        return self._frames.popleft()
+
+    def close(self):
+        """Stop the subscriber; pending frames are discarded."""
+        self.closed = True
+        self._frames.clear()
+        self._resync = None
+        self._ready.set()
+
 
 class NotificationManager:
-    """Manages SSE connections for real-time updates."""
-    def __init__(self):
-        self.active_connections: List[asyncio.Queue] = []
+    """
+    Manages SSE connections for real-time updates.
+
+    Every event gets an id ("<epoch>-<sequence>", the epoch changes on each
+    restart) and the latest ones are kept in a small log, so a client that
+    reconnects with Last-Event-ID gets what it missed replayed. When that is
+    not possible it gets a "resync" event telling it to refetch.
+
+    With several workers, events are relayed to the other workers, each of
+    which numbers them for its own clients (so a client reconnecting to
+    another worker gets a "resync").
+    """
+    def __init__(self, max_pending: int, overflow: str, slow_timeout: float, replay_size: int):
+        self.max_pending = max_pending
+        self.overflow = overflow
+        self.slow_timeout = slow_timeout
+        self.active_connections: set[Subscriber] = set()
+
+        self._epoch = uuid.uuid4().hex[:8]
+        self._sequence = 0
+        self._log: deque[tuple[int, bytes]] = deque(maxlen=replay_size)
 
-    async def subscribe(self) -> asyncio.Queue:
-        """Subscribe to notifications."""
-        queue = asyncio.Queue()
-        self.active_connections.append(queue)
-        return queue
+        # Metrics
+        self.events = 0
+        self.frames_sent = 0
+        self.evicted = 0
+        self._dropped_by_evicted = 0
 
-    def unsubscribe(self, queue: asyncio.Queue):
+    async def subscribe(self, last_event_id: Optional[str] = None) -> Subscriber:
+        """Subscribe to notifications, replaying what was missed since last_event_id."""
+        subscriber = Subscriber(self.max_pending, self.overflow, self.slow_timeout)
+        if last_event_id:
+            now = time.monotonic()
+            for frame in self._replay(last_event_id):
+                subscriber.push(frame, now)
+        self.active_connections.add(subscriber)
+        return subscriber
+
+    def _replay(self, last_event_id: str) -> list[bytes]:
+        """Frames after last_event_id, or a single resync frame if they are no longer available."""
+        epoch, _, sequence = last_event_id.strip().partition("-")
+        try:
+            sequence = int(sequence)
+        except ValueError:
+            sequence = None
+
+        if epoch == self._epoch and sequence is not None and sequence <= self._sequence:
+            oldest = self._log[0][0] if self._log else self._sequence + 1
+            # Everything after `sequence` is still in the log
+            if oldest <= sequence + 1:
+                return [frame for seq, frame in self._log if seq > sequence]
+
+        return [self._encode(self._sequence, RESYNC)]
+
+    def _encode(self, sequence: int, data: str) -> bytes:
+        return f"id: {self._epoch}-{sequence}\ndata: {data}\n\n".encode()
+
+    def unsubscribe(self, subscriber: Subscriber):
         """Unsubscribe from notifications."""
-        if queue in self.active_connections:
-            self.active_connections.remove(queue)
+        self.active_connections.discard(subscriber)
+
+    def _evict(self, subscriber: Subscriber):
+        self.unsubscribe(subscriber)
+        subscriber.close()
+        self.evicted += 1
+        self._dropped_by_evicted += subscriber.dropped
+        logger.warning(
+            f"Evicted slow SSE subscriber ({len(self.active_connections)} remaining, "
+            f"{subscriber.dropped} events dropped)"
+        )
 
     async def broadcast(self, event_type: str, data: dict = None):
-        """Broadcast an event to all subscribers."""
+        """
+        Broadcast an event to all subscribers, in every worker.
+
+        The event is serialized once and handed to every subscriber's buffer
+        without awaiting, so a stalled client never delays the caller.
+        """
         message = {
             "type": event_type,
             "data": data or {}
         }
-        import json
-        payload = f"data: {json.dumps(message)}\n\n"
-        
-        # We use a copy of the list to avoid issues if a subscriber disconnects during broadcast
-        for queue in list(self.active_connections):
-            try:
-                await queue.put(payload)
-            except Exception:
-                self.unsubscribe(queue)
+        encoded = json.dumps(message)
+        self.deliver(encoded)
+        cluster.publish("events", encoded)
+
+    def deliver(self, data: str):
+        """Hand an encoded message to this process's subscribers."""
+        started = time.perf_counter()
+        self._sequence += 1
+        frame = self._encode(self._sequence, data)
+        self._log.append((self._sequence, frame))
+        self.events += 1
+
+        now = time.monotonic()
+        # Iterate over a copy: evictions modify the set
+        for subscriber in list(self.active_connections):
+            if subscriber.push(frame, now):
+                self.frames_sent += 1
+            else:
+                self._evict(subscriber)
+        broadcast_seconds.observe(time.perf_counter() - started)
+
+    def resync(self):
+        """Tell every subscriber to refetch, e.g. after relayed events may have been lost."""
+        self.deliver(RESYNC)
+
+    def stats(self) -> dict:
+        """Current subscriber and delivery metrics."""
+        return {
+            "subscribers": len(self.active_connections),
+            "pending_frames": sum(len(s) for s in self.active_connections),
+            "events": self.events,
+            "frames_sent": self.frames_sent,
+            "dropped": self._dropped_by_evicted + sum(s.dropped for s in self.active_connections),
+            "evicted": self.evicted,
+        }
 
 # Global instances
-notification_manager = NotificationManager()
+notification_manager = NotificationManager(
+    max_pending=settings.SSE_QUEUE_SIZE,
+    overflow=settings.SSE_OVERFLOW_POLICY,
+    slow_timeout=settings.SSE_SLOW_CONSUMER_TIMEOUT,
+    replay_size=settings.SSE_REPLAY_SIZE,
+)
+
+cluster.subscribe("events", notification_manager.deliver)
+cluster.on_resync(notification_manager.resync)
+
+broadcast_seconds = metrics.histogram("sse_broadcast_duration_seconds", "Time to hand one event to every SSE client")
+metrics.gauge("sse_subscribers", "Connected SSE clients", collect=lambda: len(notification_manager.active_connections))
+metrics.gauge(
+    "sse_pending_frames", "Frames waiting in SSE client buffers",
+    collect=lambda: sum(len(s) for s in notification_manager.active_connections),
+)
+metrics.gauge(
+    "sse_max_pending_frames", "Frames waiting in the fullest SSE client buffer",
+    collect=lambda: max((len(s) for s in notification_manager.active_connections), default=0),
+)
+metrics.counter("sse_events_total", "Events broadcast", collect=lambda: notification_manager.events)
+metrics.counter("sse_frames_sent_total", "Frames handed to SSE clients", collect=lambda: notification_manager.frames_sent)
+metrics.counter("sse_frames_dropped_total", "Frames dropped by full SSE buffers", collect=lambda: notification_manager.stats()["dropped"])
+metrics.counter("sse_evicted_total", "SSE clients disconnected for falling behind", collect=lambda: notification_manager.evicted)
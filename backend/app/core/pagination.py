@@ -0,0 +1,50 @@
+import base64
+import json
+from datetime import datetime
+
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination cursor can't be decoded."""
+    pass
+
+
+def encode_cursor(*values) -> str:
+    """
+    Encode the sort key of the last row of a page into an opaque cursor.
+
+    Datetimes are stored as ISO strings and restored by decode_cursor.
+    """
+    raw = json.dumps([
+        {"dt": value.isoformat()} if isinstance(value, datetime) else value
+        for value in values
+    ], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode_value(value, field):
+    if field is datetime:
+        if not isinstance(value, dict) or not isinstance(value.get("dt"), str):
+            raise ValueError("expected a timestamp")
+        return datetime.fromisoformat(value["dt"])
+    if field is int:
+        if not isinstance(value, int) or isinstance(value, bool):
+            raise ValueError("expected an integer")
+        return value
+    if value not in field:
+        raise ValueError(f"expected one of {sorted(field)}")
+    return value
+
+
+def decode_cursor(cursor: str, *fields) -> list:
+    """
+    Decode a cursor made by encode_cursor, checking each value against its
+    field: datetime, int, or a collection of the accepted strings.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(fields):
+            raise ValueError("unexpected cursor shape")
+        return [_decode_value(value, field) for value, field in zip(values, fields)]
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor(f"Invalid cursor: {cursor}") from e
@@ -0,0 +1,59 @@
+"""
+Compact storage of execution payloads.
+
+A webhook's status, duration and error message have their own columns, so
+only the remaining fields (data, start_time and any extra field) are kept,
+as compact JSON in Execution.payload_data. Payloads of
+PAYLOAD_COMPRESS_MIN_BYTES or more are zlib-compressed when that makes them
+smaller; a leading format byte tells the two apart. Payloads larger than
+PAYLOAD_MAX_BYTES are replaced by a marker with their size.
+
+Rows written before this keep their JSON text in the legacy Execution.payload
+column until scripts.compact_payloads converts them.
+"""
+import json
+import zlib
+from typing import Optional
+
+from app.config import get_settings
+
+settings = get_settings()
+
+# Fields of a webhook payload that are stored in their own columns
+COLUMN_FIELDS = ("status", "duration_ms", "error_message")
+
+# Format byte of an encoded payload
+RAW_JSON = b"j"
+ZLIB_JSON = b"z"
+
+
+def payload_fields(fields: dict) -> dict:
+    """The fields of a webhook payload worth storing: no column fields, no nulls."""
+    return {
+        key: value for key, value in fields.items()
+        if value is not None and key not in COLUMN_FIELDS
+    }
+
+
+def encode_payload(fields: dict) -> Optional[bytes]:
+    """Encode payload fields (see payload_fields) for payload_data; None if there are none."""
+    if not fields:
+        return None
+    raw = json.dumps(fields, separators=(",", ":"), default=str).encode()
+    if settings.PAYLOAD_MAX_BYTES and len(raw) > settings.PAYLOAD_MAX_BYTES:
+        raw = json.dumps({"truncated": True, "size": len(raw)}, separators=(",", ":")).encode()
+    if len(raw) >= settings.PAYLOAD_COMPRESS_MIN_BYTES:
+        compressed = zlib.compress(raw)
+        if len(compressed) < len(raw):
+            return ZLIB_JSON + compressed
+    return RAW_JSON + raw
+
+
+def decode_payload(data: Optional[bytes], legacy: Optional[str] = None) -> Optional[str]:
+    """The JSON text of a stored payload, from payload_data or else the legacy column."""
+    if data is None:
+        return legacy
+    data = bytes(data)
+    if data[:1] == ZLIB_JSON:
+        return zlib.decompress(data[1:]).decode()
+    return data[1:].decode()
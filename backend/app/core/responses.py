@@ -0,0 +1,35 @@
+"""
+Fast JSON responses for the high-traffic read endpoints.
+
+FastAPI checks whatever an endpoint returns against its response_model
+before serializing it, so a list built as response models goes through
+pydantic once per row to build them and again to validate and dump them.
+The list and dashboard endpoints instead build plain dicts straight from
+row tuples, in the field order of their response_model (which still
+documents the route), and return a FastJSONResponse: encoded in one pass
+with orjson, or pydantic-core's encoder when orjson isn't installed.
+"""
+from typing import Any
+
+from fastapi.responses import JSONResponse
+from pydantic_core import to_json
+
+try:
+    import orjson
+except ImportError:  # Optional, see requirements.txt
+    orjson = None
+
+
+def dumps(content: Any) -> bytes:
+    """Encode dicts, lists, scalars, datetimes and dates as compact UTF-8 JSON."""
+    if orjson is not None:
+        return orjson.dumps(content)
+    return to_json(content)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response encoded with dumps; content may also be bytes dumps already encoded."""
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return dumps(content)
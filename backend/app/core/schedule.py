@@ -0,0 +1,292 @@
+"""
+Schedule engine.
+
+Compiles a script's frequency settings (frequency, expected_interval,
+scheduled_times) into an immutable rule that answers when the next run is
+due, when the previous one was due and which periods passed between two
+moments. Rules are cached per script, so the listing, the dashboard and the
+missed-execution monitor share one implementation and scheduled_times is
+parsed once per script change instead of on every call.
+
+Every method takes and returns naive UTC datetimes; calendar periods and
+scheduled times are evaluated in local time (LOCAL_UTC_OFFSET_HOURS). A
+scheduled time or period only counts as missed once `grace`
+(MISSED_GRACE_MINUTES) has passed after it, since scripts report when they
+finish.
+"""
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+from typing import NamedTuple, Optional
+
+from app.config import get_settings
+
+settings = get_settings()
+
+# Local time = UTC + offset (Natal - RN: UTC-3 by default)
+LOCAL_OFFSET = timedelta(hours=settings.LOCAL_UTC_OFFSET_HOURS)
+
+# Time a scheduled time or period may run over before it counts as missed
+MISSED_GRACE = timedelta(minutes=settings.MISSED_GRACE_MINUTES)
+
+# Frequencies whose periods follow the calendar
+PERIOD_FREQUENCIES = ("daily", "weekly", "biweekly", "monthly")
+
+
+def to_local(at: datetime) -> datetime:
+    """Convert a UTC moment to local time."""
+    return at + LOCAL_OFFSET
+
+
+def to_utc(at_local: datetime) -> datetime:
+    """Convert a local moment to UTC."""
+    return at_local - LOCAL_OFFSET
+
+
+def local_day(at: datetime) -> date:
+    """Local calendar day of a UTC moment."""
+    return to_local(at).date()
+
+
+def local_day_start(day: date) -> datetime:
+    """UTC moment a local calendar day starts."""
+    return to_utc(datetime.combine(day, time()))
+
+
+def _day_start(at: datetime) -> datetime:
+    return at.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def parse_scheduled_times(scheduled_times: Optional[str]) -> tuple[timedelta, ...]:
+    """Parse times like "09:00,14:00" into sorted offsets from the start of the day."""
+    times = []
+    for t_str in (scheduled_times or "").split(","):
+        try:
+            h, m = map(int, t_str.strip().split(":"))
+        except ValueError:
+            continue
+        if 0 <= h < 24 and 0 <= m < 60:
+            times.append(timedelta(hours=h, minutes=m))
+    return tuple(sorted(set(times)))
+
+
+class NoRule(NamedTuple):
+    """Script without a schedule: never due, never misses anything."""
+
+    @property
+    def kind(self) -> str:
+        return "none"
+
+    def next_due(self, last_exec_at: Optional[datetime], created_at: datetime) -> Optional[datetime]:
+        return None
+
+    def previous_due(self, at: datetime) -> Optional[datetime]:
+        return None
+
+    def periods_between(
+        self, after: datetime, until: datetime, grace: timedelta = MISSED_GRACE
+    ) -> tuple[list[datetime], datetime]:
+        return [], until
+
+    def next_missed_check(self, after: datetime, grace: timedelta = MISSED_GRACE) -> Optional[datetime]:
+        return None
+
+
+class IntervalRule(NamedTuple):
+    """Must run again within a fixed number of minutes ("custom" frequency, or legacy expected_interval)."""
+    minutes: int
+
+    @property
+    def kind(self) -> str:
+        return "interval"
+
+    def next_due(self, last_exec_at: Optional[datetime], created_at: datetime) -> Optional[datetime]:
+        if not last_exec_at:
+            return created_at
+        return last_exec_at + timedelta(minutes=self.minutes)
+
+    def previous_due(self, at: datetime) -> Optional[datetime]:
+        # Relative to the last execution, not to the clock
+        return None
+
+    def periods_between(
+        self, after: datetime, until: datetime, grace: timedelta = MISSED_GRACE
+    ) -> tuple[list[datetime], datetime]:
+        # Intervals are reported as delays, never recorded as missed
+        return [], until
+
+    def next_missed_check(self, after: datetime, grace: timedelta = MISSED_GRACE) -> Optional[datetime]:
+        return None
+
+
+class CalendarRule(NamedTuple):
+    """Must run once per local calendar period: day, week (from Monday), fortnight (1-15, 16-end) or month."""
+    frequency: str
+
+    @property
+    def kind(self) -> str:
+        return "calendar"
+
+    def period_start(self, at_local: datetime) -> datetime:
+        """Start of the period (local time) containing a local moment."""
+        day_start_local = _day_start(at_local)
+        if self.frequency == "daily":
+            return day_start_local
+        if self.frequency == "weekly":
+            return day_start_local - timedelta(days=at_local.weekday())
+        if self.frequency == "monthly":
+            return day_start_local.replace(day=1)
+        return day_start_local.replace(day=1 if at_local.day <= 15 else 16)
+
+    def next_period_start(self, period_start_local: datetime) -> datetime:
+        """Start of the period (local time) following the given one."""
+        if self.frequency == "daily":
+            return period_start_local + timedelta(days=1)
+        if self.frequency == "weekly":
+            return period_start_local + timedelta(weeks=1)
+        if self.frequency == "monthly":
+            return (period_start_local + timedelta(days=32)).replace(day=1)
+        if period_start_local.day == 1:
+            return period_start_local.replace(day=16)
+        return (period_start_local + timedelta(days=20)).replace(day=1)
+
+    def next_due(self, last_exec_at: Optional[datetime], created_at: datetime) -> Optional[datetime]:
+        # Due again when the period following the last execution starts
+        if not last_exec_at:
+            return created_at
+        return to_utc(self.next_period_start(self.period_start(to_local(last_exec_at))))
+
+    def previous_due(self, at: datetime) -> Optional[datetime]:
+        return to_utc(self.period_start(to_local(at)))
+
+    def periods_between(
+        self, after: datetime, until: datetime, grace: timedelta = MISSED_GRACE
+    ) -> tuple[list[datetime], datetime]:
+        """
+        Whole periods after the one containing `after` that ended at least
+        `grace` before `until`, as the last second of each period. Also
+        returns the start of the period containing `until - grace`, up to
+        which all periods were evaluated.
+        """
+        this_period_start_local = self.period_start(to_local(until - grace))
+        period_start_local = self.next_period_start(self.period_start(to_local(after)))
+        missed = []
+        while True:
+            period_end_local = self.next_period_start(period_start_local)
+            if period_end_local > this_period_start_local:
+                break
+            missed.append(to_utc(period_end_local - timedelta(seconds=1)))
+            period_start_local = period_end_local
+        return missed, to_utc(this_period_start_local)
+
+    def next_missed_check(self, after: datetime, grace: timedelta = MISSED_GRACE) -> Optional[datetime]:
+        # The period following `after` is missed once it ends (plus the grace)
+        following_start_local = self.next_period_start(self.period_start(to_local(after)))
+        return to_utc(self.next_period_start(following_start_local)) + grace
+
+
+class ScheduledRule(NamedTuple):
+    """Must run at fixed local times of the day."""
+    times: tuple[timedelta, ...]
+
+    @property
+    def kind(self) -> str:
+        return "scheduled"
+
+    def _next_slot_local(self, after_local: datetime) -> datetime:
+        day_start_local = _day_start(after_local)
+        for day in (0, 1):
+            for t in self.times:
+                slot = day_start_local + timedelta(days=day) + t
+                if slot > after_local:
+                    return slot
+
+    def next_due(self, last_exec_at: Optional[datetime], created_at: datetime) -> Optional[datetime]:
+        # First scheduled time after the last execution (or since the creation day)
+        if last_exec_at:
+            after_local = to_local(last_exec_at)
+        else:
+            after_local = _day_start(to_local(created_at)) - timedelta(microseconds=1)
+        return to_utc(self._next_slot_local(after_local))
+
+    def previous_due(self, at: datetime) -> Optional[datetime]:
+        at_local = to_local(at)
+        day_start_local = _day_start(at_local)
+        for day in (0, 1):
+            for t in reversed(self.times):
+                slot = day_start_local - timedelta(days=day) + t
+                if slot <= at_local:
+                    return to_utc(slot)
+
+    def periods_between(
+        self, after: datetime, until: datetime, grace: timedelta = MISSED_GRACE
+    ) -> tuple[list[datetime], datetime]:
+        """
+        Scheduled times strictly between `after` and `until - grace`, and
+        `until - grace`, up to which all times were evaluated.
+        """
+        until = until - grace
+        after_local = to_local(after)
+        until_local = to_local(until)
+        missed = []
+        day_start_local = _day_start(after_local)
+        while day_start_local <= until_local:
+            for t in self.times:
+                slot = day_start_local + t
+                if after_local < slot < until_local:
+                    missed.append(to_utc(slot))
+            day_start_local += timedelta(days=1)
+        return missed, until
+
+    def next_missed_check(self, after: datetime, grace: timedelta = MISSED_GRACE) -> Optional[datetime]:
+        return to_utc(self._next_slot_local(to_local(after))) + grace
+
+
+NO_RULE = NoRule()
+
+
+@lru_cache(maxsize=4096)
+def compile_rule(frequency: Optional[str], expected_interval: Optional[int], scheduled_times: Optional[str]):
+    """Compile frequency settings into a rule. Identical settings share one rule object."""
+    freq = (frequency or "").strip().lower()
+
+    if freq in PERIOD_FREQUENCIES:
+        return CalendarRule(freq)
+
+    if freq == "custom":
+        return IntervalRule(expected_interval) if expected_interval else NO_RULE
+
+    if freq == "scheduled":
+        times = parse_scheduled_times(scheduled_times)
+        return ScheduledRule(times) if times else NO_RULE
+
+    # Default fallback for old records or unspecified frequency
+    if expected_interval:
+        return IntervalRule(expected_interval)
+    return NO_RULE
+
+
+class ScheduleRules:
+    """Per-script rule cache, keyed by (script id, updated_at)."""
+    def __init__(self):
+        self._rules: dict[int, tuple[Optional[datetime], tuple]] = {}
+
+    def get(self, script):
+        """
+        Get the rule for a script (a Script, ScriptToken or row with id,
+        updated_at, frequency, expected_interval and scheduled_times).
+        """
+        cached = self._rules.get(script.id)
+        if cached is not None and cached[0] == script.updated_at:
+            return cached[1]
+        rule = compile_rule(script.frequency, script.expected_interval, script.scheduled_times)
+        if script.id is not None:
+            self._rules[script.id] = (script.updated_at, rule)
+        return rule
+
+    def discard(self, script_id: int):
+        """Forget a deleted script's rule."""
+        self._rules.pop(script_id, None)
+
+
+# Global instances
+schedule_rules = ScheduleRules()
@@ -0,0 +1,74 @@
+"""
+Mergeable quantile sketch for durations.
+
+Values are counted in logarithmic buckets, each RELATIVE_ACCURACY wide, so
+any quantile is answered within that relative error using a few dozen
+buckets whatever the number of values. Two sketches merge by adding their
+bucket counts, which lets per-batch or per-day sketches be combined exactly.
+"""
+import json
+import math
+from typing import Optional
+
+# Quantiles are within 2% of the true value
+RELATIVE_ACCURACY = 0.02
+GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+LOG_GAMMA = math.log(GAMMA)
+
+
+class DurationSketch:
+    """Log-bucketed counts of non-negative durations (ms)."""
+    def __init__(self, buckets: Optional[dict[int, int]] = None, zero_count: int = 0):
+        self.buckets: dict[int, int] = buckets or {}
+        self.zero_count = zero_count
+
+    @property
+    def count(self) -> int:
+        return self.zero_count + sum(self.buckets.values())
+
+    def add(self, value: float, count: int = 1):
+        """Count a value."""
+        if value <= 0:
+            self.zero_count += count
+            return
+        index = math.ceil(math.log(value) / LOG_GAMMA)
+        self.buckets[index] = self.buckets.get(index, 0) + count
+
+    def merge(self, other: "DurationSketch"):
+        """Add another sketch's counts to this one."""
+        self.zero_count += other.zero_count
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Value at quantile q (0-1), or None if the sketch is empty.
+
+        Nearest rank: the ceil(q * count)-th smallest value, so small sets
+        report their own tail (p95 of 4 values is the largest) rather than a
+        value interpolated below it. The value is its bucket's midpoint;
+        callers that track the exact min and max should clamp to them.
+        """
+        total = self.count
+        if not total:
+            return None
+        rank = max(1, math.ceil(q * total))
+        seen = self.zero_count
+        if rank <= seen:
+            return 0.0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if rank <= seen:
+                # Middle of the bucket (GAMMA^(index-1), GAMMA^index]
+                return 2 * GAMMA ** index / (GAMMA + 1)
+        return 2 * GAMMA ** max(self.buckets) / (GAMMA + 1)
+
+    def to_json(self) -> str:
+        return json.dumps({"zero": self.zero_count, "buckets": self.buckets}, separators=(",", ":"))
+
+    @classmethod
+    def from_json(cls, raw: Optional[str]) -> "DurationSketch":
+        if not raw:
+            return cls()
+        data = json.loads(raw)
+        return cls({int(index): count for index, count in data["buckets"].items()}, data["zero"])
@@ -0,0 +1,162 @@
+from datetime import datetime
+from typing import NamedTuple, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cluster import cluster
+from app.database import read_session
+from app.models import Script, System
+
+
+class ScriptToken(NamedTuple):
+    """What the webhook path needs to know about a script, without loading it."""
+    id: int
+    name: str
+    is_active: bool
+    frequency: Optional[str]
+    expected_interval: Optional[int]
+    scheduled_times: Optional[str]
+    calculate_average_time: bool
+    created_at: Optional[datetime]
+    updated_at: Optional[datetime]
+
+    @classmethod
+    def from_model(cls, script: Script) -> "ScriptToken":
+        return cls(
+            id=script.id,
+            name=script.name,
+            is_active=bool(script.is_active),
+            frequency=script.frequency,
+            expected_interval=script.expected_interval,
+            scheduled_times=script.scheduled_times,
+            calculate_average_time=bool(script.calculate_average_time),
+            created_at=script.created_at,
+            updated_at=script.updated_at,
+        )
+
+
+class SystemToken(NamedTuple):
+    """What the ping path needs to know about a system, without loading it."""
+    id: int
+    name: str
+    is_active: bool
+    timeout_interval: int
+    last_ping: Optional[datetime]
+
+    @classmethod
+    def from_model(cls, system: System) -> "SystemToken":
+        return cls(
+            id=system.id,
+            name=system.name,
+            is_active=bool(system.is_active),
+            timeout_interval=system.timeout_interval,
+            last_ping=system.last_ping,
+        )
+
+
+class TokenIndex:
+    """
+    Process-wide webhook token -> entity index.
+
+    Once loaded, a miss is authoritative: unknown tokens are rejected without
+    touching the database. Writers must keep it in sync via put/remove.
+
+    With several workers, changes made here make the other workers drop the
+    entity, and misses are not authoritative: the caller looks the token up
+    in the database (another worker may have created it) and puts it back
+    with relay=False.
+    """
+    def __init__(self, name: str):
+        self.name = name
+        self.loaded = False
+        self._by_token: dict[str, NamedTuple] = {}
+        self._token_by_id: dict[int, str] = {}
+
+    def __len__(self) -> int:
+        return len(self._by_token)
+
+    @property
+    def authoritative(self) -> bool:
+        """Whether a miss means the token doesn't exist."""
+        return self.loaded and not cluster.multi_worker
+
+    def get(self, token: str):
+        """Get the entry for a token."""
+        return self._by_token.get(token)
+
+    def _relay(self, entity_id: int):
+        cluster.publish("tokens", {"index": self.name, "id": entity_id})
+
+    def put(self, token: str, entry, relay: bool = True):
+        """Add or replace an entry, dropping the entity's previous token if it changed."""
+        if relay:
+            self._relay(entry.id)
+        self._put(token, entry)
+
+    def _put(self, token: str, entry):
+        old_token = self._token_by_id.get(entry.id)
+        if old_token is not None and old_token != token:
+            self._by_token.pop(old_token, None)
+        self._by_token[token] = entry
+        self._token_by_id[entry.id] = token
+
+    def update(self, entity_id: int, relay: bool = True, **changes):
+        """Update fields of an existing entry in place."""
+        if relay:
+            self._relay(entity_id)
+        token = self._token_by_id.get(entity_id)
+        if token is not None:
+            self._by_token[token] = self._by_token[token]._replace(**changes)
+
+    def remove(self, entity_id: int, relay: bool = True):
+        """Remove an entity's entry."""
+        if relay:
+            self._relay(entity_id)
+        token = self._token_by_id.pop(entity_id, None)
+        if token is not None:
+            self._by_token.pop(token, None)
+
+    def replace_all(self, items):
+        """Replace the whole index with (token, entry) pairs and mark it loaded."""
+        self._by_token = {}
+        self._token_by_id = {}
+        for token, entry in items:
+            self._put(token, entry)
+        self.loaded = True
+
+
+async def warm_token_indexes(db: AsyncSession):
+    """Load every script and system token into the in-memory indexes."""
+    result = await db.execute(select(Script))
+    script_tokens.replace_all(
+        (script.webhook_token, ScriptToken.from_model(script))
+        for script in result.scalars().all()
+    )
+
+    result = await db.execute(select(System))
+    system_tokens.replace_all(
+        (system.webhook_token, SystemToken.from_model(system))
+        for system in result.scalars().all()
+    )
+
+# Global instances
+script_tokens = TokenIndex("scripts")
+system_tokens = TokenIndex("systems")
+
+_indexes = {index.name: index for index in (script_tokens, system_tokens)}
+
+
+def _remove_relayed(message: dict):
+    # Changed in another worker: reloaded from the database on the next lookup
+    _indexes[message["index"]].remove(message["id"], relay=False)
+
+
+async def _reload():
+    if script_tokens.loaded:
+        async with read_session() as db:
+            await warm_token_indexes(db)
+
+
+cluster.subscribe("tokens", _remove_relayed)
+cluster.on_resync(_reload)
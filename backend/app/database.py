@@ -1,22 +1,114 @@
+from sqlalchemy import event, make_url
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase
 
 from app.config import get_settings
+from app.core.metrics import instrument_engine
 
 settings = get_settings()
 
-# Create async engine
-engine = create_async_engine(
-    settings.DATABASE_URL,
-    echo=settings.DEBUG,
-)
 
-# Session factory
+def _connect_args(read_only: bool) -> dict:
+    """Driver options: asyncpg statement cache, timeout and session settings on PostgreSQL."""
+    if make_url(settings.DATABASE_URL).get_backend_name() != "postgresql":
+        return {}
+    server_settings = {
+        "application_name": "monitor-rpa",
+        # Queries here are short index lookups: JIT compilation only adds latency
+        "jit": "off",
+    }
+    if read_only:
+        server_settings["default_transaction_read_only"] = "on"
+    return {
+        "prepared_statement_cache_size": settings.PG_STATEMENT_CACHE_SIZE,
+        "command_timeout": settings.PG_COMMAND_TIMEOUT,
+        "server_settings": server_settings,
+    }
+
+
+def _create_engine(pool_size: int, read_only: bool):
+    max_overflow = settings.DB_MAX_OVERFLOW
+    pool_timeout = settings.DB_POOL_TIMEOUT
+    if not read_only and make_url(settings.DATABASE_URL).get_backend_name() == "sqlite":
+        # SQLite has a single writer, and write transactions take its lock up
+        # front (see _begin_immediate). One connection makes this process's
+        # writers queue for it in order rather than poll the lock, where an
+        # unlucky one can run past busy_timeout under load.
+        pool_size, max_overflow = 1, 0
+        pool_timeout = settings.SQLITE_WRITE_POOL_TIMEOUT
+    return create_async_engine(
+        settings.DATABASE_URL,
+        echo=settings.DEBUG,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=pool_timeout,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        connect_args=_connect_args(read_only),
+    )
+
+
+# Create async engines: read-write, and read-only for endpoints that only read
+engine = _create_engine(settings.DB_POOL_SIZE, read_only=False)
+read_engine = _create_engine(settings.DB_READ_POOL_SIZE, read_only=True)
+
+
+def _apply_sqlite_profile(dbapi_connection, read_only: bool):
+    """Set the SQLite storage profile (see the SQLITE_* settings) on a new connection."""
+    cursor = dbapi_connection.cursor()
+    if not read_only:
+        # Lets retention give deleted pages back with incremental_vacuum. Only
+        # applies to new databases; existing ones need a one-time VACUUM.
+        cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        # Persistent (stored in the file), so the read-only pool inherits it
+        cursor.execute(f"PRAGMA journal_mode = {settings.SQLITE_JOURNAL_MODE}")
+        cursor.execute(f"PRAGMA wal_autocheckpoint = {settings.SQLITE_WAL_AUTOCHECKPOINT}")
+        cursor.execute(f"PRAGMA journal_size_limit = {settings.SQLITE_JOURNAL_SIZE_LIMIT_MB * 1024 * 1024}")
+    cursor.execute(f"PRAGMA synchronous = {settings.SQLITE_SYNCHRONOUS}")
+    cursor.execute(f"PRAGMA busy_timeout = {settings.SQLITE_BUSY_TIMEOUT_MS}")
+    # Negative cache_size is in KiB rather than pages
+    cursor.execute(f"PRAGMA cache_size = -{settings.SQLITE_CACHE_SIZE_KB}")
+    cursor.execute(f"PRAGMA mmap_size = {settings.SQLITE_MMAP_SIZE_MB * 1024 * 1024}")
+    cursor.execute("PRAGMA temp_store = MEMORY")
+    if read_only:
+        cursor.execute("PRAGMA query_only = ON")
+    cursor.close()
+
+
+if engine.dialect.name == "sqlite":
+    @event.listens_for(engine.sync_engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        _apply_sqlite_profile(dbapi_connection, read_only=False)
+        # Transactions are begun by _begin_immediate below, not by the driver
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine.sync_engine, "begin")
+    def _begin_immediate(conn):
+        # Write sessions usually read before they write. Under a deferred BEGIN
+        # the upgrade to a write lock fails at once ("database is locked",
+        # busy_timeout doesn't apply) if another writer committed meanwhile;
+        # taking the lock up front makes writers wait for each other instead.
+        # So sessions that only read must use read_session / get_read_db.
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+    @event.listens_for(read_engine.sync_engine, "connect")
+    def _set_sqlite_read_pragmas(dbapi_connection, connection_record):
+        _apply_sqlite_profile(dbapi_connection, read_only=True)
+
+if settings.METRICS_ENABLED:
+    instrument_engine(engine, "read_write")
+    instrument_engine(read_engine, "read_only")
+
+# Session factories
 async_session = async_sessionmaker(
     engine,
     class_=AsyncSession,
     expire_on_commit=False,
 )
+read_session = async_sessionmaker(
+    read_engine,
+    class_=AsyncSession,
+    expire_on_commit=False,
+)
 
 
 class Base(DeclarativeBase):
@@ -33,7 +125,20 @@ async def get_db():
             await session.close()
 
 
+async def get_read_db():
+    """Dependency to get a read-only database session, for endpoints that never write."""
+    async with read_session() as session:
+        try:
+            yield session
+        finally:
+            await session.close()
+
+
 async def init_db():
-    """Initialize database tables."""
+    """Initialize database tables and apply pending schema migrations."""
+    # Imported here: migrations needs Base, defined above
+    from app.migrations import run_migrations
+
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(run_migrations)
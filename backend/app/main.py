@@ -1,10 +1,12 @@
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 
 from app.config import get_settings
-from app.database import init_db
+from app.database import init_db, async_session, read_session
 from app.routers import (
     scripts_router,
     webhook_router,
@@ -14,8 +16,18 @@ from app.routers import (
     systems_router,
     system_webhook_router,
     dashboard_router,
+    export_router,
 )
+from app.core.cluster import cluster
+from app.core.metrics import MetricsMiddleware, metrics
+from app.core.notifications import notification_manager
+from app.core.token_index import warm_token_indexes
+from app.services import ScriptStateService
+from app.services.duration_stats_service import DurationStatsService
+from app.services.heartbeat_service import heartbeat_rollups, start_heartbeat_rollups
+from app.services.ingestion_service import execution_ingestor, ingestion_enabled, start_ingestion
 from app.services.monitoring_service import start_monitor
+from app.services.retention_service import start_retention
 from app.services.system_monitor import start_system_monitor
 
 settings = get_settings()
@@ -24,13 +36,34 @@ settings = get_settings()
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan events."""
-    # Startup: Initialize database
-    await init_db()
-    # Start background monitors
-    start_monitor()
-    start_system_monitor()
+    # With several workers one of them leads: it prepares the database while
+    # the others wait, then runs the background monitors
+    if await cluster.start():
+        # Startup: Initialize database
+        await init_db()
+        # Build execution summaries for scripts that predate them
+        async with async_session() as db:
+            await ScriptStateService(db).backfill()
+            # Due times depend on the schedule settings, which may have changed
+            await ScriptStateService(db).refresh_schedules()
+            # Duration stats of scripts that enabled them before they existed
+            await DurationStatsService(db).backfill()
+        await cluster.serve()
+    # Load webhook tokens so lookups skip the database
+    async with read_session() as db:
+        await warm_token_indexes(db)
+    # Start background monitors (in the leader only, or when a worker takes over)
+    cluster.run_as_leader(start_monitor)
+    cluster.run_as_leader(start_system_monitor)
+    cluster.run_as_leader(start_retention)
+    # Per-worker write-behind queues
+    start_ingestion()
+    start_heartbeat_rollups()
     yield
-    # Shutdown: Cleanup if needed
+    # Shutdown: write any queued executions and heartbeat rollups
+    await execution_ingestor.drain()
+    await heartbeat_rollups.flush(include_open=True)
+    await cluster.close()
 
 
 app = FastAPI(
@@ -49,6 +82,19 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
+# Every connection stayed busy for the pool timeout (on SQLite, the single
+# read-write one): answer like a full ingestion queue, so clients retry
+@app.exception_handler(PoolTimeoutError)
+async def pool_timeout_handler(request: Request, exc: PoolTimeoutError):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Database is busy, retry later"},
+        headers={"Retry-After": "1"},
+    )
+
 # Include routers
 app.include_router(scripts_router, prefix=settings.API_PREFIX)
 app.include_router(executions_router, prefix=settings.API_PREFIX)
@@ -56,6 +102,7 @@ app.include_router(responsibles_router, prefix=settings.API_PREFIX)
 app.include_router(events_router, prefix=settings.API_PREFIX)
 app.include_router(systems_router, prefix=settings.API_PREFIX)
 app.include_router(dashboard_router, prefix=settings.API_PREFIX)
+app.include_router(export_router, prefix=settings.API_PREFIX)
 app.include_router(webhook_router)  # Script webhook at root level
 app.include_router(system_webhook_router)  # System webhook at root level
 
@@ -74,4 +121,14 @@ async def root():
 @app.get("/health")
 async def health_check():
     """Health check endpoint."""
-    return {"status": "healthy"}
+    health = {"status": "healthy", "worker": cluster.stats(), "events": notification_manager.stats()}
+    if ingestion_enabled():
+        health["ingestion"] = execution_ingestor.stats()
+    return health
+
+
+if settings.METRICS_ENABLED:
+    @app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+    async def metrics_endpoint():
+        """Prometheus metrics."""
+        return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
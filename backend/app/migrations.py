@@ -0,0 +1,126 @@
+"""
+Schema migrations.
+
+Base.metadata.create_all only creates missing tables, so every change to an
+existing table is a numbered migration here. init_db runs the pending ones in
+order, in the same transaction as create_all, and records them in the
+schema_migrations table. A fresh database gets every table from create_all,
+so migrations must be idempotent (check before altering).
+
+To change the schema: update the model, then append a migration.
+"""
+import logging
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, inspect, select, text
+
+from app.database import Base
+import app.models  # noqa: F401  (registers the tables on Base.metadata)
+
+logger = logging.getLogger(__name__)
+
+schema_migrations = Table(
+    "schema_migrations",
+    MetaData(),
+    Column("version", Integer, primary_key=True),
+    Column("description", String(255), nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+
+def _add_column(sync_conn, table_name: str, column_name: str):
+    """Add a model column to an existing table, unless it is already there."""
+    inspector = inspect(sync_conn)
+    if table_name not in inspector.get_table_names():
+        return
+    if column_name in {column["name"] for column in inspector.get_columns(table_name)}:
+        return
+
+    column = Base.metadata.tables[table_name].columns[column_name]
+    ddl = f"ALTER TABLE {table_name} ADD COLUMN {column_name} {column.type.compile(dialect=sync_conn.dialect)}"
+    if column.server_default is not None:
+        ddl += f" DEFAULT {column.server_default.arg}"
+        if not column.nullable:
+            ddl += " NOT NULL"
+    sync_conn.execute(text(ddl))
+
+
+def _create_index(sync_conn, table_name: str, index_name: str):
+    """Create a model index, unless it already exists."""
+    table = Base.metadata.tables[table_name]
+    index = next(index for index in table.indexes if index.name == index_name)
+    index.create(sync_conn, checkfirst=True)
+
+
+def _script_state_schedule_columns(sync_conn):
+    _add_column(sync_conn, "script_states", "missed_checked_through")
+    _add_column(sync_conn, "script_states", "missed_next_check_at")
+    _create_index(sync_conn, "script_states", "ix_script_states_missed_next_check_at")
+
+
+def _version_columns(sync_conn):
+    _add_column(sync_conn, "script_states", "version")
+    _add_column(sync_conn, "systems", "version")
+
+
+def _history_indexes(sync_conn):
+    _create_index(sync_conn, "executions", "ix_executions_script_id_executed_at")
+    _create_index(sync_conn, "system_pings", "ix_system_pings_system_id_timestamp")
+    _create_index(sync_conn, "system_ping_rollups", "ix_system_ping_rollups_system_id_last_ping")
+
+
+def _duration_stats_columns(sync_conn):
+    for column in (
+        "duration_count", "duration_sum_ms", "duration_min_ms", "duration_max_ms",
+        "duration_p50_ms", "duration_p95_ms", "duration_p99_ms", "duration_sketch",
+    ):
+        _add_column(sync_conn, "script_states", column)
+
+
+def _execution_payload_data(sync_conn):
+    _add_column(sync_conn, "executions", "payload_data")
+
+
+def _lifetime_execution_counts(sync_conn):
+    # Retention used to subtract pruned executions from execution_count;
+    # add back what it folded into execution_daily_stats
+    sync_conn.execute(text("""
+        UPDATE script_states SET execution_count = (
+            SELECT COUNT(*) FROM executions WHERE executions.script_id = script_states.script_id
+        ) + (
+            SELECT COALESCE(SUM(execution_count), 0) FROM execution_daily_stats
+            WHERE execution_daily_stats.script_id = script_states.script_id
+        )
+        WHERE script_id IN (SELECT script_id FROM execution_daily_stats)
+    """))
+
+
+# (version, description, migration); append only, never renumber
+MIGRATIONS = [
+    (1, "Missed-execution cursor on script_states", _script_state_schedule_columns),
+    (2, "Version counters on script_states and systems", _version_columns),
+    (3, "Composite history indexes on executions, system_pings and system_ping_rollups", _history_indexes),
+    (4, "Running duration stats on script_states", _duration_stats_columns),
+    (5, "Compact payload_data column on executions", _execution_payload_data),
+    (6, "Lifetime execution_count on script_states after retention", _lifetime_execution_counts),
+]
+
+
+def run_migrations(sync_conn) -> list[int]:
+    """Apply pending migrations in order. Returns the versions applied."""
+    schema_migrations.create(sync_conn, checkfirst=True)
+    applied = set(sync_conn.execute(select(schema_migrations.c.version)).scalars())
+
+    done = []
+    for version, description, migration in MIGRATIONS:
+        if version in applied:
+            continue
+        migration(sync_conn)
+        sync_conn.execute(schema_migrations.insert().values(
+            version=version,
+            description=description,
+            applied_at=datetime.utcnow(),
+        ))
+        logger.info(f"Applied schema migration {version}: {description}")
+        done.append(version)
+    return done
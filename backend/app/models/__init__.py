@@ -1,4 +1,7 @@
-from app.models.script import Script, Execution, Responsible
-from app.models.system import System, SystemPing
+from app.models.script import Script, ScriptState, Execution, ExecutionDailyStats, DurationDailyStats, Responsible
+from app.models.system import System, SystemPing, SystemPingRollup, SystemDailyStats
 
-__all__ = ["Script", "Execution", "Responsible", "System", "SystemPing"]
+__all__ = [
+    "Script", "ScriptState", "Execution", "ExecutionDailyStats", "DurationDailyStats", "Responsible",
+    "System", "SystemPing", "SystemPingRollup", "SystemDailyStats",
+]
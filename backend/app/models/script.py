@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Boolean
+from sqlalchemy import Column, BigInteger, Integer, String, Date, DateTime, Float, ForeignKey, Text, Boolean, Index, LargeBinary
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import uuid
@@ -57,11 +57,77 @@ class Script(Base):
         order_by="desc(Execution.executed_at)"
     )
     responsible = relationship("Responsible", back_populates="scripts")
+    state = relationship(
+        "ScriptState",
+        back_populates="script",
+        uselist=False,
+        cascade="all, delete-orphan",
+    )
+    daily_stats = relationship(
+        "ExecutionDailyStats",
+        back_populates="script",
+        cascade="all, delete-orphan",
+    )
+    duration_daily_stats = relationship(
+        "DurationDailyStats",
+        back_populates="script",
+        cascade="all, delete-orphan",
+    )
     
     def __repr__(self):
         return f"<Script(id={self.id}, name='{self.name}')>"
 
 
+class ScriptState(Base):
+    """Denormalized per-script summary of the execution history, maintained on write."""
+    
+    __tablename__ = "script_states"
+    
+    script_id = Column(Integer, ForeignKey("scripts.id", ondelete="CASCADE"), primary_key=True)
+    execution_count = Column(Integer, nullable=False, default=0)
+    
+    # Latest execution of any kind (including "missed")
+    last_execution_id = Column(Integer, nullable=True)
+    last_executed_at = Column(DateTime, nullable=True, index=True)
+    last_status = Column(String(50), nullable=True, index=True)
+    
+    # Latest execution actually reported by the script (excludes "missed")
+    last_run_execution_id = Column(Integer, nullable=True)
+    last_run_at = Column(DateTime, nullable=True)
+    last_run_status = Column(String(50), nullable=True)
+    
+    # Moment (UTC) from which the script counts as delayed; NULL if it never does
+    next_due_at = Column(DateTime, nullable=True, index=True)
+    
+    # Missed-execution detector cursor: periods ending at or before
+    # missed_checked_through were already evaluated, and nothing new can be
+    # missed before missed_next_check_at (NULL if the script can't miss periods)
+    missed_checked_through = Column(DateTime, nullable=True)
+    missed_next_check_at = Column(DateTime, nullable=True, index=True)
+    
+    # Incremented on every change, so clients can order the updates they receive
+    version = Column(Integer, nullable=False, default=0, server_default="0")
+    
+    # Running duration stats (scripts with calculate_average_time only);
+    # duration_count is NULL until they are built from the history
+    duration_count = Column(Integer, nullable=True)
+    duration_sum_ms = Column(BigInteger, nullable=True)
+    duration_min_ms = Column(Integer, nullable=True)
+    duration_max_ms = Column(Integer, nullable=True)
+    duration_p50_ms = Column(Float, nullable=True)
+    duration_p95_ms = Column(Float, nullable=True)
+    duration_p99_ms = Column(Float, nullable=True)
+    duration_sketch = Column(Text, nullable=True)  # DurationSketch JSON
+    
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    # Relationship
+    script = relationship("Script", back_populates="state")
+    
+    def __repr__(self):
+        return f"<ScriptState(script_id={self.script_id}, execution_count={self.execution_count})>"
+
+
 class Execution(Base):
     """Model representing a single script execution."""
     
@@ -71,12 +137,68 @@ class Execution(Base):
     script_id = Column(Integer, ForeignKey("scripts.id", ondelete="CASCADE"), nullable=False)
     executed_at = Column(DateTime, default=datetime.utcnow, index=True)
     status = Column(String(50), default="success", index=True)  # success, error, warning
-    payload = Column(Text, nullable=True)  # JSON string
+    payload = Column(Text, nullable=True)  # Legacy JSON string, until compacted into payload_data
     duration_ms = Column(Integer, nullable=True)
     error_message = Column(Text, nullable=True)
+    payload_data = Column(LargeBinary, nullable=True)  # Extra webhook fields, see app.core.payload
+    
+    # History pages: WHERE script_id = ? ORDER BY executed_at DESC, id DESC
+    __table_args__ = (
+        Index("ix_executions_script_id_executed_at", script_id, executed_at.desc(), id.desc()),
+    )
     
     # Relationship
     script = relationship("Script", back_populates="executions")
     
     def __repr__(self):
         return f"<Execution(id={self.id}, script_id={self.script_id}, status='{self.status}')>"
+
+
+class ExecutionDailyStats(Base):
+    """Executions of a script aggregated over one local day, kept after the raw rows are pruned."""
+    
+    __tablename__ = "execution_daily_stats"
+    
+    script_id = Column(Integer, ForeignKey("scripts.id", ondelete="CASCADE"), primary_key=True)
+    day = Column(Date, primary_key=True)  # Local calendar day
+    
+    # Counts by status
+    execution_count = Column(Integer, nullable=False, default=0)
+    success_count = Column(Integer, nullable=False, default=0)
+    error_count = Column(Integer, nullable=False, default=0)
+    warning_count = Column(Integer, nullable=False, default=0)
+    missed_count = Column(Integer, nullable=False, default=0)
+    
+    # Durations of the executions that reported one
+    duration_count = Column(Integer, nullable=False, default=0)
+    duration_sum_ms = Column(BigInteger, nullable=False, default=0)
+    duration_min_ms = Column(Integer, nullable=True)
+    duration_max_ms = Column(Integer, nullable=True)
+    duration_sketch = Column(Text, nullable=True)  # DurationSketch JSON, for percentiles
+    
+    # Relationship
+    script = relationship("Script", back_populates="daily_stats")
+    
+    def __repr__(self):
+        return f"<ExecutionDailyStats(script_id={self.script_id}, day='{self.day}', execution_count={self.execution_count})>"
+
+
+class DurationDailyStats(Base):
+    """Durations reported by a calculate_average_time script over one local day, maintained on write."""
+    
+    __tablename__ = "duration_daily_stats"
+    
+    script_id = Column(Integer, ForeignKey("scripts.id", ondelete="CASCADE"), primary_key=True)
+    day = Column(Date, primary_key=True)  # Local calendar day
+    
+    duration_count = Column(Integer, nullable=False, default=0)
+    duration_sum_ms = Column(BigInteger, nullable=False, default=0)
+    duration_min_ms = Column(Integer, nullable=True)
+    duration_max_ms = Column(Integer, nullable=True)
+    duration_sketch = Column(Text, nullable=True)  # DurationSketch JSON, for percentiles
+    
+    # Relationship
+    script = relationship("Script", back_populates="duration_daily_stats")
+    
+    def __repr__(self):
+        return f"<DurationDailyStats(script_id={self.script_id}, day='{self.day}', duration_count={self.duration_count})>"
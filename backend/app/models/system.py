@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, String, Date, DateTime, Text, Boolean, Float, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import uuid
@@ -24,6 +24,7 @@ class System(Base):
     timeout_interval = Column(Integer, nullable=False, default=5)  # minutes before status resets
     is_active = Column(Boolean, default=False)  # Default to stopped/inactive
     last_ping = Column(DateTime, nullable=True)  # Last time a ping was received
+    version = Column(Integer, nullable=False, default=0, server_default="0")  # Incremented on every status change
     
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -35,6 +36,16 @@ class System(Base):
         cascade="all, delete-orphan",
         order_by="desc(SystemPing.timestamp)"
     )
+    ping_rollups = relationship(
+        "SystemPingRollup",
+        back_populates="system",
+        cascade="all, delete-orphan",
+    )
+    daily_stats = relationship(
+        "SystemDailyStats",
+        back_populates="system",
+        cascade="all, delete-orphan",
+    )
     
     def __repr__(self):
         return f"<System(id={self.id}, name='{self.name}', is_active={self.is_active})>"
@@ -51,8 +62,60 @@ class SystemPing(Base):
     status = Column(Boolean, default=True)  # True for active/up, False for stopped/down
     client_info = Column(Text, nullable=True)  # Optional UI/IP/etc
     
+    # Ping history: WHERE system_id = ? ORDER BY timestamp DESC, id DESC
+    __table_args__ = (
+        Index("ix_system_pings_system_id_timestamp", system_id, timestamp.desc(), id.desc()),
+    )
+    
     # Relationship
     system = relationship("System", back_populates="pings")
     
     def __repr__(self):
         return f"<SystemPing(id={self.id}, system_id={self.system_id}, timestamp='{self.timestamp}')>"
+
+
+class SystemPingRollup(Base):
+    """Model representing the heartbeat pings of a system aggregated over one interval."""
+    
+    __tablename__ = "system_ping_rollups"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    system_id = Column(Integer, ForeignKey("systems.id", ondelete="CASCADE"), nullable=False, index=True)
+    period_start = Column(DateTime, nullable=False, index=True)
+    first_ping = Column(DateTime, nullable=False)
+    last_ping = Column(DateTime, nullable=False, index=True)
+    ping_count = Column(Integer, nullable=False, default=0)
+    
+    # Ping history: WHERE system_id = ? ORDER BY last_ping DESC, id DESC
+    __table_args__ = (
+        Index("ix_system_ping_rollups_system_id_last_ping", system_id, last_ping.desc(), id.desc()),
+    )
+    
+    # Relationship
+    system = relationship("System", back_populates="ping_rollups")
+    
+    def __repr__(self):
+        return f"<SystemPingRollup(system_id={self.system_id}, period_start='{self.period_start}', ping_count={self.ping_count})>"
+
+
+class SystemDailyStats(Base):
+    """Pings of a system aggregated over one local day, kept after the raw rows are pruned."""
+    
+    __tablename__ = "system_daily_stats"
+    
+    system_id = Column(Integer, ForeignKey("systems.id", ondelete="CASCADE"), primary_key=True)
+    day = Column(Date, primary_key=True)  # Local calendar day
+    
+    ping_count = Column(Integer, nullable=False, default=0)  # Pings received, including rolled-up ones
+    down_count = Column(Integer, nullable=False, default=0)  # "Stopped" pings
+    uptime_seconds = Column(Float, nullable=False, default=0)
+    
+    # Status after the last aggregated ping, carried into the next aggregation
+    last_status = Column(Boolean, nullable=True)
+    last_status_at = Column(DateTime, nullable=True)
+    
+    # Relationship
+    system = relationship("System", back_populates="daily_stats")
+    
+    def __repr__(self):
+        return f"<SystemDailyStats(system_id={self.system_id}, day='{self.day}', ping_count={self.ping_count})>"
@@ -6,6 +6,7 @@ from app.routers.events import router as events_router
 from app.routers.systems import router as systems_router
 from app.routers.system_webhook import router as system_webhook_router
 from app.routers.dashboard import router as dashboard_router
+from app.routers.export import router as export_router
 
 __all__ = [
     "scripts_router",
@@ -16,4 +17,5 @@ __all__ = [
     "systems_router",
     "system_webhook_router",
     "dashboard_router",
+    "export_router",
 ]
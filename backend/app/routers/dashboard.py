@@ -1,150 +1,138 @@
 from fastapi import APIRouter, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, desc
-from datetime import datetime, timedelta
+from sqlalchemy import select, func, case, desc, and_, or_
+from datetime import datetime
 
-from app.database import get_db
-from app.models import Script, Execution, System
+from app.database import get_read_db
+from app.models import Script, ScriptState, Execution, System
+from app.core.cache import dashboard_cache
+from app.core.responses import FastJSONResponse, dumps
 
 router = APIRouter(prefix="/dashboard", tags=["dashboard"])
 
 
-@router.get("/stats")
-async def get_dashboard_stats(db: AsyncSession = Depends(get_db)):
-    """Get dashboard statistics."""
-    
+async def _compute_dashboard_stats(db: AsyncSession) -> dict:
+    """
+    Compute dashboard statistics with a fixed number of queries.
+
+    Counts, the most executed and the last executed script are aggregated
+    in SQL (the latter two through the execution_count and last_executed_at
+    columns of the summary row), so only the delayed scripts and stopped
+    systems, which the dashboard lists, are loaded.
+    """
+    now = datetime.utcnow()
+    today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+
     # Scripts stats
-    total_scripts = await db.execute(select(func.count(Script.id)))
-    total_scripts_count = total_scripts.scalar() or 0
-    
-    active_scripts = await db.execute(
-        select(func.count(Script.id)).where(Script.is_active == True)
+    scripts_result = await db.execute(
+        select(func.count(Script.id), func.coalesce(func.sum(case((Script.is_active == True, 1), else_=0)), 0))
     )
-    active_scripts_count = active_scripts.scalar() or 0
-    
+    total_scripts_count, active_scripts_count = scripts_result.one()
+
     # Systems stats
-    total_systems = await db.execute(select(func.count(System.id)))
-    total_systems_count = total_systems.scalar() or 0
-    
-    active_systems = await db.execute(
-        select(func.count(System.id)).where(System.is_active == True)
+    systems_result = await db.execute(
+        select(func.count(System.id), func.coalesce(func.sum(case((System.is_active == True, 1), else_=0)), 0))
     )
-    active_systems_count = active_systems.scalar() or 0
-    
+    total_systems_count, active_systems_count = systems_result.one()
+
     # Executions today
-    today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
     executions_today = await db.execute(
         select(func.count(Execution.id)).where(Execution.executed_at >= today_start)
     )
     executions_today_count = executions_today.scalar() or 0
-    
+
     # === DETAILED METRICS ===
-    
+
     # Most executed script (by total execution count)
+    most_executed_script = None
     most_executed_result = await db.execute(
-        select(Script.id, Script.name, func.count(Execution.id).label('exec_count'))
-        .join(Execution, Script.id == Execution.script_id)
-        .group_by(Script.id, Script.name)
-        .order_by(desc('exec_count'))
+        select(Script.id, Script.name, ScriptState.execution_count)
+        .join(ScriptState, Script.id == ScriptState.script_id)
+        .where(ScriptState.execution_count > 0)
+        .order_by(desc(ScriptState.execution_count), Script.id)
         .limit(1)
     )
     most_executed = most_executed_result.first()
-    most_executed_script = None
     if most_executed:
         most_executed_script = {
-            "id": most_executed[0],
-            "name": most_executed[1],
-            "count": most_executed[2],
+            "id": most_executed.id,
+            "name": most_executed.name,
+            "count": most_executed.execution_count,
         }
-    
+
     # Last executed script
-    last_execution_result = await db.execute(
-        select(Script.id, Script.name, Execution.executed_at)
-        .join(Execution, Script.id == Execution.script_id)
-        .order_by(desc(Execution.executed_at))
+    last_executed_script = None
+    last_exec_result = await db.execute(
+        select(Script.id, Script.name, ScriptState.last_executed_at)
+        .join(ScriptState, Script.id == ScriptState.script_id)
+        .where(ScriptState.last_executed_at.is_not(None))
+        .order_by(desc(ScriptState.last_executed_at), Script.id)
         .limit(1)
     )
-    last_exec = last_execution_result.first()
-    last_executed_script = None
+    last_exec = last_exec_result.first()
     if last_exec:
         last_executed_script = {
-            "id": last_exec[0],
-            "name": last_exec[1],
-            "executed_at": last_exec[2].isoformat() if last_exec[2] else None,
+            "id": last_exec.id,
+            "name": last_exec.name,
+            "executed_at": last_exec.last_executed_at.isoformat(),
         }
-    
+
     # System stopped for longest time - return all stopped systems
-    stopped_systems_result = await db.execute(
-        select(System)
+    stopped_result = await db.execute(
+        select(System.id, System.name, System.last_ping)
         .where(System.is_active == False)
-        .order_by(System.last_ping.asc().nullsfirst())
+        .order_by(System.last_ping.asc().nulls_first(), System.id)
     )
-    stopped_systems_list = stopped_systems_result.scalars().all()
     stopped_systems = []
-    for sys in stopped_systems_list:
+    for sys in stopped_result.all():
         stopped_systems.append({
             "id": sys.id,
             "name": sys.name,
             "last_ping": sys.last_ping.isoformat() if sys.last_ping else None,
         })
-    
-    # Script delayed for shortest time (most recent delay)
-    scripts_result = await db.execute(
-        select(Script).where(Script.is_active == True)
+
+    # Script delayed for shortest time (most recent delay). next_due_at is
+    # kept by the schedule engine for every rule kind, the same column the
+    # scripts list's "delayed" filter reads
+    delayed_result = await db.execute(
+        select(Script.id, Script.name, ScriptState.last_executed_at, ScriptState.last_status, ScriptState.next_due_at)
+        .join(ScriptState, Script.id == ScriptState.script_id)
+        .where(
+            Script.is_active == True,
+            or_(
+                and_(ScriptState.last_executed_at.is_not(None), ScriptState.last_status == "missed"),
+                ScriptState.next_due_at <= now,
+            ),
+        )
+        .order_by(Script.id)
     )
-    scripts = scripts_result.scalars().all()
-    
-    alerts_count = 0
     delayed_scripts = []
-    
-    now = datetime.utcnow()
-    for script in scripts:
-        latest_exec = await db.execute(
-            select(Execution)
-            .where(Execution.script_id == script.id)
-            .order_by(Execution.executed_at.desc())
-            .limit(1)
-        )
-        latest = latest_exec.scalar_one_or_none()
-        
-        if latest and latest.status == 'missed':
-            alerts_count += 1
+    for script in delayed_result.all():
+        last_executed_at = script.last_executed_at
+
+        if last_executed_at and script.last_status == 'missed':
             delayed_scripts.append({
                 "id": script.id,
                 "name": script.name,
                 "delay_seconds": None,
                 "status": "missed",
-                "last_execution": latest.executed_at.isoformat(),
+                "last_execution": last_executed_at.isoformat(),
             })
-        elif script.expected_interval and latest:
-            expected_next = latest.executed_at + timedelta(minutes=script.expected_interval)
-            if now > expected_next:
-                alerts_count += 1
-                delay_time = now - expected_next
-                delayed_scripts.append({
-                    "id": script.id,
-                    "name": script.name,
-                    "delay_seconds": delay_time.total_seconds(),
-                    "status": "delayed",
-                    "last_execution": latest.executed_at.isoformat(),
-                })
-        elif script.expected_interval and not latest:
-            alerts_count += 1
+        else:
             delayed_scripts.append({
                 "id": script.id,
                 "name": script.name,
-                "delay_seconds": None,
-                "status": "never_ran",
-                "last_execution": None,
+                "delay_seconds": (now - script.next_due_at).total_seconds() if last_executed_at else None,
+                "status": "delayed" if last_executed_at else "never_ran",
+                "last_execution": last_executed_at.isoformat() if last_executed_at else None,
             })
-    
+
     # Sort delayed scripts by delay (shortest first, None values at end)
     delayed_scripts.sort(key=lambda x: x["delay_seconds"] if x["delay_seconds"] is not None else float('inf'))
-    
-    # Count stopped systems as alerts
-    stopped_systems_count = total_systems_count - active_systems_count
-    alerts_count += stopped_systems_count
-    
+
+    # Delayed scripts and stopped systems are the alerts
+    alerts_count = len(delayed_scripts) + total_systems_count - active_systems_count
+
     return {
         "scripts": {
             "active": active_scripts_count,
@@ -163,3 +151,19 @@ async def get_dashboard_stats(db: AsyncSession = Depends(get_db)):
             "delayed_scripts": delayed_scripts,
         }
     }
+
+
+async def _encode_dashboard_stats(db: AsyncSession) -> bytes:
+    """Compute the dashboard statistics as an encoded response body."""
+    return dumps(await _compute_dashboard_stats(db))
+
+
+@router.get("/stats")
+async def get_dashboard_stats(db: AsyncSession = Depends(get_read_db)):
+    """
+    Get dashboard statistics (cached for a few seconds, refreshed on new events).
+    
+    The cache keeps the encoded body, so cached hits skip serialization too.
+    """
+    body = await dashboard_cache.get_or_set("stats", lambda: _encode_dashboard_stats(db))
+    return FastJSONResponse(body)
@@ -1,35 +1,45 @@
 import asyncio
-from fastapi import APIRouter, Request
+from typing import Optional
+from fastapi import APIRouter, Header
 from fastapi.responses import StreamingResponse
+from app.config import get_settings
 from app.core.notifications import notification_manager
 
 router = APIRouter(tags=["events"])
 
+settings = get_settings()
+
+HEARTBEAT = b": heartbeat\n\n"
+
 @router.get("/events")
-async def events(request: Request):
+async def events(last_event_id: Optional[str] = Header(None)):
     """
     SSE endpoint to receive real-time updates.
     The frontend should listen to this endpoint.
+
+    The stream only wakes up for events and for a heartbeat after
+    SSE_HEARTBEAT_INTERVAL seconds of silence. Client disconnects are
+    detected by the server, which cancels the stream. Browsers reconnect
+    with a Last-Event-ID header, and the events they missed are replayed.
     """
     async def event_generator():
-        queue = await notification_manager.subscribe()
+        subscriber = await notification_manager.subscribe(last_event_id)
         try:
             while True:
-                # Check if client is still connected
-                if await request.is_disconnected():
-                    break
-                
                 try:
-                    # Wait for a message from the manager
-                    # Use a timeout so we can periodically check for disconnection
-                    message = await asyncio.wait_for(queue.get(), timeout=1.0)
-                    yield message
+                    message = await asyncio.wait_for(subscriber.get(), timeout=settings.SSE_HEARTBEAT_INTERVAL)
                 except asyncio.TimeoutError:
-                    # Send a heartbeat to keep connection alive
-                    yield ": heartbeat\n\n"
-                    
+                    # Keep proxies from closing an idle connection
+                    yield HEARTBEAT
+                    continue
+
+                if message is None:
+                    # Evicted for falling too far behind
+                    break
+                yield message
+
         finally:
-            notification_manager.unsubscribe(queue)
+            notification_manager.unsubscribe(subscriber)
 
     return StreamingResponse(
         event_generator(),
@@ -1,9 +1,20 @@
+from datetime import datetime
+from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import get_db
-from app.schemas import ExecutionResponse, ExecutionListResponse
+from app.database import get_read_db
+from app.core.pagination import InvalidCursor
+from app.core.responses import FastJSONResponse
+from app.schemas import (
+    ExecutionResponse,
+    ExecutionListResponse,
+    ExecutionDailyStatsListResponse,
+    ScriptDurationStatsResponse,
+)
 from app.services import ScriptService, ExecutionService
+from app.services.duration_stats_service import DurationStatsService
+from app.services.retention_service import DailyStatsService
 
 router = APIRouter(prefix="/scripts", tags=["executions"])
 
@@ -13,9 +24,18 @@ async def list_executions(
     script_id: int,
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=200),
-    db: AsyncSession = Depends(get_db),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    with_total: str = Query("exact", pattern="^(exact|estimate|none)$"),
+    include_payload: bool = Query(False, description="Include each payload (otherwise only has_payload)"),
+    db: AsyncSession = Depends(get_read_db),
 ):
-    """List all executions for a specific script."""
+    """
+    List all executions for a specific script, newest first.
+    
+    Page with `cursor` (the previous page's next_cursor) rather than `skip`
+    for constant cost on deep pages. Payloads are left out unless
+    include_payload is set: get them from GET /scripts/executions/{id}.
+    """
     script_service = ScriptService(db)
     execution_service = ExecutionService(db)
     
@@ -24,21 +44,70 @@ async def list_executions(
     if not script:
         raise HTTPException(status_code=404, detail="Script not found")
     
-    items, total = await execution_service.get_by_script(script_id, skip=skip, limit=limit)
-    return ExecutionListResponse(
-        items=[ExecutionResponse.model_validate(e) for e in items],
-        total=total,
-    )
+    try:
+        items, total, next_cursor = await execution_service.get_by_script(
+            script_id, skip=skip, limit=limit, cursor=cursor, with_total=with_total,
+            include_payload=include_payload,
+        )
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return FastJSONResponse({
+        "items": [ExecutionService.build_fields(e, include_payload) for e in items],
+        "total": total,
+        "next_cursor": next_cursor,
+    })
+
+
+@router.get("/{script_id}/daily-stats", response_model=ExecutionDailyStatsListResponse)
+async def get_daily_stats(
+    script_id: int,
+    days: int = Query(30, ge=1, le=366),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """
+    Daily execution counts and durations of a script over the last `days`
+    local days, oldest first. Days past the retention window come from the
+    stored daily aggregates; days without executions are omitted.
+    """
+    script = await ScriptService(db).get_by_id(script_id)
+    if not script:
+        raise HTTPException(status_code=404, detail="Script not found")
+    
+    items = await DailyStatsService(db).get_execution_stats(script_id, days, datetime.utcnow())
+    return ExecutionDailyStatsListResponse(items=items)
+
+
+@router.get("/{script_id}/duration-stats", response_model=ScriptDurationStatsResponse)
+async def get_duration_stats(
+    script_id: int,
+    days: int = Query(30, ge=1, le=366),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """
+    Running execution duration stats of a script (count, average, min, max,
+    p50/p95/p99) and the same per local day over the last `days` days.
+    
+    Kept up to date on every webhook for scripts with calculate_average_time;
+    the total is null for other scripts.
+    """
+    script = await ScriptService(db).get_by_id(script_id)
+    if not script:
+        raise HTTPException(status_code=404, detail="Script not found")
+    if not script.calculate_average_time:
+        return ScriptDurationStatsResponse(script_id=script_id, days=[])
+    
+    stats = await DurationStatsService(db).get_stats(script_id, days, datetime.utcnow())
+    return ScriptDurationStatsResponse(script_id=script_id, **stats)
 
 
 @router.get("/executions/{execution_id}", response_model=ExecutionResponse)
 async def get_execution(
     execution_id: int,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """Get details of a specific execution."""
     execution_service = ExecutionService(db)
     execution = await execution_service.get_by_id(execution_id)
     if not execution:
         raise HTTPException(status_code=404, detail="Execution not found")
-    return ExecutionResponse.model_validate(execution)
+    return ExecutionService.build_response(execution)
@@ -0,0 +1,157 @@
+import csv
+import io
+import json
+import zlib
+from datetime import datetime, timezone
+from typing import AsyncIterator, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_read_db
+from app.models import System
+from app.services import ScriptService
+from app.services.export_service import ExportService, EXECUTION_COLUMNS, PING_COLUMNS
+
+router = APIRouter(prefix="/export", tags=["export"])
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+def _utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Stored timestamps are naive UTC: convert an aware filter to match."""
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _check_range(since: Optional[datetime], until: Optional[datetime]):
+    if since is not None and until is not None and until <= since:
+        raise HTTPException(status_code=400, detail="until must be later than since")
+
+
+def _accepts_gzip(accept_encoding: Optional[str]) -> bool:
+    """Whether an Accept-Encoding header lists gzip (without q=0)."""
+    for coding in (accept_encoding or "").split(","):
+        name, _, params = coding.partition(";")
+        if name.strip().lower() != "gzip":
+            continue
+        params = params.strip().replace(" ", "")
+        try:
+            return not params.startswith("q=") or float(params[2:]) > 0
+        except ValueError:
+            return False
+    return False
+
+
+def _json_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Can't export {type(value).__name__}")
+
+
+def _csv_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return value
+
+
+async def _encode(chunks: AsyncIterator[list], columns: tuple, format: str) -> AsyncIterator[bytes]:
+    """Encode row chunks as NDJSON (an object per line) or CSV (with a header row)."""
+    if format == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator="\n")
+        writer.writerow(columns)
+        yield buffer.getvalue().encode()
+        async for rows in chunks:
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerows([_csv_value(value) for value in row] for row in rows)
+            yield buffer.getvalue().encode()
+    else:
+        async for rows in chunks:
+            yield "".join(
+                json.dumps(dict(zip(columns, row)), default=_json_value) + "\n" for row in rows
+            ).encode()
+
+
+async def _gzip(stream: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+    async for data in stream:
+        compressed = compressor.compress(data)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def _export_response(stream: AsyncIterator[bytes], name: str, format: str, accept_encoding: Optional[str]):
+    headers = {
+        "Content-Disposition": f'attachment; filename="{name}.{format}"',
+        "Vary": "Accept-Encoding",
+    }
+    if _accepts_gzip(accept_encoding):
+        stream = _gzip(stream)
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(stream, media_type=MEDIA_TYPES[format], headers=headers)
+
+
+@router.get("/executions")
+async def export_executions(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    script_id: Optional[int] = Query(None),
+    status: Optional[str] = Query(None, description="success, error, warning or missed"),
+    since: Optional[datetime] = Query(None, description="Executed at or after (UTC unless an offset is given)"),
+    until: Optional[datetime] = Query(None, description="Executed before"),
+    accept_encoding: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """
+    Export executions, oldest first, as NDJSON or CSV.
+    
+    The response is streamed while the history is read in chunks, so an
+    export of any size uses the same memory. Sent gzip-compressed when the
+    client accepts it (curl --compressed).
+    """
+    since, until = _utc(since), _utc(until)
+    _check_range(since, until)
+    if script_id is not None and not await ScriptService(db).get_by_id(script_id):
+        raise HTTPException(status_code=404, detail="Script not found")
+    
+    # Each chunk ends its read transaction, releasing the connection in between
+    chunks = ExportService(db).executions(script_id, status, since, until)
+    return _export_response(_encode(chunks, EXECUTION_COLUMNS, format), "executions", format, accept_encoding)
+
+
+@router.get("/pings")
+async def export_pings(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    system_id: Optional[int] = Query(None),
+    status: Optional[bool] = Query(None, description="true for running pings, false for stopped ones"),
+    since: Optional[datetime] = Query(None, description="Received at or after (UTC unless an offset is given)"),
+    until: Optional[datetime] = Query(None, description="Received before"),
+    accept_encoding: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """
+    Export system ping history (stored pings and heartbeat rollups, as in
+    GET /systems/{id}/pings), oldest first, as NDJSON or CSV.
+    
+    Streamed and optionally gzip-compressed like the executions export.
+    """
+    since, until = _utc(since), _utc(until)
+    _check_range(since, until)
+    if system_id is not None:
+        result = await db.execute(select(System.id).where(System.id == system_id))
+        if result.scalar_one_or_none() is None:
+            raise HTTPException(status_code=404, detail="System not found")
+    
+    # Each chunk ends its read transaction, releasing the connection in between
+    chunks = ExportService(db).pings(system_id, status, since, until)
+    return _export_response(_encode(chunks, PING_COLUMNS, format), "pings", format, accept_encoding)
@@ -1,8 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.schemas import ResponsibleCreate, ResponsibleResponse
 from app.services.script_service import ResponsibleService
 
@@ -10,7 +11,7 @@ router = APIRouter(tags=["responsibles"])
 
 
 @router.get("/responsibles", response_model=list[ResponsibleResponse])
-async def get_responsibles(db: AsyncSession = Depends(get_db)):
+async def get_responsibles(db: AsyncSession = Depends(get_read_db)):
     """Get all responsibles."""
     service = ResponsibleService(db)
     responsibles = await service.get_all()
@@ -26,9 +27,10 @@ async def create_responsible(
     service = ResponsibleService(db)
     try:
         return await service.create(data)
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail="Responsible already exists")
     except Exception as e:
-        if "UNIQUE constraint failed" in str(e) or "already exists" in str(e).lower():
-            raise HTTPException(status_code=400, detail="Responsible already exists")
         raise HTTPException(status_code=500, detail=str(e))
 
 
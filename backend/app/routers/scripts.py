@@ -3,7 +3,8 @@ from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import get_db
+from app.database import get_db, get_read_db
+from app.core.responses import FastJSONResponse
 from app.schemas import ScriptCreate, ScriptUpdate, ScriptResponse, ScriptListResponse
 from app.services import ScriptService
 
@@ -20,18 +21,18 @@ async def list_scripts(
     ),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=500),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """List all monitored scripts with optional filters."""
     service = ScriptService(db)
     items, total = await service.get_all(search=search, filter_type=filter_type, skip=skip, limit=limit)
-    return ScriptListResponse(items=items, total=total)
+    return FastJSONResponse({"items": items, "total": total})
 
 
 @router.get("/{script_id}", response_model=ScriptResponse)
 async def get_script(
     script_id: int,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """Get a specific script by ID."""
     service = ScriptService(db)
@@ -1,12 +1,16 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, update
 from datetime import datetime
 
-from app.database import get_db
-from app.models import System
-from app.schemas import SystemPingPayload
+from app.database import get_db, get_read_db
+from app.models import System, SystemPing
+from app.schemas import SystemPingPayload, SystemResponse
 from app.core.notifications import notification_manager
+from app.core.cache import dashboard_cache, history_totals
+from app.core.token_index import SystemToken, system_tokens
+from app.services.heartbeat_service import heartbeat_rollups, pings_coalesced
+from app.services.system_monitor import system_deadlines, system_deadline
 
 router = APIRouter(prefix="/system", tags=["system-webhook"])
 
@@ -16,6 +20,7 @@ async def receive_ping(
     token: str,
     payload: SystemPingPayload = None,
     db: AsyncSession = Depends(get_db),
+    read_db: AsyncSession = Depends(get_read_db),
 ):
     """
     Receive a heartbeat ping from a system.
@@ -24,9 +29,16 @@ async def receive_ping(
     The system will automatically be marked as stopped if no ping is received
     within the timeout_interval.
     """
-    # Find system by token
-    result = await db.execute(select(System).where(System.webhook_token == token))
-    system = result.scalar_one_or_none()
+    # Find system by token (in-memory index once loaded, else through the
+    # read-only pool so unknown tokens don't take the write connection)
+    system = system_tokens.get(token)
+    if system is None and not system_tokens.authoritative:
+        result = await read_db.execute(select(System).where(System.webhook_token == token))
+        system = result.scalar_one_or_none()
+        system = SystemToken.from_model(system) if system else None
+        if system and system_tokens.loaded:
+            # Created or changed by another worker
+            system_tokens.put(token, system, relay=False)
     
     if not system:
         raise HTTPException(status_code=404, detail="System not found")
@@ -38,29 +50,61 @@ async def receive_ping(
     # Determine if status is changing
     status_changed = system.is_active != payload.status
     
-    # Record the ping in history
-    from app.models import SystemPing
-    ping_record = SystemPing(
-        system_id=system.id,
-        status=payload.status,
-        client_info=payload.client_info
+    now = datetime.utcnow()
+    
+    # Record the ping in history. In coalesced mode only status changes get a
+    # row; plain heartbeats are counted into the current rollup interval.
+    recorded = not pings_coalesced() or status_changed
+    if recorded:
+        ping_record = SystemPing(
+            system_id=system.id,
+            timestamp=now,
+            status=payload.status,
+            client_info=payload.client_info
+        )
+        db.add(ping_record)
+    
+    # Update system status, reading back the new row for the broadcast
+    values = {"is_active": payload.status, "updated_at": now, "version": System.version + 1}
+    if payload.status:
+        values["last_ping"] = now
+    result = await db.execute(
+        update(System)
+        .where(System.id == system.id)
+        .values(**values)
+        .returning(System)
+        .execution_options(synchronize_session=False)
     )
-    db.add(ping_record)
+    updated = SystemResponse.model_validate(result.scalar_one()).model_dump(mode="json")
+    await db.commit()
+    if recorded:
+        history_totals.invalidate(("pings", system.id))
     
-    # Update system status
-    system.is_active = payload.status
+    if pings_coalesced() and payload.status and not status_changed:
+        heartbeat_rollups.record(system.id, now)
+    
+    # Move the system's timeout deadline. Other workers only need to hear
+    # about a system coming back: a deadline that a ping merely postpones is
+    # re-checked against the database when it passes.
     if payload.status:
-        system.last_ping = datetime.utcnow()
+        system_deadlines.schedule(system.id, system_deadline(now, system.timeout_interval), relay=status_changed)
+    else:
+        system_deadlines.cancel(system.id)
     
-    system.updated_at = datetime.utcnow()
-    await db.commit()
+    system = system._replace(
+        is_active=payload.status,
+        last_ping=now if payload.status else system.last_ping,
+    )
+    system_tokens.update(system.id, relay=status_changed, is_active=system.is_active, last_ping=system.last_ping)
+    dashboard_cache.invalidate()
     
     # Broadcast SSE event for real-time updates
     await notification_manager.broadcast("system_ping", {
         "system_id": system.id,
         "system_name": system.name,
         "is_active": system.is_active,
-        "status_changed": status_changed
+        "status_changed": status_changed,
+        "system": updated,
     })
     
     return {
@@ -5,22 +5,51 @@ from typing import Optional
 from datetime import datetime
 import uuid
 
-from app.database import get_db
-from app.models import System
-from app.schemas import SystemCreate, SystemUpdate, SystemResponse, SystemListResponse, SystemPingListResponse
+from app.database import get_db, get_read_db
+from app.models import System, SystemPing, SystemPingRollup
+from app.core.cache import dashboard_cache, history_totals
+from app.core.pagination import InvalidCursor, encode_cursor, decode_cursor
+from app.core.responses import FastJSONResponse
+from app.core.token_index import SystemToken, system_tokens
+from app.services.heartbeat_service import heartbeat_rollups
+from app.services.ping_history import PING_KINDS, ping_history_query
+from app.services.retention_service import DailyStatsService
+from app.services.system_monitor import system_deadlines, system_deadline
+from app.schemas import (
+    SystemCreate,
+    SystemUpdate,
+    SystemResponse,
+    SystemListResponse,
+    SystemPingListResponse,
+    SystemDailyStatsListResponse,
+)
 
 router = APIRouter(prefix="/systems", tags=["systems"])
 
+# SystemResponse fields, in schema order, for lists built straight from rows
+_SYSTEM_COLUMNS = (
+    System.name,
+    System.description,
+    System.timeout_interval,
+    System.id,
+    System.webhook_token,
+    System.is_active,
+    System.last_ping,
+    System.created_at,
+    System.updated_at,
+    System.version,
+)
+
 
 @router.get("", response_model=SystemListResponse)
 async def list_systems(
     search: Optional[str] = Query(None, description="Search by name"),
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=100),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """List all systems with optional search."""
-    query = select(System)
+    query = select(*_SYSTEM_COLUMNS)
     count_query = select(func.count(System.id))
     
     if search:
@@ -30,12 +59,12 @@ async def list_systems(
     query = query.order_by(System.name).offset(skip).limit(limit)
     
     result = await db.execute(query)
-    systems = result.scalars().all()
+    systems = result.all()
     
     count_result = await db.execute(count_query)
     total = count_result.scalar()
     
-    return SystemListResponse(items=systems, total=total)
+    return FastJSONResponse({"items": [system._asdict() for system in systems], "total": total})
 
 
 @router.post("", response_model=SystemResponse, status_code=201)
@@ -55,6 +84,8 @@ async def create_system(
     db.add(system)
     await db.commit()
     await db.refresh(system)
+    system_tokens.put(system.webhook_token, SystemToken.from_model(system))
+    dashboard_cache.invalidate()
     
     return system
 
@@ -62,7 +93,7 @@ async def create_system(
 @router.get("/{system_id}", response_model=SystemResponse)
 async def get_system(
     system_id: int,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """Get a system by ID."""
     result = await db.execute(select(System).where(System.id == system_id))
@@ -94,6 +125,11 @@ async def update_system(
     system.updated_at = datetime.utcnow()
     await db.commit()
     await db.refresh(system)
+    system_tokens.put(system.webhook_token, SystemToken.from_model(system))
+    # The timeout interval may have changed
+    if system.is_active and system.last_ping:
+        system_deadlines.schedule(system.id, system_deadline(system.last_ping, system.timeout_interval))
+    dashboard_cache.invalidate()
     
     return system
 
@@ -112,6 +148,10 @@ async def delete_system(
     
     await db.delete(system)
     await db.commit()
+    system_tokens.remove(system_id)
+    system_deadlines.cancel(system_id)
+    heartbeat_rollups.discard(system_id)
+    dashboard_cache.invalidate()
 
 
 @router.post("/{system_id}/regenerate-token", response_model=SystemResponse)
@@ -130,6 +170,7 @@ async def regenerate_token(
     system.updated_at = datetime.utcnow()
     await db.commit()
     await db.refresh(system)
+    system_tokens.put(system.webhook_token, SystemToken.from_model(system))
     
     return system
 
@@ -139,26 +180,79 @@ async def list_system_pings(
     system_id: int,
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=100),
-    db: AsyncSession = Depends(get_db),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    with_total: str = Query("exact", pattern="^(exact|estimate|none)$"),
+    db: AsyncSession = Depends(get_read_db),
 ):
-    """List ping history for a specific system."""
-    from app.models import SystemPing
+    """
+    List ping history for a specific system.
     
+    History is made of stored pings (every ping, or only status changes in
+    coalesced mode) and heartbeat rollups, newest first. Page with `cursor`
+    (the previous page's next_cursor) rather than `skip`: it seeks on
+    (timestamp, kind, id), so deep pages cost the same as the first one.
+    The total is optional and cached for HISTORY_TOTAL_CACHE_TTL seconds
+    ("estimate" is accepted and served from the same cache).
+    """
     # Check if system exists
-    result = await db.execute(select(System).where(System.id == system_id))
-    system = result.scalar_one_or_none()
-    if not system:
+    result = await db.execute(select(System.id).where(System.id == system_id))
+    if result.scalar_one_or_none() is None:
         raise HTTPException(status_code=404, detail="System not found")
-        
-    query = select(SystemPing).where(SystemPing.system_id == system_id)
-    count_query = select(func.count(SystemPing.id)).where(SystemPing.system_id == system_id)
     
-    query = query.order_by(SystemPing.timestamp.desc()).offset(skip).limit(limit)
+    try:
+        after = decode_cursor(cursor, datetime, PING_KINDS, int) if cursor else None
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
+    # One extra row tells whether there is a next page
+    page_size = limit + 1
+    query = (
+        ping_history_query(page_size if after else skip + page_size, descending=True, after=after, system_id=system_id)
+        .offset(0 if after else skip)
+        .limit(page_size)
+    )
     result = await db.execute(query)
-    pings = result.scalars().all()
+    pings = result.all()
     
-    count_result = await db.execute(count_query)
-    total = count_result.scalar()
+    next_cursor = None
+    if len(pings) > limit:
+        pings = pings[:limit]
+        next_cursor = encode_cursor(pings[-1].timestamp, pings[-1].kind, pings[-1].id)
+    
+    total = None
+    if with_total != "none":
+        async def count():
+            count_result = await db.execute(
+                select(
+                    select(func.count(SystemPing.id)).where(SystemPing.system_id == system_id).scalar_subquery()
+                    + select(func.count(SystemPingRollup.id)).where(SystemPingRollup.system_id == system_id).scalar_subquery()
+                )
+            )
+            return count_result.scalar() or 0
+        total = await history_totals.get_or_set(("pings", system_id), count)
+    
+    # Rows already have the SystemPingResponse fields, in order
+    return FastJSONResponse({
+        "items": [ping._asdict() for ping in pings],
+        "total": total,
+        "next_cursor": next_cursor,
+    })
+
+
+@router.get("/{system_id}/daily-stats", response_model=SystemDailyStatsListResponse)
+async def get_system_daily_stats(
+    system_id: int,
+    days: int = Query(30, ge=1, le=366),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """
+    Daily ping counts and uptime of a system over the last `days` local
+    days, oldest first. Days past the retention window come from the stored
+    daily aggregates.
+    """
+    result = await db.execute(select(System.id).where(System.id == system_id))
+    if result.scalar_one_or_none() is None:
+        raise HTTPException(status_code=404, detail="System not found")
     
-    return SystemPingListResponse(items=pings, total=total)
+    items = await DailyStatsService(db).get_system_stats(system_id, days, datetime.utcnow())
+    return SystemDailyStatsListResponse(items=items)
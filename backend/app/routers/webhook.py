@@ -1,18 +1,158 @@
-from fastapi import APIRouter, Depends, HTTPException
+import json
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from pydantic import ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import get_db
-from app.schemas import WebhookPayload, WebhookResponse
+from app.config import get_settings
+from app.database import get_db, get_read_db
+from app.schemas import WebhookPayload, WebhookResponse, BatchWebhookItem, BatchWebhookResult, BatchWebhookResponse
 from app.services import ScriptService, ExecutionService
+from app.services.ingestion_service import execution_ingestor, ingestion_enabled, IngestionQueueFull
 
 router = APIRouter(tags=["webhook"])
 
+settings = get_settings()
+
+
+def _parse_batch(body: bytes) -> list:
+    """Items of a JSON array or NDJSON body; NDJSON lines that aren't JSON become None."""
+    body = body.strip()
+    if body.startswith(b"["):
+        try:
+            return json.loads(body)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Body is not a valid JSON array")
+
+    items = []
+    for line in body.splitlines():
+        if not line.strip():
+            continue
+        try:
+            items.append(json.loads(line))
+        except ValueError:
+            items.append(None)
+    return items
+
+
+@router.post(
+    "/webhook/batch",
+    response_model=BatchWebhookResponse,
+    response_model_exclude_none=True,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {"schema": {"type": "array", "items": BatchWebhookItem.model_json_schema()}},
+                "application/x-ndjson": {"schema": {"type": "string", "description": "One item per line"}},
+            },
+        },
+    },
+)
+async def receive_webhook_batch(
+    request: Request,
+    token: Optional[str] = Query(None, description="Token of the items that don't have their own"),
+    db: AsyncSession = Depends(get_db),
+    read_db: AsyncSession = Depends(get_read_db),
+):
+    """
+    Receive many executions at once, e.g. results a robot buffered.
+    
+    The body is a JSON array of webhook payloads, or NDJSON (one payload per
+    line). Each item may carry the "token" of its script, so one request can
+    report several scripts; items without one use the token query parameter.
+    
+    Valid items are written in a single transaction (or queued, in batched
+    ingestion mode) and each script gets one event for its latest execution.
+    Invalid items don't fail the others: every item gets a result, in request
+    order, with the status code /webhook/{token} would have answered.
+    All items are received at the same moment, so buffered results should
+    send duration_ms rather than start_time.
+    """
+    items = _parse_batch(await request.body())
+    if len(items) > settings.WEBHOOK_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {settings.WEBHOOK_BATCH_MAX_ITEMS} items per batch",
+        )
+    
+    # Token lookups that miss the index read through the read-only pool, so
+    # the write connection is only taken to save
+    script_service = ScriptService(read_db)
+    scripts = {}
+    results: list[BatchWebhookResult] = []
+    # (result index, script, payload) of the items that passed validation
+    accepted = []
+    for item in items:
+        if not isinstance(item, dict):
+            error = "Invalid JSON" if item is None else "Item must be a JSON object"
+            results.append(BatchWebhookResult(status=400 if item is None else 422, error=error))
+            continue
+        
+        item_token = item.pop("token", None) or token
+        if item_token is not None and not isinstance(item_token, str):
+            results.append(BatchWebhookResult(status=422, error="token: Input should be a valid string"))
+            continue
+        if item_token not in scripts:
+            scripts[item_token] = await script_service.get_by_token(item_token) if item_token else None
+        script = scripts[item_token]
+        if not script:
+            results.append(BatchWebhookResult(status=404, error="Invalid webhook token"))
+            continue
+        if not script.is_active:
+            results.append(BatchWebhookResult(status=403, error="Script is inactive"))
+            continue
+        
+        try:
+            payload = WebhookPayload.model_validate(item)
+        except ValidationError as e:
+            first = e.errors()[0]
+            location = ".".join(str(part) for part in first["loc"])
+            results.append(BatchWebhookResult(status=422, error=f"{location}: {first['msg']}" if location else first["msg"]))
+            continue
+        
+        results.append(BatchWebhookResult(status=200))
+        accepted.append((len(results) - 1, script, payload))
+    
+    queued = ingestion_enabled()
+    if queued:
+        # Batched mode: queue each execution; once the queue stays full the rest are refused
+        full = False
+        for index, script, payload in accepted:
+            if not full:
+                try:
+                    await execution_ingestor.enqueue(script, payload)
+                    continue
+                except IngestionQueueFull:
+                    full = True
+            results[index] = BatchWebhookResult(status=503, error="Ingestion queue is full, retry later")
+    elif accepted:
+        received_at = datetime.utcnow()
+        executions = [
+            (script, ExecutionService.build_execution(script, payload, received_at))
+            for _, script, payload in accepted
+        ]
+        await ExecutionService(db).save_executions(executions)
+        for (index, _, _), (_, execution) in zip(accepted, executions):
+            results[index].execution_id = execution.id
+    
+    rejected = sum(result.status != 200 for result in results)
+    return BatchWebhookResponse(
+        accepted=len(results) - rejected,
+        rejected=rejected,
+        queued=queued,
+        results=results,
+    )
+
 
 @router.post("/webhook/{token}", response_model=WebhookResponse)
 async def receive_webhook(
     token: str,
     payload: WebhookPayload = WebhookPayload(),
     db: AsyncSession = Depends(get_db),
+    read_db: AsyncSession = Depends(get_read_db),
 ):
     """
     Receive execution notification from a script.
@@ -26,10 +166,10 @@ async def receive_webhook(
     - error_message: error details if status is "error"
     - data: any additional JSON data
     """
-    script_service = ScriptService(db)
+    script_service = ScriptService(read_db)
     execution_service = ExecutionService(db)
     
-    # Validate token
+    # Validate token (through the read-only pool, see receive_webhook_batch)
     script = await script_service.get_by_token(token)
     if not script:
         raise HTTPException(status_code=404, detail="Invalid webhook token")
@@ -37,6 +177,22 @@ async def receive_webhook(
     if not script.is_active:
         raise HTTPException(status_code=403, detail="Script is inactive")
     
+    # Batched mode: queue the execution for the background writer
+    if ingestion_enabled():
+        try:
+            await execution_ingestor.enqueue(script, payload)
+        except IngestionQueueFull:
+            raise HTTPException(
+                status_code=503,
+                detail="Ingestion queue is full, retry later",
+                headers={"Retry-After": "1"},
+            )
+        return WebhookResponse(
+            success=True,
+            message=f"Execution queued for script '{script.name}'",
+            queued=True,
+        )
+    
     # Create execution record
     execution = await execution_service.create_from_webhook(script, payload)
     
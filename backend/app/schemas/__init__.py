@@ -3,11 +3,19 @@ from app.schemas.script import (
     ScriptUpdate,
     ScriptResponse,
     ScriptListResponse,
+    DurationStatsResponse,
+    DailyDurationStatsResponse,
+    ScriptDurationStatsResponse,
     ExecutionCreate,
     ExecutionResponse,
     ExecutionListResponse,
+    ExecutionDailyStatsResponse,
+    ExecutionDailyStatsListResponse,
     WebhookPayload,
     WebhookResponse,
+    BatchWebhookItem,
+    BatchWebhookResult,
+    BatchWebhookResponse,
     ResponsibleCreate,
     ResponsibleResponse,
 )
@@ -19,6 +27,8 @@ from app.schemas.system import (
     SystemPingPayload,
     SystemPingResponse,
     SystemPingListResponse,
+    SystemDailyStatsResponse,
+    SystemDailyStatsListResponse,
 )
 
 __all__ = [
@@ -26,11 +36,19 @@ __all__ = [
     "ScriptUpdate",
     "ScriptResponse",
     "ScriptListResponse",
+    "DurationStatsResponse",
+    "DailyDurationStatsResponse",
+    "ScriptDurationStatsResponse",
     "ExecutionCreate",
     "ExecutionResponse",
     "ExecutionListResponse",
+    "ExecutionDailyStatsResponse",
+    "ExecutionDailyStatsListResponse",
     "WebhookPayload",
     "WebhookResponse",
+    "BatchWebhookItem",
+    "BatchWebhookResult",
+    "BatchWebhookResponse",
     "ResponsibleCreate",
     "ResponsibleResponse",
     "SystemCreate",
@@ -40,4 +58,6 @@ __all__ = [
     "SystemPingPayload",
     "SystemPingResponse",
     "SystemPingListResponse",
+    "SystemDailyStatsResponse",
+    "SystemDailyStatsListResponse",
 ]
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from datetime import datetime
+from datetime import date, datetime
 from typing import Optional, Any
 
 # ============ Responsible Schemas ============
@@ -42,6 +42,29 @@ class ScriptUpdate(BaseModel):
     calculate_average_time: Optional[bool] = None
 
 
+class DurationStatsResponse(BaseModel):
+    """Execution duration stats; percentiles are approximate (within 2%)."""
+    count: int
+    avg_ms: Optional[float] = None
+    min_ms: Optional[int] = None
+    max_ms: Optional[int] = None
+    p50_ms: Optional[float] = None
+    p95_ms: Optional[float] = None
+    p99_ms: Optional[float] = None
+
+
+class DailyDurationStatsResponse(DurationStatsResponse):
+    """Execution duration stats over one local day."""
+    day: date
+
+
+class ScriptDurationStatsResponse(BaseModel):
+    """Schema for a script's running and daily duration stats."""
+    script_id: int
+    total: Optional[DurationStatsResponse] = None
+    days: list[DailyDurationStatsResponse]
+
+
 class ScriptResponse(BaseModel):
     """Schema for script response with computed fields."""
     id: int
@@ -60,6 +83,8 @@ class ScriptResponse(BaseModel):
     last_status: Optional[str] = None
     is_delayed: bool = False
     execution_count: int = 0
+    version: int = 0
+    duration_stats: Optional[DurationStatsResponse] = None  # Only with calculate_average_time
     
     # Nested responsible if joined
     responsible: Optional[ResponsibleResponse] = None
@@ -90,7 +115,8 @@ class ExecutionResponse(BaseModel):
     script_id: int
     executed_at: datetime
     status: str
-    payload: Optional[str]
+    payload: Optional[str] = None  # JSON text; left out of history pages unless include_payload
+    has_payload: bool = False
     duration_ms: Optional[int]
     error_message: Optional[str]
     
@@ -100,7 +126,28 @@ class ExecutionResponse(BaseModel):
 class ExecutionListResponse(BaseModel):
     """Schema for listing executions with pagination."""
     items: list[ExecutionResponse]
-    total: int
+    total: Optional[int] = None  # None when not requested (with_total=none)
+    next_cursor: Optional[str] = None  # Pass as `cursor` to get the next page
+
+
+class ExecutionDailyStatsResponse(BaseModel):
+    """Executions of a script over one local day."""
+    day: date
+    execution_count: int
+    success_count: int
+    error_count: int
+    warning_count: int
+    missed_count: int
+    duration_count: int
+    duration_min_ms: Optional[int] = None
+    duration_avg_ms: Optional[float] = None
+    duration_max_ms: Optional[int] = None
+    duration_p95_ms: Optional[float] = None  # Approximate (within 2%)
+
+
+class ExecutionDailyStatsListResponse(BaseModel):
+    """Schema for a script's daily execution stats, oldest day first."""
+    items: list[ExecutionDailyStatsResponse]
 
 
 # ============ Webhook Schemas ============
@@ -120,4 +167,25 @@ class WebhookResponse(BaseModel):
     """Response after webhook is processed."""
     success: bool
     message: str
-    execution_id: int
+    execution_id: Optional[int] = None  # None when the execution was queued for batched writing
+    queued: bool = False
+
+
+class BatchWebhookItem(WebhookPayload):
+    """One execution of a batch webhook (the token is not stored with the payload)."""
+    token: Optional[str] = Field(None, description="Script webhook token (default: the token query parameter)")
+
+
+class BatchWebhookResult(BaseModel):
+    """Outcome of one item of a batch webhook."""
+    status: int  # HTTP status the item would have got from /webhook/{token}
+    execution_id: Optional[int] = None
+    error: Optional[str] = None
+
+
+class BatchWebhookResponse(BaseModel):
+    """Response after a batch webhook is processed; results are in request order."""
+    accepted: int
+    rejected: int
+    queued: bool = False
+    results: list[BatchWebhookResult]
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field
 from typing import Optional
-from datetime import datetime
+from datetime import date, datetime
 
 
 class SystemBase(BaseModel):
@@ -30,6 +30,7 @@ class SystemResponse(SystemBase):
     last_ping: Optional[datetime] = None
     created_at: datetime
     updated_at: datetime
+    version: int = 0
     
     class Config:
         from_attributes = True
@@ -54,6 +55,11 @@ class SystemPingResponse(BaseModel):
     timestamp: datetime
     status: bool
     client_info: Optional[str] = None
+    # "ping" for a stored ping/status change, "rollup" for aggregated heartbeats
+    kind: str = "ping"
+    ping_count: int = 1
+    first_ping: Optional[datetime] = None
+    last_ping: Optional[datetime] = None
 
     class Config:
         from_attributes = True
@@ -61,4 +67,16 @@ class SystemPingResponse(BaseModel):
 
 class SystemPingListResponse(BaseModel):
     items: list[SystemPingResponse]
-    total: int
+    total: Optional[int] = None  # None when not requested (with_total=none)
+    next_cursor: Optional[str] = None  # Pass as `cursor` to get the next page
+
+
+class SystemDailyStatsResponse(BaseModel):
+    day: date  # Local calendar day
+    ping_count: int
+    down_count: int
+    uptime_seconds: float
+
+
+class SystemDailyStatsListResponse(BaseModel):
+    items: list[SystemDailyStatsResponse]
@@ -1,3 +1,3 @@
-from app.services.script_service import ScriptService, ExecutionService
+from app.services.script_service import ScriptService, ScriptStateService, ExecutionService
 
-__all__ = ["ScriptService", "ExecutionService"]
+__all__ = ["ScriptService", "ScriptStateService", "ExecutionService"]
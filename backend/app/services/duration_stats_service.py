@@ -0,0 +1,249 @@
+"""
+Duration Stats Service
+
+Running duration statistics for scripts with calculate_average_time: count,
+sum, min, max and a mergeable quantile sketch, per script (on ScriptState,
+with p50/p95/p99 precomputed for listings) and per local day
+(DurationDailyStats). They are folded in as executions are written, so
+reading them never touches the execution history.
+"""
+import math
+from datetime import datetime, timedelta
+from typing import Optional, Union
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.schedule import local_day
+from app.core.sketch import DurationSketch
+from app.core.token_index import ScriptToken
+from app.models import DurationDailyStats, Execution, ExecutionDailyStats, Script, ScriptState
+
+
+class DurationStats:
+    """
+    Count, sum, min, max and sketch of a set of durations (ms).
+
+    Reads and writes the duration_* columns shared by ScriptState,
+    DurationDailyStats and ExecutionDailyStats.
+    """
+    def __init__(self):
+        self.count = 0
+        self.sum_ms = 0
+        self.min_ms: Optional[int] = None
+        self.max_ms: Optional[int] = None
+        self.sketch = DurationSketch()
+
+    @classmethod
+    def from_columns(cls, row) -> "DurationStats":
+        stats = cls()
+        if row.duration_count:
+            stats.count = row.duration_count
+            stats.sum_ms = row.duration_sum_ms
+            stats.min_ms = row.duration_min_ms
+            stats.max_ms = row.duration_max_ms
+            stats.sketch = DurationSketch.from_json(row.duration_sketch)
+        return stats
+
+    def add(self, duration_ms: int):
+        """Count one duration."""
+        self.count += 1
+        self.sum_ms += duration_ms
+        self.min_ms = duration_ms if self.min_ms is None else min(self.min_ms, duration_ms)
+        self.max_ms = duration_ms if self.max_ms is None else max(self.max_ms, duration_ms)
+        self.sketch.add(duration_ms)
+
+    def merge(self, other: "DurationStats"):
+        """Add another set of durations."""
+        if not other.count:
+            return
+        self.count += other.count
+        self.sum_ms += other.sum_ms
+        self.min_ms = other.min_ms if self.min_ms is None else min(self.min_ms, other.min_ms)
+        self.max_ms = other.max_ms if self.max_ms is None else max(self.max_ms, other.max_ms)
+        self.sketch.merge(other.sketch)
+
+    def apply_to(self, row):
+        """Write the stats into a row's duration_* columns."""
+        row.duration_count = self.count
+        row.duration_sum_ms = self.sum_ms
+        row.duration_min_ms = self.min_ms
+        row.duration_max_ms = self.max_ms
+        row.duration_sketch = self.sketch.to_json() if self.count else None
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Sketch quantile, clamped to the exact min and max (which the first and last ranks are)."""
+        value = self.sketch.quantile(q)
+        if value is None or self.min_ms is None:
+            return value
+        rank = math.ceil(q * self.count)
+        if rank <= 1:
+            return float(self.min_ms)
+        if rank >= self.count:
+            return float(self.max_ms)
+        return float(min(max(value, self.min_ms), self.max_ms))
+
+    def as_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "avg_ms": self.sum_ms / self.count if self.count else None,
+            "min_ms": self.min_ms,
+            "max_ms": self.max_ms,
+            "p50_ms": self.quantile(0.50),
+            "p95_ms": self.quantile(0.95),
+            "p99_ms": self.quantile(0.99),
+        }
+
+
+class DurationStatsService:
+    """Service layer that keeps the duration stats of calculate_average_time scripts."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    @staticmethod
+    def summary(state: Optional[ScriptState]) -> Optional[dict]:
+        """A script's running stats, from its summary row alone (None if there are none yet)."""
+        if state is None or not state.duration_count:
+            return None
+        return {
+            "count": state.duration_count,
+            "avg_ms": state.duration_sum_ms / state.duration_count,
+            "min_ms": state.duration_min_ms,
+            "max_ms": state.duration_max_ms,
+            "p50_ms": state.duration_p50_ms,
+            "p95_ms": state.duration_p95_ms,
+            "p99_ms": state.duration_p99_ms,
+        }
+
+    async def _get_state(self, script_id: int) -> Optional[ScriptState]:
+        result = await self.db.execute(
+            select(ScriptState)
+            .where(ScriptState.script_id == script_id)
+            .with_for_update()
+            .execution_options(populate_existing=True)
+        )
+        return result.scalar_one_or_none()
+
+    @staticmethod
+    def _apply_totals(state: ScriptState, totals: DurationStats):
+        totals.apply_to(state)
+        state.duration_p50_ms = totals.quantile(0.50)
+        state.duration_p95_ms = totals.quantile(0.95)
+        state.duration_p99_ms = totals.quantile(0.99)
+
+    async def record(self, script: Union[Script, ScriptToken], executions: list[Execution]) -> Optional[dict]:
+        """
+        Fold freshly flushed executions' durations into the script's stats.
+
+        Must run after ScriptStateService.record in the same transaction: its
+        UPDATE already holds the summary row's write lock, so this
+        read-modify-write can't interleave with another writer. Returns the
+        updated summary, or None when nothing changed.
+        """
+        if not script.calculate_average_time:
+            return None
+        durations = [(e.executed_at, e.duration_ms) for e in executions if e.duration_ms is not None]
+        if not durations:
+            return None
+
+        state = await self._get_state(script.id)
+        if state is None:
+            return None
+        if state.duration_count is None:
+            # Never built: the history (including these executions) is the source
+            return await self.rebuild(script.id)
+
+        totals = DurationStats.from_columns(state)
+        days: dict = {}
+        for executed_at, duration_ms in durations:
+            totals.add(duration_ms)
+            days.setdefault(local_day(executed_at), DurationStats()).add(duration_ms)
+
+        result = await self.db.execute(
+            select(DurationDailyStats).where(
+                DurationDailyStats.script_id == script.id,
+                DurationDailyStats.day.in_(list(days)),
+            )
+        )
+        stored = {row.day: row for row in result.scalars()}
+        for day, stats in days.items():
+            row = stored.get(day)
+            if row is None:
+                row = DurationDailyStats(script_id=script.id, day=day)
+                self.db.add(row)
+            else:
+                stats.merge(DurationStats.from_columns(row))
+            stats.apply_to(row)
+
+        self._apply_totals(state, totals)
+        return self.summary(state)
+
+    async def rebuild(self, script_id: int) -> Optional[dict]:
+        """
+        Recompute a script's stats from its history: the raw executions plus
+        the daily aggregates of days already pruned by retention. Returns the
+        new summary. Does not commit.
+        """
+        state = await self._get_state(script_id)
+        if state is None:
+            return None
+
+        days: dict = {}
+        result = await self.db.execute(
+            select(ExecutionDailyStats)
+            .where(ExecutionDailyStats.script_id == script_id, ExecutionDailyStats.duration_count > 0)
+        )
+        for row in result.scalars():
+            days[row.day] = DurationStats.from_columns(row)
+
+        result = await self.db.execute(
+            select(Execution.executed_at, Execution.duration_ms)
+            .where(Execution.script_id == script_id, Execution.duration_ms.is_not(None))
+        )
+        for executed_at, duration_ms in result.all():
+            days.setdefault(local_day(executed_at), DurationStats()).add(duration_ms)
+
+        await self.db.execute(delete(DurationDailyStats).where(DurationDailyStats.script_id == script_id))
+        totals = DurationStats()
+        for day, stats in days.items():
+            row = DurationDailyStats(script_id=script_id, day=day)
+            stats.apply_to(row)
+            self.db.add(row)
+            totals.merge(stats)
+
+        self._apply_totals(state, totals)
+        return self.summary(state)
+
+    async def backfill(self) -> int:
+        """Build the stats of calculate_average_time scripts that have none yet. Returns how many."""
+        result = await self.db.execute(
+            select(Script.id)
+            .join(ScriptState, ScriptState.script_id == Script.id)
+            .where(Script.calculate_average_time == True, ScriptState.duration_count.is_(None))
+        )
+        script_ids = list(result.scalars().all())
+        for script_id in script_ids:
+            await self.rebuild(script_id)
+
+        await self.db.commit()
+        return len(script_ids)
+
+    async def get_stats(self, script_id: int, days: int, now: datetime) -> dict:
+        """A script's running stats and its daily stats over the last `days` local days, oldest first."""
+        result = await self.db.execute(select(ScriptState).where(ScriptState.script_id == script_id))
+        state = result.scalar_one_or_none()
+
+        first_day = local_day(now) - timedelta(days=days - 1)
+        result = await self.db.execute(
+            select(DurationDailyStats)
+            .where(DurationDailyStats.script_id == script_id, DurationDailyStats.day >= first_day)
+            .order_by(DurationDailyStats.day)
+        )
+        return {
+            "total": self.summary(state),
+            "days": [
+                {"day": row.day, **DurationStats.from_columns(row).as_dict()}
+                for row in result.scalars()
+            ],
+        }
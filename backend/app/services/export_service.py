@@ -0,0 +1,120 @@
+"""
+Export Service
+
+Reads execution and ping history for bulk exports, oldest first, in keyset
+chunks of EXPORT_CHUNK_SIZE rows. Each chunk is its own short read
+transaction, ended before the rows are handed on: an export of millions of
+rows never holds a snapshot open (which would keep SQLite from
+checkpointing its WAL, or pin a PostgreSQL transaction) and memory stays
+bounded by one chunk however long the range is.
+"""
+from datetime import datetime
+from typing import AsyncIterator, Optional
+
+from sqlalchemy import select, tuple_
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.core.payload import decode_payload
+from app.models import Execution
+from app.services.ping_history import ping_history_query
+
+settings = get_settings()
+
+# Columns of each export, in CSV order (same fields as the history endpoints)
+EXECUTION_COLUMNS = ("id", "script_id", "executed_at", "status", "duration_ms", "error_message", "payload")
+PING_COLUMNS = ("id", "system_id", "timestamp", "status", "client_info", "kind", "ping_count", "first_ping", "last_ping")
+
+
+class ExportService:
+    """Service layer for history exports."""
+    
+    def __init__(self, db: AsyncSession, chunk_size: Optional[int] = None):
+        self.db = db
+        self.chunk_size = chunk_size or settings.EXPORT_CHUNK_SIZE
+    
+    async def _read_chunk(self, query) -> list[Row]:
+        """Run one chunk query and end its read transaction."""
+        try:
+            result = await self.db.execute(query)
+            return result.all()
+        finally:
+            await self.db.rollback()
+    
+    async def executions(
+        self,
+        script_id: Optional[int] = None,
+        status: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> AsyncIterator[list[tuple]]:
+        """
+        Yield chunks of executions executed in [since, until), ordered by
+        (executed_at, id), as tuples of EXECUTION_COLUMNS.
+        """
+        query = select(
+            *(getattr(Execution, column) for column in EXECUTION_COLUMNS[:-1]),
+            Execution.payload_data,
+            Execution.payload,
+        )
+        if script_id is not None:
+            query = query.where(Execution.script_id == script_id)
+        if status is not None and script_id is None:
+            # Compared as an expression so the status index isn't used: it
+            # would sort every matching row again for each chunk, where the
+            # executed_at index reads each chunk in order
+            query = query.where(Execution.status.concat("") == status)
+        elif status is not None:
+            query = query.where(Execution.status == status)
+        if since is not None:
+            query = query.where(Execution.executed_at >= since)
+        if until is not None:
+            query = query.where(Execution.executed_at < until)
+        query = query.order_by(Execution.executed_at, Execution.id).limit(self.chunk_size)
+        
+        after = None
+        while True:
+            chunk_query = query
+            if after:
+                chunk_query = query.where(tuple_(Execution.executed_at, Execution.id) > after)
+            rows = await self._read_chunk(chunk_query)
+            if not rows:
+                return
+            yield [(*row[:-2], decode_payload(row.payload_data, row.payload)) for row in rows]
+            if len(rows) < self.chunk_size:
+                return
+            after = (rows[-1].executed_at, rows[-1].id)
+    
+    async def pings(
+        self,
+        system_id: Optional[int] = None,
+        status: Optional[bool] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> AsyncIterator[list[Row]]:
+        """
+        Yield chunks of stored pings and heartbeat rollups (timestamped by
+        their last ping) in [since, until), ordered by (timestamp, kind, id)
+        like the ping history, as rows of PING_COLUMNS.
+        
+        Rollups only hold "running" pings, so status=False skips them.
+        """
+        after = None
+        while True:
+            query = ping_history_query(
+                self.chunk_size,
+                after=after,
+                system_id=system_id,
+                status=status,
+                since=since,
+                until=until,
+            ).limit(self.chunk_size)
+            
+            rows = await self._read_chunk(query)
+            if not rows:
+                return
+            yield rows
+            if len(rows) < self.chunk_size:
+                return
+            after = (rows[-1].timestamp, rows[-1].kind, rows[-1].id)
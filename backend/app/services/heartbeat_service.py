@@ -0,0 +1,127 @@
+"""
+Heartbeat Service
+
+Coalesced storage for system pings. Instead of one SystemPing row per
+heartbeat, only status changes are stored as SystemPing rows and the "still
+up" pings are counted in memory and written as one SystemPingRollup row per
+system and interval.
+
+Each worker counts the pings it receives, so with several workers an
+interval may get one rollup row per worker.
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+
+from app.config import get_settings
+from app.core.bulk import insert_rows
+from app.core.cache import history_totals
+from app.core.cluster import cluster
+from app.core.metrics import monitor_pass_seconds, monitor_rows
+from app.database import async_session
+from app.models import SystemPingRollup
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+EPOCH = datetime(1970, 1, 1)
+
+
+class HeartbeatRollups:
+    """In-memory per-system ping counters, written out as SystemPingRollup rows."""
+    def __init__(self, interval_minutes: int):
+        self.interval = timedelta(minutes=interval_minutes)
+        # system_id -> [period_start, first_ping, last_ping, ping_count]
+        self._open: dict[int, list] = {}
+        # (system_id, period_start, first_ping, last_ping, ping_count) ready to be written
+        self._closed: list[tuple] = []
+
+    def _period_start(self, at: datetime) -> datetime:
+        return at - (at - EPOCH) % self.interval
+
+    def record(self, system_id: int, at: datetime):
+        """Count a ping in the system's current interval."""
+        period_start = self._period_start(at)
+        bucket = self._open.get(system_id)
+        if bucket and bucket[0] != period_start:
+            self._closed.append((system_id, *bucket))
+            bucket = None
+        if bucket is None:
+            self._open[system_id] = [period_start, at, at, 1]
+        else:
+            bucket[2] = at
+            bucket[3] += 1
+
+    def discard(self, system_id: int, relay: bool = True):
+        """Forget pending counters of a deleted system."""
+        if relay:
+            cluster.publish("rollups", {"system_id": system_id})
+        self._open.pop(system_id, None)
+        self._closed = [row for row in self._closed if row[0] != system_id]
+
+    async def flush(self, include_open: bool = False) -> int:
+        """Write finished intervals (or everything, on shutdown). Returns the number of rows written."""
+        now = datetime.utcnow()
+        for system_id, bucket in list(self._open.items()):
+            if include_open or bucket[0] + self.interval <= now:
+                self._closed.append((system_id, *bucket))
+                del self._open[system_id]
+
+        rows, self._closed = self._closed, []
+        if not rows:
+            return 0
+
+        try:
+            async with async_session() as db:
+                await insert_rows(await db.connection(), SystemPingRollup.__table__, [
+                    {
+                        "system_id": system_id,
+                        "period_start": period_start,
+                        "first_ping": first_ping,
+                        "last_ping": last_ping,
+                        "ping_count": ping_count,
+                    }
+                    for system_id, period_start, first_ping, last_ping, ping_count in rows
+                ])
+                await db.commit()
+        except Exception:
+            # Keep them for the next attempt
+            self._closed = rows + self._closed
+            raise
+        for system_id in {row[0] for row in rows}:
+            history_totals.invalidate(("pings", system_id))
+        return len(rows)
+
+
+# Global instances
+heartbeat_rollups = HeartbeatRollups(settings.SYSTEM_PING_ROLLUP_MINUTES)
+
+cluster.subscribe("rollups", lambda message: heartbeat_rollups.discard(message["system_id"], relay=False))
+
+
+def pings_coalesced() -> bool:
+    """Whether heartbeats are coalesced instead of stored one row per ping."""
+    return settings.SYSTEM_PING_STORAGE == "coalesced"
+
+
+async def heartbeat_rollup_loop():
+    """Periodically write finished rollup intervals."""
+    while True:
+        await asyncio.sleep(60)
+        started = time.perf_counter()
+        try:
+            written = await heartbeat_rollups.flush()
+            monitor_rows.inc(written, monitor="heartbeat_rollups")
+            if written:
+                logger.info(f"Wrote {written} heartbeat rollup rows")
+        except Exception as e:
+            logger.error(f"Error writing heartbeat rollups: {e}")
+        monitor_pass_seconds.observe(time.perf_counter() - started, monitor="heartbeat_rollups")
+
+
+def start_heartbeat_rollups():
+    """Start the rollup writer task if coalesced storage is enabled."""
+    if pings_coalesced():
+        asyncio.create_task(heartbeat_rollup_loop())
@@ -0,0 +1,193 @@
+"""
+Execution Ingestion Service
+
+Optional write-behind pipeline for execution webhooks. The webhook handler
+validates the request and enqueues the execution; a background writer
+persists queued executions in batched transactions bounded by size and time.
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Optional
+
+from app.config import get_settings
+from app.core.metrics import metrics, monitor_pass_seconds, monitor_rows
+from app.core.token_index import ScriptToken
+from app.database import async_session
+from app.schemas import WebhookPayload
+from app.services.script_service import ExecutionService
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+
+class IngestionQueueFull(Exception):
+    """Raised when the ingestion queue stays full for longer than the enqueue timeout."""
+    pass
+
+
+class ExecutionIngestor:
+    """Write-behind queue that persists webhook executions in batches."""
+    def __init__(self, max_queue_size: int, batch_size: int, flush_interval: float, enqueue_timeout: float):
+        self.max_queue_size = max_queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.enqueue_timeout = enqueue_timeout
+        self.queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+        # Metrics
+        self.enqueued = 0
+        self.rejected = 0
+        self.written = 0
+        self.failed = 0
+        self.batches = 0
+        self.last_batch_size = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self.total_flush_ms = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        """Start the background writer task."""
+        self.queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._task = asyncio.create_task(self._run())
+        logger.info(
+            f"Execution ingestion started (batch={self.batch_size}, "
+            f"interval={self.flush_interval}s, queue={self.max_queue_size})"
+        )
+
+    async def enqueue(self, script: ScriptToken, payload: WebhookPayload):
+        """
+        Queue an execution for writing.
+
+        Applies back-pressure: waits up to enqueue_timeout for room in the
+        queue and raises IngestionQueueFull if there is none.
+        """
+        execution = ExecutionService.build_execution(script, payload, received_at=datetime.utcnow())
+        try:
+            await asyncio.wait_for(self.queue.put((script, execution)), timeout=self.enqueue_timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise IngestionQueueFull()
+        self.enqueued += 1
+
+    async def _next_batch(self) -> list:
+        """Wait for one item, then collect more until the batch is full or the interval elapses."""
+        batch = [await self.queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.flush_interval
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self.queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout=timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _write(self, batch: list):
+        async with async_session() as db:
+            await ExecutionService(db).save_executions(batch)
+
+    async def _flush(self, batch: list):
+        """Write a batch in one transaction, falling back to one transaction per item on failure."""
+        started = time.perf_counter()
+        try:
+            await self._write(batch)
+            self.written += len(batch)
+        except Exception as e:
+            logger.error(f"Error writing execution batch of {len(batch)}, retrying one by one: {e}")
+            for item in batch:
+                try:
+                    await self._write([item])
+                    self.written += 1
+                except Exception as item_error:
+                    self.failed += 1
+                    logger.error(f"Dropped execution for script {item[0].id}: {item_error}")
+        finally:
+            for _ in batch:
+                self.queue.task_done()
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        monitor_pass_seconds.observe(elapsed_ms / 1000, monitor="ingestion")
+        monitor_rows.inc(len(batch), monitor="ingestion")
+        self.batches += 1
+        self.last_batch_size = len(batch)
+        self.last_flush_ms = elapsed_ms
+        self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+        self.total_flush_ms += elapsed_ms
+
+    async def _run(self):
+        """Main writer loop."""
+        while True:
+            batch = await self._next_batch()
+            await self._flush(batch)
+
+    async def drain(self):
+        """Write everything still queued and stop the writer (called on shutdown)."""
+        if not self.running:
+            return
+        logger.info(f"Draining execution ingestion queue ({self.queue.qsize()} pending)")
+        await self.queue.join()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def stats(self) -> dict:
+        """Current queue and flush metrics."""
+        return {
+            "mode": "batched",
+            "running": self.running,
+            "queue_depth": self.queue.qsize() if self.queue else 0,
+            "queue_capacity": self.max_queue_size,
+            "enqueued": self.enqueued,
+            "rejected": self.rejected,
+            "written": self.written,
+            "failed": self.failed,
+            "batches": self.batches,
+            "last_batch_size": self.last_batch_size,
+            "last_flush_ms": round(self.last_flush_ms, 2),
+            "avg_flush_ms": round(self.total_flush_ms / self.batches, 2) if self.batches else 0.0,
+            "max_flush_ms": round(self.max_flush_ms, 2),
+        }
+
+
+# Global instances
+execution_ingestor = ExecutionIngestor(
+    max_queue_size=settings.INGESTION_QUEUE_SIZE,
+    batch_size=settings.INGESTION_BATCH_SIZE,
+    flush_interval=settings.INGESTION_FLUSH_INTERVAL,
+    enqueue_timeout=settings.INGESTION_ENQUEUE_TIMEOUT,
+)
+metrics.gauge(
+    "ingestion_queue_depth", "Executions waiting in the ingestion queue",
+    collect=lambda: execution_ingestor.queue.qsize() if execution_ingestor.queue else 0,
+)
+metrics.counter("ingestion_rejected_total", "Webhooks rejected with a full queue", collect=lambda: execution_ingestor.rejected)
+metrics.counter("ingestion_failed_total", "Queued executions that could not be written", collect=lambda: execution_ingestor.failed)
+
+
+def ingestion_enabled() -> bool:
+    """Whether webhooks should be queued instead of written synchronously."""
+    return settings.WEBHOOK_INGESTION_MODE == "batched"
+
+
+def start_ingestion():
+    """Start the batched writer if enabled."""
+    if ingestion_enabled():
+        execution_ingestor.start()
@@ -1,138 +1,119 @@
 import asyncio
+import time
 from datetime import datetime, timedelta
-from sqlalchemy import select, desc
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.models import Script, Execution
+from sqlalchemy.orm import contains_eager
+from app.models import Script, ScriptState, Execution
 from app.database import async_session
-from app.services.script_service import ScriptService
+from app.services.script_service import ScriptService, ScriptStateService
+from app.core.cache import dashboard_cache, history_totals
+from app.core.metrics import monitor_pass_seconds, monitor_rows
+from app.core.schedule import schedule_rules
+from app.core.notifications import notification_manager
+from app.config import get_settings
 import logging
 
 logger = logging.getLogger(__name__)
 
+settings = get_settings()
+
+
+async def record_missed_executions(db: AsyncSession, now_utc: datetime, full: bool = False) -> int:
+    """
+    Record 'missed' executions for scripts that passed their expected period without running.
+
+    Only scripts whose precomputed boundary (ScriptState.missed_next_check_at)
+    has passed are loaded, unless `full` is set. Each one resumes from its
+    cursor, so a tick costs O(missed periods) instead of a walk over every
+    script's history. Returns the number of missed executions recorded.
+    """
+    query = (
+        select(Script)
+        .join(ScriptState, ScriptState.script_id == Script.id)
+        .options(contains_eager(Script.state))
+        .where(Script.is_active == True)
+    )
+    if not full:
+        query = query.where(ScriptState.missed_next_check_at <= now_utc)
+    result = await db.execute(query)
+    scripts = result.scalars().all()
+    monitor_rows.inc(len(scripts), monitor="missed_executions")
+
+    state_service = ScriptStateService(db)
+    missed_by_script = []
+
+    for script in scripts:
+        state = script.state
+        after = ScriptService._get_missed_check_after(script, state)
+        missed_at, checked_through = schedule_rules.get(script).periods_between(after, now_utc)
+
+        missed_execs = [
+            Execution(
+                script_id=script.id,
+                status="missed",
+                executed_at=executed_at,
+                error_message="Período encerrado sem execução detectada."
+            )
+            for executed_at in missed_at
+        ]
+        if missed_execs:
+            missed_by_script.append((script, missed_execs))
+            logger.info(f"Recorded {len(missed_execs)} MISSED execution(s) for script {script.id} ({script.name}), last at {missed_at[-1]}")
+
+        # Advance the cursor past what was just evaluated (and recorded)
+        if missed_at:
+            after = max(after, missed_at[-1])
+        state.missed_checked_through = checked_through
+        state.missed_next_check_at = ScriptService._get_next_missed_check_at(
+            script, max(after, checked_through - timedelta(microseconds=1))
+        )
+
+    # Insert every missed row in one batch
+    summaries = []
+    if missed_by_script:
+        db.add_all([e for _, missed_execs in missed_by_script for e in missed_execs])
+        await db.flush()
+        for script, missed_execs in missed_by_script:
+            summaries.append((script, await state_service.record(script, missed_execs)))
+
+    await db.commit()
+    recorded = sum(len(missed_execs) for _, missed_execs in missed_by_script)
+    if recorded:
+        dashboard_cache.invalidate()
+        for script, _ in missed_by_script:
+            history_totals.invalidate(("executions", script.id))
+
+    # Let clients patch the scripts' status
+    for script, summary in summaries:
+        await notification_manager.broadcast("script_updated", {
+            "script_id": script.id,
+            "script_name": script.name,
+            "script": ScriptService._build_delta(script, summary, now_utc),
+        })
+    return recorded
+
+
 async def check_missed_executions():
     """
-    Background task to check all scripts and record 'missed' executions 
-    if they passed their expected period without running.
+    Background task that records 'missed' executions.
+
+    The first pass evaluates every active script (setting up cursors for
+    scripts that have none); later passes only touch scripts whose boundary
+    has passed.
     """
+    full = True
     while True:
+        started = time.perf_counter()
         try:
             async with async_session() as db:
-                # 1. Get all active scripts
-                query = select(Script).where(Script.is_active == True)
-                result = await db.execute(query)
-                scripts = result.scalars().all()
-                
-                now_utc = datetime.utcnow()
-                now_local = now_utc - timedelta(hours=3)
-                
-                for script in scripts:
-                    # 2. Get last execution (including missed ones)
-                    exec_query = select(Execution).where(Execution.script_id == script.id).order_by(desc(Execution.executed_at)).limit(1)
-                    exec_result = await db.execute(exec_query)
-                    last_exec = exec_result.scalar_one_or_none()
-                    
-                    # Store everything in local time for logic
-                    last_exec_at_utc = last_exec.executed_at if last_exec else script.created_at
-                    last_exec_at_local = last_exec_at_utc - timedelta(hours=3)
-                    
-                    # 3. Calculate missing periods based on frequency
-                    missed_periods_local = []
-                    
-                    if script.frequency == "daily":
-                        # Check missed days between last_exec_at and today (in local time)
-                        current_check_local = last_exec_at_local.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
-                        today_start_local = now_local.replace(hour=0, minute=0, second=0, microsecond=0)
-                        
-                        while current_check_local < today_start_local:
-                            missed_periods_local.append(current_check_local.replace(hour=23, minute=59, second=59))
-                            current_check_local += timedelta(days=1)
-                            
-                    elif script.frequency == "weekly":
-                        # Monday start (local)
-                        days_since_monday = last_exec_at_local.weekday()
-                        current_week_start_local = (last_exec_at_local - timedelta(days=days_since_monday)).replace(hour=0, minute=0, second=0, microsecond=0)
-                        next_week_start_local = current_week_start_local + timedelta(weeks=1)
-                        
-                        this_week_start_local = (now_local - timedelta(days=now_local.weekday())).replace(hour=0, minute=0, second=0, microsecond=0)
-                        
-                        while next_week_start_local < this_week_start_local:
-                            missed_periods_local.append(next_week_start_local - timedelta(seconds=1))
-                            next_week_start_local += timedelta(weeks=1)
-                            
-                    elif script.frequency == "monthly":
-                        # Monthly (local)
-                        current_month_start_local = last_exec_at_local.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-                        next_month_start_local = (current_month_start_local + timedelta(days=32)).replace(day=1)
-                        
-                        this_month_start_local = now_local.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-                        
-                        while next_month_start_local < this_month_start_local:
-                            missed_periods_local.append(next_month_start_local - timedelta(seconds=1))
-                            next_month_start_local = (next_month_start_local + timedelta(days=32)).replace(day=1)
-
-                    elif script.frequency == "biweekly":
-                        # Biweekly 1-15 or 16-end (local)
-                        if last_exec_at_local.day <= 15:
-                            current_fortnight_start_local = last_exec_at_local.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-                            next_fortnight_start_local = current_fortnight_start_local.replace(day=16)
-                        else:
-                            current_fortnight_start_local = last_exec_at_local.replace(day=16, hour=0, minute=0, second=0, microsecond=0)
-                            next_fortnight_start_local = (current_fortnight_start_local + timedelta(days=20)).replace(day=1)
-
-                        if now_local.day <= 15:
-                            this_fortnight_start_local = now_local.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-                        else:
-                            this_fortnight_start_local = now_local.replace(day=16, hour=0, minute=0, second=0, microsecond=0)
-
-                        while next_fortnight_start_local < this_fortnight_start_local:
-                            missed_periods_local.append(next_fortnight_start_local - timedelta(seconds=1))
-                            if next_fortnight_start_local.day == 1:
-                                next_fortnight_start_local = next_fortnight_start_local.replace(day=16)
-                            else:
-                                next_fortnight_start_local = (next_fortnight_start_local + timedelta(days=20)).replace(day=1)
-                            
-                    elif script.frequency == "scheduled" and script.scheduled_times:
-                        # Scheduled times (local)
-                        times = [t.strip() for t in script.scheduled_times.split(",")]
-                        start_date_local = last_exec_at_local.date()
-                        end_date_local = now_local.date()
-                        
-                        curr_date_local = start_date_local
-                        while curr_date_local <= end_date_local:
-                            for t_str in times:
-                                try:
-                                    h, m = map(int, t_str.split(":"))
-                                    sched_dt_local = datetime.combine(curr_date_local, datetime.min.time().replace(hour=h, minute=m))
-                                    
-                                    if sched_dt_local < now_local and sched_dt_local > last_exec_at_local:
-                                        missed_periods_local.append(sched_dt_local)
-                                except:
-                                    continue
-                            curr_date_local += timedelta(days=1)
-                            
-                    # 4. Create missed executions (convert back to UTC)
-                    for period_end_local in missed_periods_local:
-                        period_end_utc = period_end_local + timedelta(hours=3)
-                        # Check if we already recorded a missed execution for near this time to avoid duplicates
-                        # (A simple check for performance: is there ANY execution in that calendar day/week?)
-                        # Actually, since we are moving forward from last_exec_at, it should be fine.
-                        
-                        missed_exec = Execution(
-                            script_id=script.id,
-                            status="missed",
-                            executed_at=period_end_utc,
-                            error_message="Período encerrado sem execução detectada."
-                        )
-                        db.add(missed_exec)
-                        logger.info(f"Recorded MISSED execution for script {script.id} ({script.name}) at {period_end_utc}")
-
-                await db.commit()
-                
+                await record_missed_executions(db, datetime.utcnow(), full=full)
+            full = False
         except Exception as e:
             logger.error(f"Error in background monitor check: {e}")
-            
-        # Run every 10 minutes (or shorter for testing)
-        await asyncio.sleep(600)
+        monitor_pass_seconds.observe(time.perf_counter() - started, monitor="missed_executions")
+
+        await asyncio.sleep(settings.MISSED_CHECK_INTERVAL)
 
 def start_monitor():
     """Start the background monitor task."""
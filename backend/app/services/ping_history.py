@@ -0,0 +1,96 @@
+"""
+Ping History
+
+A system's history merges two tables: stored pings and heartbeat rollups
+(timestamped by their last ping). Both the paged history endpoint and the
+ping export read it through ping_history_query, ordered by (timestamp, kind,
+id) and resumed with a keyset over that same key.
+"""
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import Select, select, literal, tuple_, union_all, DateTime, Text
+
+from app.models import SystemPing, SystemPingRollup
+
+# History branches, as named in the "kind" column and in cursors
+PING_KINDS = ("ping", "rollup")
+
+
+def ping_history_query(
+    limit: int,
+    descending: bool = False,
+    after: Optional[tuple[datetime, str, int]] = None,
+    system_id: Optional[int] = None,
+    status: Optional[bool] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+) -> Select:
+    """
+    Pings and rollups in [since, until), as rows of (id, system_id,
+    timestamp, status, client_info, kind, ping_count, first_ping, last_ping)
+    ordered by timestamp, kind, id (timestamp and id newest first if
+    `descending`), starting past the (timestamp, kind, id) of `after`.
+
+    Each branch reads at most `limit` rows before they are merged, so the
+    caller must not read more than `limit` rows of the result (offset
+    included). Rollups only hold "running" pings, so status=False skips them.
+    """
+    pings = select(
+        SystemPing.id,
+        SystemPing.system_id,
+        SystemPing.timestamp,
+        SystemPing.status,
+        SystemPing.client_info,
+        literal("ping").label("kind"),
+        literal(1).label("ping_count"),
+        literal(None, DateTime).label("first_ping"),
+        literal(None, DateTime).label("last_ping"),
+    )
+    if status is not None:
+        pings = pings.where(SystemPing.status == status)
+    branches = [("ping", SystemPing, SystemPing.timestamp, pings)]
+    if status is not False:
+        rollups = select(
+            SystemPingRollup.id,
+            SystemPingRollup.system_id,
+            SystemPingRollup.last_ping.label("timestamp"),
+            literal(True).label("status"),
+            literal(None, Text).label("client_info"),
+            literal("rollup").label("kind"),
+            SystemPingRollup.ping_count,
+            SystemPingRollup.first_ping,
+            SystemPingRollup.last_ping,
+        )
+        branches.append(("rollup", SystemPingRollup, SystemPingRollup.last_ping, rollups))
+
+    # Each branch seeks past `after` and reads at most `limit` rows, then
+    # they are merged
+    parts = []
+    for kind, model, timestamp_col, branch in branches:
+        if system_id is not None:
+            branch = branch.where(model.system_id == system_id)
+        if since is not None:
+            branch = branch.where(timestamp_col >= since)
+        if until is not None:
+            branch = branch.where(timestamp_col < until)
+        if after:
+            after_timestamp, after_kind, after_id = after
+            if kind == after_kind:
+                key = tuple_(timestamp_col, model.id)
+                branch = branch.where(key < (after_timestamp, after_id) if descending else key > (after_timestamp, after_id))
+            elif kind > after_kind:
+                # Sorts after the last row's kind at an equal timestamp
+                branch = branch.where(timestamp_col <= after_timestamp if descending else timestamp_col >= after_timestamp)
+            else:
+                branch = branch.where(timestamp_col < after_timestamp if descending else timestamp_col > after_timestamp)
+        if descending:
+            branch = branch.order_by(timestamp_col.desc(), model.id.desc())
+        else:
+            branch = branch.order_by(timestamp_col, model.id)
+        parts.append(select(branch.limit(limit).subquery()))
+    history = union_all(*parts).subquery()
+
+    if descending:
+        return select(history).order_by(history.c.timestamp.desc(), history.c.kind, history.c.id.desc())
+    return select(history).order_by(history.c.timestamp, history.c.kind, history.c.id)
@@ -0,0 +1,439 @@
+"""
+Retention Service
+
+Keeps raw executions and system pings for RETENTION_DAYS local days. Older
+rows are folded into per-script and per-system daily aggregates
+(ExecutionDailyStats, SystemDailyStats) and deleted in small batches, each
+its own short transaction, so webhook writes are never held up for long.
+Aggregates are merged on every batch and outlive the raw rows, so long-range
+stats read a row per day instead of the whole history.
+"""
+import asyncio
+import logging
+import time
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import delete, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.core.cache import history_totals
+from app.core.metrics import monitor_pass_seconds, monitor_rows
+from app.core.schedule import local_day, local_day_start
+from app.database import async_session
+from app.models import Execution, ExecutionDailyStats, SystemDailyStats, SystemPing, SystemPingRollup
+from app.services.duration_stats_service import DurationStats
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+STATUS_COUNTS = {
+    "success": "success_count",
+    "error": "error_count",
+    "warning": "warning_count",
+    "missed": "missed_count",
+}
+
+
+def retention_cutoff(now: datetime) -> datetime:
+    """Raw rows before this UTC moment (the start of a local day) are aggregated and pruned."""
+    return local_day_start(local_day(now) - timedelta(days=settings.RETENTION_DAYS))
+
+
+class ExecutionDay:
+    """Running aggregate of one script's executions over one day."""
+    def __init__(self):
+        self.execution_count = 0
+        self.success_count = 0
+        self.error_count = 0
+        self.warning_count = 0
+        self.missed_count = 0
+        self.durations = DurationStats()
+
+    @classmethod
+    def from_row(cls, row: ExecutionDailyStats) -> "ExecutionDay":
+        day = cls()
+        day.merge_row(row)
+        return day
+
+    def add(self, status: Optional[str], duration_ms: Optional[int]):
+        """Count one execution."""
+        self.execution_count += 1
+        counter = STATUS_COUNTS.get(status)
+        if counter:
+            setattr(self, counter, getattr(self, counter) + 1)
+        if duration_ms is not None:
+            self.durations.add(duration_ms)
+
+    def merge_row(self, row: ExecutionDailyStats):
+        """Add a stored aggregate."""
+        self.execution_count += row.execution_count
+        for counter in STATUS_COUNTS.values():
+            setattr(self, counter, getattr(self, counter) + getattr(row, counter))
+        self.durations.merge(DurationStats.from_columns(row))
+
+    def apply_to(self, row: ExecutionDailyStats):
+        """Write the aggregate into a stored row."""
+        row.execution_count = self.execution_count
+        for counter in STATUS_COUNTS.values():
+            setattr(row, counter, getattr(self, counter))
+        self.durations.apply_to(row)
+
+    def as_dict(self) -> dict:
+        durations = self.durations.as_dict()
+        return {
+            "execution_count": self.execution_count,
+            **{counter: getattr(self, counter) for counter in STATUS_COUNTS.values()},
+            "duration_count": durations["count"],
+            "duration_min_ms": durations["min_ms"],
+            "duration_avg_ms": durations["avg_ms"],
+            "duration_max_ms": durations["max_ms"],
+            "duration_p95_ms": durations["p95_ms"],
+        }
+
+
+class SystemDay:
+    """Running aggregate of one system's pings over one day."""
+    def __init__(self):
+        self.ping_count = 0
+        self.down_count = 0
+        self.uptime_seconds = 0.0
+        self.last_status: Optional[bool] = None
+        self.last_status_at: Optional[datetime] = None
+
+    def merge_into(self, row: SystemDailyStats):
+        """Add the aggregate to a stored row."""
+        row.ping_count = (row.ping_count or 0) + self.ping_count
+        row.down_count = (row.down_count or 0) + self.down_count
+        row.uptime_seconds = (row.uptime_seconds or 0) + self.uptime_seconds
+        if self.last_status_at and (row.last_status_at is None or self.last_status_at >= row.last_status_at):
+            row.last_status = self.last_status
+            row.last_status_at = self.last_status_at
+
+    def as_dict(self) -> dict:
+        return {
+            "ping_count": self.ping_count,
+            "down_count": self.down_count,
+            "uptime_seconds": self.uptime_seconds,
+        }
+
+
+class SystemTimeline:
+    """
+    Folds one system's status events, in time order, into SystemDay entries.
+
+    The system counts as up from an "up" event until the next event, so
+    uptime needs the status before the first event (the carried state).
+    """
+    def __init__(self, status: Optional[bool] = None, at: Optional[datetime] = None):
+        self.status = status
+        self.at = at
+        self.days: dict[date, SystemDay] = {}
+
+    def day(self, day: date) -> SystemDay:
+        if day not in self.days:
+            self.days[day] = SystemDay()
+        return self.days[day]
+
+    def add(self, at: datetime, status: bool, pings: int = 1):
+        """Record an event: a ping (or `pings` rolled-up pings) with a status."""
+        if self.at is not None and at < self.at:
+            # Overlaps what was already folded (rollups start before they end)
+            at = self.at
+        self.advance(at)
+        day = self.day(local_day(at))
+        day.ping_count += pings
+        if not status:
+            day.down_count += 1
+        day.last_status, day.last_status_at = status, at
+        self.status = status
+
+    def advance(self, until: datetime):
+        """Account uptime up to a moment, split over the days it spans."""
+        if self.at is not None and self.status:
+            start = self.at
+            while start < until:
+                day = local_day(start)
+                end = min(until, local_day_start(day + timedelta(days=1)))
+                self.day(day).uptime_seconds += (end - start).total_seconds()
+                start = end
+        if self.at is None or until > self.at:
+            self.at = until
+
+
+async def carried_system_state(db: AsyncSession, system_id: int) -> tuple[Optional[bool], Optional[datetime]]:
+    """Status of a system after its last aggregated event, and when that event happened."""
+    result = await db.execute(
+        select(SystemDailyStats.last_status, SystemDailyStats.last_status_at)
+        .where(SystemDailyStats.system_id == system_id, SystemDailyStats.last_status_at.is_not(None))
+        .order_by(SystemDailyStats.day.desc())
+        .limit(1)
+    )
+    row = result.first()
+    return (row[0], row[1]) if row else (None, None)
+
+
+class RetentionService:
+    """Aggregates and prunes history past the retention window, one batch per call."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def prune_executions(self, cutoff: datetime, batch_size: int) -> int:
+        """Fold the oldest executions before `cutoff` into daily stats and delete them. Returns how many."""
+        result = await self.db.execute(
+            select(Execution.id, Execution.script_id, Execution.executed_at, Execution.status, Execution.duration_ms)
+            .where(Execution.executed_at < cutoff)
+            .order_by(Execution.executed_at, Execution.id)
+            .limit(batch_size)
+        )
+        rows = result.all()
+        if not rows:
+            return 0
+
+        days: dict[tuple[int, date], ExecutionDay] = {}
+        removed_by_script: dict[int, int] = {}
+        for _, script_id, executed_at, status, duration_ms in rows:
+            key = (script_id, local_day(executed_at))
+            if key not in days:
+                days[key] = ExecutionDay()
+            days[key].add(status, duration_ms)
+            removed_by_script[script_id] = removed_by_script.get(script_id, 0) + 1
+
+        # Merge into the stored aggregates
+        stored_result = await self.db.execute(
+            select(ExecutionDailyStats).where(
+                ExecutionDailyStats.script_id.in_(removed_by_script),
+                ExecutionDailyStats.day.between(min(day for _, day in days), max(day for _, day in days)),
+            )
+        )
+        stored = {(row.script_id, row.day): row for row in stored_result.scalars()}
+        for (script_id, day), aggregate in days.items():
+            row = stored.get((script_id, day))
+            if row is None:
+                row = ExecutionDailyStats(script_id=script_id, day=day)
+                self.db.add(row)
+            else:
+                aggregate.merge_row(row)
+            aggregate.apply_to(row)
+
+        await self.db.execute(delete(Execution).where(Execution.id.in_([row[0] for row in rows])))
+        await self.db.commit()
+        return len(rows)
+
+    async def prune_pings(self, cutoff: datetime, batch_size: int) -> int:
+        """Fold the oldest pings and rollups before `cutoff` into daily stats and delete them. Returns how many."""
+        pings = (await self.db.execute(
+            select(SystemPing.id, SystemPing.system_id, SystemPing.timestamp, SystemPing.status)
+            .where(SystemPing.timestamp < cutoff)
+            .order_by(SystemPing.timestamp, SystemPing.id)
+            .limit(batch_size)
+        )).all()
+        rollups = (await self.db.execute(
+            select(SystemPingRollup.id, SystemPingRollup.system_id, SystemPingRollup.first_ping,
+                   SystemPingRollup.last_ping, SystemPingRollup.ping_count)
+            .where(SystemPingRollup.last_ping < cutoff)
+            .order_by(SystemPingRollup.last_ping, SystemPingRollup.id)
+            .limit(batch_size)
+        )).all()
+        if not pings and not rollups:
+            return 0
+
+        # Events must be folded in time order: stop where the shorter of the two full batches ends
+        bound = cutoff
+        if len(pings) == batch_size:
+            bound = min(bound, pings[-1].timestamp)
+        if len(rollups) == batch_size:
+            bound = min(bound, rollups[-1].last_ping)
+        pings = [p for p in pings if p.timestamp <= bound]
+        rollups = [r for r in rollups if r.last_ping <= bound]
+
+        events: dict[int, list[tuple]] = {}
+        for _, system_id, timestamp, status in pings:
+            events.setdefault(system_id, []).append((timestamp, bool(status), 1))
+        for _, system_id, first_ping, last_ping, ping_count in rollups:
+            events.setdefault(system_id, []).append((first_ping, True, 0))
+            events.setdefault(system_id, []).append((last_ping, True, ping_count))
+
+        for system_id, system_events in events.items():
+            timeline = SystemTimeline(*await carried_system_state(self.db, system_id))
+            for at, status, count in sorted(system_events, key=lambda e: e[0]):
+                timeline.add(at, status, count)
+
+            stored_result = await self.db.execute(
+                select(SystemDailyStats).where(
+                    SystemDailyStats.system_id == system_id,
+                    SystemDailyStats.day.in_(list(timeline.days)),
+                )
+            )
+            stored = {row.day: row for row in stored_result.scalars()}
+            for day, aggregate in timeline.days.items():
+                row = stored.get(day)
+                if row is None:
+                    row = SystemDailyStats(system_id=system_id, day=day)
+                    self.db.add(row)
+                aggregate.merge_into(row)
+
+        if pings:
+            await self.db.execute(delete(SystemPing).where(SystemPing.id.in_([p[0] for p in pings])))
+        if rollups:
+            await self.db.execute(delete(SystemPingRollup).where(SystemPingRollup.id.in_([r[0] for r in rollups])))
+        await self.db.commit()
+        return len(pings) + len(rollups)
+
+    async def reclaim_space(self, pages: int) -> int:
+        """
+        Return up to `pages` free pages to the file system (SQLite with
+        auto_vacuum=INCREMENTAL only). Returns the number of pages freed.
+        """
+        if self.db.bind.dialect.name != "sqlite":
+            return 0
+        mode = (await self.db.execute(text("PRAGMA auto_vacuum"))).scalar()
+        if mode != 2:
+            return 0
+        free = (await self.db.execute(text("PRAGMA freelist_count"))).scalar() or 0
+        if not free:
+            return 0
+        # executescript runs the pragma to completion (execute frees one page per call)
+        connection = await self.db.connection()
+        raw_connection = await connection.get_raw_connection()
+        await raw_connection.driver_connection.executescript(f"PRAGMA incremental_vacuum({int(pages)});")
+        await self.db.commit()
+        return min(free, pages)
+
+
+class DailyStatsService:
+    """Per-day history stats: stored aggregates merged with the raw rows still in the window."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_execution_stats(self, script_id: int, days: int, now: datetime) -> list[dict]:
+        """Daily execution stats of a script over the last `days` local days, oldest first."""
+        first_day = local_day(now) - timedelta(days=days - 1)
+        start = local_day_start(first_day)
+
+        result: dict[date, ExecutionDay] = {}
+        stored = await self.db.execute(
+            select(ExecutionDailyStats)
+            .where(ExecutionDailyStats.script_id == script_id, ExecutionDailyStats.day >= first_day)
+        )
+        for row in stored.scalars():
+            result[row.day] = ExecutionDay.from_row(row)
+
+        raw = await self.db.execute(
+            select(Execution.executed_at, Execution.status, Execution.duration_ms)
+            .where(Execution.script_id == script_id, Execution.executed_at >= start)
+        )
+        for executed_at, status, duration_ms in raw.all():
+            day = local_day(executed_at)
+            if day not in result:
+                result[day] = ExecutionDay()
+            result[day].add(status, duration_ms)
+
+        return [{"day": day, **result[day].as_dict()} for day in sorted(result)]
+
+    async def get_system_stats(self, system_id: int, days: int, now: datetime) -> list[dict]:
+        """Daily ping stats and uptime of a system over the last `days` local days, oldest first."""
+        first_day = local_day(now) - timedelta(days=days - 1)
+        start = local_day_start(first_day)
+
+        # Status at the start of the raw rows: whichever is later of the
+        # last aggregated event and the last raw ping before the range
+        status, at = await carried_system_state(self.db, system_id)
+        previous = (await self.db.execute(
+            select(SystemPing.timestamp, SystemPing.status)
+            .where(SystemPing.system_id == system_id, SystemPing.timestamp < start)
+            .order_by(SystemPing.timestamp.desc(), SystemPing.id.desc())
+            .limit(1)
+        )).first()
+        if previous and (at is None or previous[0] > at):
+            at, status = previous
+        timeline = SystemTimeline(bool(status) if status is not None else None, max(at, start) if at else None)
+
+        events = [
+            (timestamp, bool(ping_status), 1)
+            for timestamp, ping_status in (await self.db.execute(
+                select(SystemPing.timestamp, SystemPing.status)
+                .where(SystemPing.system_id == system_id, SystemPing.timestamp >= start)
+            )).all()
+        ]
+        for first_ping, last_ping, ping_count in (await self.db.execute(
+            select(SystemPingRollup.first_ping, SystemPingRollup.last_ping, SystemPingRollup.ping_count)
+            .where(SystemPingRollup.system_id == system_id, SystemPingRollup.last_ping >= start)
+        )).all():
+            events.append((max(first_ping, start), True, 0))
+            events.append((last_ping, True, ping_count))
+        for event_at, event_status, count in sorted(events, key=lambda e: e[0]):
+            timeline.add(event_at, event_status, count)
+        # Still up since the last ping
+        timeline.advance(now)
+
+        result = {day: aggregate.as_dict() for day, aggregate in timeline.days.items()}
+        stored = await self.db.execute(
+            select(SystemDailyStats)
+            .where(SystemDailyStats.system_id == system_id, SystemDailyStats.day >= first_day)
+        )
+        for row in stored.scalars():
+            day = result.setdefault(row.day, SystemDay().as_dict())
+            day["ping_count"] += row.ping_count
+            day["down_count"] += row.down_count
+            day["uptime_seconds"] += row.uptime_seconds
+
+        return [{"day": day, **result[day]} for day in sorted(result)]
+
+
+async def _prune(prune, cutoff: datetime) -> int:
+    """Run batches until the backlog before `cutoff` is gone, pausing between them."""
+    removed = 0
+    while True:
+        async with async_session() as db:
+            batch = await prune(RetentionService(db), cutoff, settings.RETENTION_BATCH_SIZE)
+        removed += batch
+        if batch < settings.RETENTION_BATCH_SIZE:
+            return removed
+        # Let webhook writes in between batches
+        await asyncio.sleep(settings.RETENTION_BATCH_PAUSE)
+
+
+async def run_retention(now: Optional[datetime] = None) -> tuple[int, int]:
+    """Aggregate and prune everything past the retention window. Returns (executions, pings) removed."""
+    cutoff = retention_cutoff(now or datetime.utcnow())
+    executions = await _prune(RetentionService.prune_executions, cutoff)
+    pings = await _prune(RetentionService.prune_pings, cutoff)
+
+    if executions or pings:
+        history_totals.invalidate()
+        logger.info(f"Retention: aggregated and removed {executions} executions and {pings} pings before {cutoff}")
+        freed = 0
+        while True:
+            async with async_session() as db:
+                pages = await RetentionService(db).reclaim_space(settings.RETENTION_VACUUM_PAGES)
+            freed += pages
+            if pages < settings.RETENTION_VACUUM_PAGES:
+                break
+            await asyncio.sleep(settings.RETENTION_BATCH_PAUSE)
+        if freed:
+            logger.info(f"Retention: reclaimed {freed} database pages")
+    return executions, pings
+
+
+async def retention_loop():
+    """Apply retention at startup and then every RETENTION_INTERVAL seconds."""
+    while True:
+        started = time.perf_counter()
+        try:
+            executions, pings = await run_retention()
+            monitor_rows.inc(executions + pings, monitor="retention")
+        except Exception as e:
+            logger.error(f"Error applying retention: {e}")
+        monitor_pass_seconds.observe(time.perf_counter() - started, monitor="retention")
+        await asyncio.sleep(settings.RETENTION_INTERVAL)
+
+
+def start_retention():
+    """Start the retention task if a retention window is configured."""
+    if settings.RETENTION_DAYS > 0:
+        asyncio.create_task(retention_loop())
@@ -1,17 +1,23 @@
-import json
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Union
 
-from sqlalchemy import select, func, desc
+from sqlalchemy import select, update, func, desc, case, and_, or_, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload, joinedload
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import joinedload, contains_eager
 
-from app.models import Script, Execution, Responsible
+from app.models import Script, ScriptState, Execution, ExecutionDailyStats, Responsible
 from app.schemas import (
-    ScriptCreate, ScriptUpdate, ScriptResponse, 
+    ScriptCreate, ScriptUpdate, ScriptResponse, ExecutionResponse,
     WebhookPayload, ResponsibleCreate, ResponsibleResponse
 )
 from app.core.notifications import notification_manager
+from app.core.cache import dashboard_cache, history_totals
+from app.core.pagination import encode_cursor, decode_cursor
+from app.core.payload import decode_payload, encode_payload, payload_fields
+from app.core.token_index import ScriptToken, script_tokens
+from app.core.schedule import schedule_rules, to_local
+from app.services.duration_stats_service import DurationStatsService
 
 
 class ResponsibleService:
@@ -54,6 +60,183 @@ class ResponsibleService:
         return True
 
 
+class ScriptStateService:
+    """Service layer that keeps the denormalized ScriptState rows in sync with executions."""
+    
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    async def record(self, script: Union[Script, ScriptToken], executions: list[Execution]):
+        """
+        Fold freshly flushed executions into the script's summary row.
+        
+        Uses a single UPDATE so concurrent writers never lose increments; the
+        "latest" columns only move forward in time. Returns the updated
+        summary (execution_count, last_executed_at, last_status, version).
+        """
+        if not executions:
+            return None
+        
+        latest = max(executions, key=lambda e: (e.executed_at, e.id))
+        runs = [e for e in executions if e.status != "missed"]
+        latest_run = max(runs, key=lambda e: (e.executed_at, e.id)) if runs else None
+        next_due_at = ScriptService._get_next_due_at(script, latest.executed_at)
+        missed_next_check_at = ScriptService._get_next_missed_check_at(script, latest.executed_at)
+        
+        is_newer = or_(
+            ScriptState.last_executed_at.is_(None),
+            ScriptState.last_executed_at <= latest.executed_at,
+        )
+        values = {
+            "execution_count": ScriptState.execution_count + len(executions),
+            "version": ScriptState.version + 1,
+            "last_execution_id": case((is_newer, latest.id), else_=ScriptState.last_execution_id),
+            "last_executed_at": case((is_newer, latest.executed_at), else_=ScriptState.last_executed_at),
+            "last_status": case((is_newer, latest.status), else_=ScriptState.last_status),
+            "next_due_at": case((is_newer, next_due_at), else_=ScriptState.next_due_at),
+            "missed_next_check_at": case(
+                (is_newer, missed_next_check_at), else_=ScriptState.missed_next_check_at
+            ),
+            "updated_at": datetime.utcnow(),
+        }
+        if latest_run:
+            is_newer_run = or_(
+                ScriptState.last_run_at.is_(None),
+                ScriptState.last_run_at <= latest_run.executed_at,
+            )
+            values.update({
+                "last_run_execution_id": case((is_newer_run, latest_run.id), else_=ScriptState.last_run_execution_id),
+                "last_run_at": case((is_newer_run, latest_run.executed_at), else_=ScriptState.last_run_at),
+                "last_run_status": case((is_newer_run, latest_run.status), else_=ScriptState.last_run_status),
+            })
+        
+        result = await self.db.execute(
+            update(ScriptState)
+            .where(ScriptState.script_id == script.id)
+            .values(**values)
+            .returning(
+                ScriptState.execution_count,
+                ScriptState.last_executed_at,
+                ScriptState.last_status,
+                ScriptState.version,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        summary = result.first()
+        if summary:
+            return summary
+        
+        # Summary row is missing (script created before the table existed)
+        state = ScriptState(
+            script_id=script.id,
+            execution_count=len(executions),
+            version=1,
+            last_execution_id=latest.id,
+            last_executed_at=latest.executed_at,
+            last_status=latest.status,
+            next_due_at=next_due_at,
+            missed_next_check_at=missed_next_check_at,
+            last_run_execution_id=latest_run.id if latest_run else None,
+            last_run_at=latest_run.executed_at if latest_run else None,
+            last_run_status=latest_run.status if latest_run else None,
+        )
+        self.db.add(state)
+        return state
+    
+    async def _latest_by_script(self, script_ids, include_missed: bool) -> dict[int, tuple]:
+        """Get (id, executed_at, status) of the latest execution for each script."""
+        conditions = [Execution.script_id.in_(script_ids)]
+        if not include_missed:
+            conditions.append(Execution.status != "missed")
+        
+        ranked = (
+            select(
+                Execution.id,
+                Execution.script_id,
+                Execution.executed_at,
+                Execution.status,
+                func.row_number().over(
+                    partition_by=Execution.script_id,
+                    order_by=(desc(Execution.executed_at), desc(Execution.id)),
+                ).label("rn"),
+            )
+            .where(*conditions)
+            .subquery()
+        )
+        result = await self.db.execute(
+            select(ranked.c.script_id, ranked.c.id, ranked.c.executed_at, ranked.c.status)
+            .where(ranked.c.rn == 1)
+        )
+        return {row[0]: (row[1], row[2], row[3]) for row in result.all()}
+    
+    async def backfill(self) -> int:
+        """Create summary rows for scripts that don't have one yet. Returns how many were created."""
+        missing_query = (
+            select(Script.id)
+            .outerjoin(ScriptState, ScriptState.script_id == Script.id)
+            .where(ScriptState.script_id.is_(None))
+        )
+        result = await self.db.execute(select(Script).where(Script.id.in_(missing_query)))
+        missing = list(result.scalars().all())
+        if not missing:
+            return 0
+        
+        count_result = await self.db.execute(
+            select(Execution.script_id, func.count(Execution.id))
+            .where(Execution.script_id.in_(missing_query))
+            .group_by(Execution.script_id)
+        )
+        counts = dict(count_result.all())
+        latest = await self._latest_by_script(missing_query, include_missed=True)
+        latest_runs = await self._latest_by_script(missing_query, include_missed=False)
+        
+        for script in missing:
+            last_id, last_at, last_status = latest.get(script.id, (None, None, None))
+            run_id, run_at, run_status = latest_runs.get(script.id, (None, None, None))
+            self.db.add(ScriptState(
+                script_id=script.id,
+                execution_count=counts.get(script.id, 0),
+                last_execution_id=last_id,
+                last_executed_at=last_at,
+                last_status=last_status,
+                next_due_at=ScriptService._get_next_due_at(script, last_at),
+                missed_next_check_at=ScriptService._get_next_missed_check_at(script, last_at or script.created_at),
+                last_run_execution_id=run_id,
+                last_run_at=run_at,
+                last_run_status=run_status,
+            ))
+        
+        await self.db.commit()
+        return len(missing)
+    
+    async def refresh_schedules(self) -> int:
+        """
+        Recompute every script's stored due and missed-check times.
+        
+        They depend on the schedule rules and the local time offset, so this
+        runs at startup to pick up changes to either. Returns how many rows changed.
+        """
+        result = await self.db.execute(
+            select(Script)
+            .join(ScriptState, ScriptState.script_id == Script.id)
+            .options(contains_eager(Script.state))
+        )
+        changed = 0
+        for script in result.scalars().all():
+            state = script.state
+            next_due_at = ScriptService._get_next_due_at(script, state.last_executed_at)
+            missed_next_check_at = ScriptService._get_next_missed_check_at(
+                script, ScriptService._get_missed_check_after(script, state)
+            )
+            if (state.next_due_at, state.missed_next_check_at) != (next_due_at, missed_next_check_at):
+                state.next_due_at = next_due_at
+                state.missed_next_check_at = missed_next_check_at
+                changed += 1
+        
+        await self.db.commit()
+        return changed
+
+
 class ScriptService:
     """Service layer for script operations."""
     
@@ -62,147 +245,236 @@ class ScriptService:
     
     @staticmethod
     def _get_now_local() -> datetime:
-        """Helper to get current time in Natal, RN (UTC-3)."""
-        return datetime.utcnow() - timedelta(hours=3)
+        """Helper to get current local time (LOCAL_UTC_OFFSET_HOURS, Natal - RN by default)."""
+        return to_local(datetime.utcnow())
 
     @staticmethod
-    def _is_script_delayed(script: Script, last_exec: Optional[Execution], now_utc: datetime) -> bool:
-        """Helper to determine if a script is delayed based on its frequency."""
+    def _get_next_due_at(script: Script, last_exec_at: Optional[datetime]) -> Optional[datetime]:
+        """
+        Helper to get the moment (UTC) from which a script counts as delayed.
+        
+        Returns None when the script can never be delayed (inactive or no rule).
+        The result only depends on the script and its last execution, so it is
+        stored in ScriptState.next_due_at and compared against "now" in SQL.
+        """
         if not script.is_active:
-            return False
-            
-        # Get local time and local start of day (Natal - RN: UTC-3)
-        now_local = now_utc - timedelta(hours=3)
-        last_exec_at_local = last_exec.executed_at - timedelta(hours=3) if last_exec else None
-        
-        freq = (script.frequency or "").strip().lower()
+            return None
+        return schedule_rules.get(script).next_due(last_exec_at, script.created_at or datetime.utcnow())
 
-        # Frequency-based rules
-        if freq == "daily":
-            # Must have run today in local time
-            today_start_local = now_local.replace(hour=0, minute=0, second=0, microsecond=0)
-            res = not last_exec_at_local or last_exec_at_local < today_start_local
-            return res
-            
-        if freq == "weekly":
-            # Must have run this week (starting Monday) in local time
-            days_since_monday = now_local.weekday()
-            week_start_local = (now_local - timedelta(days=days_since_monday)).replace(hour=0, minute=0, second=0, microsecond=0)
-            return not last_exec_at_local or last_exec_at_local < week_start_local
-            
-        if freq == "monthly":
-            # Must have run this month in local time
-            month_start_local = now_local.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-            return not last_exec_at_local or last_exec_at_local < month_start_local
-            
-        if freq == "biweekly":
-            # Must have run in current fortnight (1-15 or 16-end) in local time
-            if now_local.day <= 15:
-                fortnight_start_local = now_local.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-            else:
-                fortnight_start_local = now_local.replace(day=16, hour=0, minute=0, second=0, microsecond=0)
-            return not last_exec_at_local or last_exec_at_local < fortnight_start_local
-            
-        if freq == "custom":
-            # Use expected_interval (minutes)
-            if not script.expected_interval:
-                return False
-            # Interval is relative, so we can use UTC or local consistently
-            if not last_exec:
-                return True
-            expected_time = last_exec.executed_at + timedelta(minutes=script.expected_interval)
-            return now_utc > expected_time
-            
-        if freq == "scheduled":
-            if not script.scheduled_times:
-                return False
-            
-            # Parse times like "09:00,14:00"
-            times = [t.strip() for t in script.scheduled_times.split(",")]
-            # Boundary must be local today
-            today_start_local = now_local.replace(hour=0, minute=0, second=0, microsecond=0)
-            
-            # Find the latest scheduled time that should have passed today local
-            passed_schedules_local = []
-            for t_str in times:
-                try:
-                    h, m = map(int, t_str.split(":"))
-                    sched_time_local = today_start_local.replace(hour=h, minute=m)
-                    if sched_time_local <= now_local:
-                        passed_schedules_local.append(sched_time_local)
-                except:
-                    continue
-            
-            if not passed_schedules_local:
-                return False # No schedule for today local has passed yet
-                
-            latest_sched_local = max(passed_schedules_local)
-            return not last_exec_at_local or last_exec_at_local < latest_sched_local
+    @staticmethod
+    def _get_missed_check_after(script: Script, state: Optional[ScriptState]) -> datetime:
+        """
+        Helper to get the moment (UTC) the missed-execution detector resumes from.
+        
+        That is the latest execution (or the creation, if it never ran), moved
+        past whatever the detector already evaluated.
+        """
+        after = (state.last_executed_at if state else None) or script.created_at or datetime.utcnow()
+        if state and state.missed_checked_through:
+            after = max(after, state.missed_checked_through - timedelta(microseconds=1))
+        return after
 
-        # Default fallback for old records or unspecified frequency
-        if script.expected_interval:
-            if not last_exec:
-                return True
-            expected_time = last_exec.executed_at + timedelta(minutes=script.expected_interval)
-            res = now_utc > expected_time
-            # print(f"DEBUG_SVC:   Interval fallback: res={res}")
-            return res
-            
-        return False
+    @staticmethod
+    def _get_next_missed_check_at(script: Script, after: datetime) -> Optional[datetime]:
+        """
+        Helper to get the first moment (UTC) a script can be found to have
+        missed something, given the moment the detector resumes from.
+        
+        Includes the MISSED_GRACE_MINUTES grace. Returns None when the script
+        can never miss a period (inactive or no calendar/scheduled rule). Stored in ScriptState.missed_next_check_at so
+        the detector only looks at scripts whose boundary has passed.
+        """
+        if not script.is_active:
+            return None
+        return schedule_rules.get(script).next_missed_check(after)
 
     @staticmethod
-    def _get_effective_status(script: Script, last_exec: Optional[Execution], now: datetime) -> str:
+    def _is_script_delayed(script: Script, last_exec_at: Optional[datetime], now_utc: datetime) -> bool:
+        """Helper to determine if a script is delayed based on its frequency."""
+        next_due_at = ScriptService._get_next_due_at(script, last_exec_at)
+        return next_due_at is not None and next_due_at <= now_utc
+
+    @staticmethod
+    def _get_effective_status(script: Script, state: Optional[ScriptState], now: datetime) -> str:
         """Helper to determine the current tag for the script."""
         if not script.is_active:
             return "default"
             
-        last_exec_at = last_exec.executed_at if last_exec else None
+        last_exec_at = state.last_executed_at if state else None
+        last_status = state.last_status if state else None
         
         # If the last real execution was an error, keep it as error until it succeeds
-        if last_exec and last_exec.status == "error":
+        if last_status == "error":
             return "error"
             
         # Check if delayed/missed cycle
-        is_delayed = ScriptService._is_script_delayed(script, last_exec, now)
+        is_delayed = ScriptService._is_script_delayed(script, last_exec_at, now)
         
-        freq = (script.frequency or "").strip().lower()
+        rule = schedule_rules.get(script)
         
         if not is_delayed:
             return "success" # Label: Executado
             
         # If it should have run by now
-        if freq in ["daily", "weekly", "monthly", "biweekly"]:
+        if rule.kind == "calendar":
             # If it's a "missed" entry in history, it would be 'missed'
-            if last_exec and last_exec.status == "missed":
+            if last_status == "missed":
                 return "missed"
             return "pending" # Label: Ainda não rodou
             
-        if freq == "custom" or script.expected_interval:
+        if rule.kind == "interval" or script.expected_interval:
             return "delayed" # Label: Atrasado
             
         return "pending"
 
+    def _build_fields(self, script, state, responsible, now: datetime) -> dict:
+        """
+        Build the ScriptResponse fields of a script, in schema order.
+        
+        `script` and `state` are a Script and its summary row, or one list
+        row holding both (see get_all); `responsible` is what goes in the
+        response as is.
+        """
+        last_exec_at = state.last_executed_at if state else None
+        
+        return {
+            "id": script.id,
+            "name": script.name,
+            "description": script.description,
+            "webhook_token": script.webhook_token,
+            "expected_interval": script.expected_interval,
+            "is_active": script.is_active,
+            "responsible_id": script.responsible_id,
+            "frequency": script.frequency,
+            "scheduled_times": script.scheduled_times,
+            "calculate_average_time": script.calculate_average_time,
+            "created_at": script.created_at,
+            "updated_at": script.updated_at,
+            "last_execution": last_exec_at,
+            "last_status": self._get_effective_status(script, state, now),
+            "is_delayed": self._is_script_delayed(script, last_exec_at, now),
+            "execution_count": (state.execution_count if state else None) or 0,
+            "version": (state.version if state else None) or 0,
+            "duration_stats": DurationStatsService.summary(state) if script.calculate_average_time else None,
+            "responsible": responsible,
+        }
+    
+    def _build_response(self, script: Script, now: datetime) -> ScriptResponse:
+        """Build the API response for a script from its summary row."""
+        responsible = ResponsibleResponse.model_validate(script.responsible) if script.responsible else None
+        return ScriptResponse(**self._build_fields(script, script.state, responsible, now))
+
+    @staticmethod
+    def _build_delta(
+        script: Union[Script, ScriptToken],
+        summary,
+        now: datetime,
+        duration_stats: Optional[dict] = None,
+    ) -> dict:
+        """
+        Helper to build the recomputed ScriptResponse fields sent to clients
+        when a script's executions change, so they can patch their copy
+        instead of refetching. `summary` is what ScriptStateService.record
+        returns, `duration_stats` what DurationStatsService.record returns.
+        """
+        delta = {
+            "id": script.id,
+            "last_execution": summary.last_executed_at.isoformat() if summary.last_executed_at else None,
+            "last_status": ScriptService._get_effective_status(script, summary, now),
+            "is_delayed": ScriptService._is_script_delayed(script, summary.last_executed_at, now),
+            "execution_count": summary.execution_count,
+            "version": summary.version,
+        }
+        if duration_stats is not None:
+            delta["duration_stats"] = duration_stats
+        return delta
+
+    # Script and summary row columns the list reads, one row per script
+    _LIST_COLUMNS = (
+        Script.id,
+        Script.name,
+        Script.description,
+        Script.webhook_token,
+        Script.expected_interval,
+        Script.is_active,
+        Script.responsible_id,
+        Script.frequency,
+        Script.scheduled_times,
+        Script.calculate_average_time,
+        Script.created_at,
+        Script.updated_at,
+        ScriptState.last_executed_at,
+        ScriptState.last_status,
+        ScriptState.execution_count,
+        ScriptState.version,
+        ScriptState.duration_count,
+        ScriptState.duration_sum_ms,
+        ScriptState.duration_min_ms,
+        ScriptState.duration_max_ms,
+        ScriptState.duration_p50_ms,
+        ScriptState.duration_p95_ms,
+        ScriptState.duration_p99_ms,
+    )
+    
+    @staticmethod
+    def _filter_condition(filter_type: str, now: datetime):
+        """Helper to translate a list filter into an SQL predicate on the summary row."""
+        if filter_type == "never_ran":
+            return ScriptState.last_executed_at.is_(None)
+        if filter_type == "ran_today":
+            today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+            return ScriptState.last_executed_at >= today_start
+        if filter_type == "with_error":
+            return ScriptState.last_status == "error"
+        if filter_type == "delayed":
+            return and_(Script.is_active == True, ScriptState.next_due_at <= now)
+        return None
+
     async def get_all(
         self, 
         search: Optional[str] = None,
         filter_type: Optional[str] = None,
         skip: int = 0, 
         limit: int = 100
-    ) -> tuple[list[ScriptResponse], int]:
-        """Get all scripts with optional search and filters."""
+    ) -> tuple[list[dict], int]:
+        """
+        Get all scripts with optional search and filters.
         
-        # Base query
-        query = select(Script).options(
-            selectinload(Script.executions),
-            joinedload(Script.responsible)
+        Items are ScriptResponse fields as plain dicts, built straight from
+        row tuples (no ORM objects or response models) for a FastJSONResponse.
+        """
+        now = datetime.utcnow()
+        
+        # Base query, joined with the summary row so filters run in SQL
+        query = (
+            select(
+                *self._LIST_COLUMNS,
+                Responsible.name.label("responsible_name"),
+                Responsible.created_at.label("responsible_created_at"),
+            )
+            .outerjoin(ScriptState, ScriptState.script_id == Script.id)
+            .outerjoin(Responsible, Responsible.id == Script.responsible_id)
         )
-        count_query = select(func.count(Script.id))
+        count_query = (
+            select(func.count(Script.id))
+            .outerjoin(ScriptState, ScriptState.script_id == Script.id)
+        )
+        
+        conditions = []
         
         # Search filter
         if search:
-            search_filter = Script.name.ilike(f"%{search}%")
-            query = query.where(search_filter)
-            count_query = count_query.where(search_filter)
+            conditions.append(Script.name.ilike(f"%{search}%"))
+        
+        # Status filter
+        if filter_type:
+            condition = self._filter_condition(filter_type, now)
+            if condition is not None:
+                conditions.append(condition)
+        
+        if conditions:
+            query = query.where(*conditions)
+            count_query = count_query.where(*conditions)
         
         # Get total count
         total_result = await self.db.execute(count_query)
@@ -211,57 +483,25 @@ class ScriptService:
         # Execute main query
         query = query.order_by(desc(Script.updated_at)).offset(skip).limit(limit)
         result = await self.db.execute(query)
-        scripts = result.scalars().all()
-        
-        # Build response with computed fields
-        now = datetime.utcnow()
-        response_items = []
-        
-        for script in scripts:
-            # Sort executions here to be extra safe about the order
-            sorted_execs = sorted(script.executions, key=lambda x: x.executed_at, reverse=True)
-            last_exec = sorted_execs[0] if sorted_execs else None
-            
-            # Check if delayed using helper
-            is_delayed = self._is_script_delayed(script, last_exec, now)
-            
-            # Apply filter
-            if filter_type:
-                if filter_type == "never_ran" and last_exec:
-                    continue
-                elif filter_type == "ran_today" and (not last_exec or last_exec.executed_at.date() != now.date()):
-                    continue
-                elif filter_type == "with_error" and (not last_exec or last_exec.status != "error"):
-                    continue
-                elif filter_type == "delayed" and not is_delayed:
-                    continue
-            
-            response_items.append(ScriptResponse(
-                id=script.id,
-                name=script.name,
-                description=script.description,
-                webhook_token=script.webhook_token,
-                expected_interval=script.expected_interval,
-                is_active=script.is_active,
-                responsible_id=script.responsible_id,
-                frequency=script.frequency,
-                scheduled_times=script.scheduled_times,
-                calculate_average_time=script.calculate_average_time,
-                created_at=script.created_at,
-                updated_at=script.updated_at,
-                last_execution=last_exec.executed_at if last_exec else None,
-                last_status=self._get_effective_status(script, last_exec, now),
-                is_delayed=is_delayed,
-                execution_count=len(script.executions),
-                responsible=ResponsibleResponse.model_validate(script.responsible) if script.responsible else None
-            ))
-        
-        return response_items, len(response_items) if filter_type else total
+        rows = result.all()
+        
+        # Build response with computed fields; each row is both script and summary
+        items = []
+        for row in rows:
+            responsible = None
+            if row.responsible_name is not None:
+                responsible = {
+                    "name": row.responsible_name,
+                    "id": row.responsible_id,
+                    "created_at": row.responsible_created_at,
+                }
+            items.append(self._build_fields(row, row, responsible, now))
+        return items, total
     
     async def get_by_id(self, script_id: int) -> Optional[ScriptResponse]:
         """Get a script by ID."""
         query = select(Script).options(
-            selectinload(Script.executions),
+            joinedload(Script.state),
             joinedload(Script.responsible)
         ).where(Script.id == script_id)
         result = await self.db.execute(query)
@@ -270,37 +510,24 @@ class ScriptService:
         if not script:
             return None
         
-        # Build response
-        now = datetime.utcnow()
-        sorted_execs = sorted(script.executions, key=lambda x: x.executed_at, reverse=True)
-        last_exec = sorted_execs[0] if sorted_execs else None
-        is_delayed = self._is_script_delayed(script, last_exec, now)
-        
-        return ScriptResponse(
-            id=script.id,
-            name=script.name,
-            description=script.description,
-            webhook_token=script.webhook_token,
-            expected_interval=script.expected_interval,
-            is_active=script.is_active,
-            responsible_id=script.responsible_id,
-            frequency=script.frequency,
-            scheduled_times=script.scheduled_times,
-            calculate_average_time=script.calculate_average_time,
-            created_at=script.created_at,
-            updated_at=script.updated_at,
-            last_execution=last_exec.executed_at if last_exec else None,
-            last_status=self._get_effective_status(script, last_exec, now),
-            is_delayed=is_delayed,
-            execution_count=len(script.executions),
-            responsible=ResponsibleResponse.model_validate(script.responsible) if script.responsible else None
-        )
+        return self._build_response(script, datetime.utcnow())
     
-    async def get_by_token(self, token: str) -> Optional[Script]:
-        """Get a script by webhook token."""
+    async def get_by_token(self, token: str) -> Optional[ScriptToken]:
+        """Get a script by webhook token, from the in-memory index once it is loaded."""
+        entry = script_tokens.get(token)
+        if entry is not None or script_tokens.authoritative:
+            return entry
+        
         query = select(Script).where(Script.webhook_token == token)
         result = await self.db.execute(query)
-        return result.scalar_one_or_none()
+        script = result.scalar_one_or_none()
+        if not script:
+            return None
+        entry = ScriptToken.from_model(script)
+        if script_tokens.loaded:
+            # Created or changed by another worker
+            script_tokens.put(token, entry, relay=False)
+        return entry
     
     async def create(self, data: ScriptCreate) -> Script:
         """Create a new script."""
@@ -313,14 +540,20 @@ class ScriptService:
             scheduled_times=data.scheduled_times,
             calculate_average_time=data.calculate_average_time
         )
+        script.state = ScriptState(execution_count=0)
         self.db.add(script)
+        await self.db.flush()
+        script.state.next_due_at = self._get_next_due_at(script, None)
+        script.state.missed_next_check_at = self._get_next_missed_check_at(script, script.created_at)
         await self.db.commit()
         await self.db.refresh(script)
+        script_tokens.put(script.webhook_token, ScriptToken.from_model(script))
+        dashboard_cache.invalidate()
         return script
     
     async def update(self, script_id: int, data: ScriptUpdate) -> Optional[Script]:
         """Update an existing script."""
-        query = select(Script).where(Script.id == script_id)
+        query = select(Script).options(joinedload(Script.state)).where(Script.id == script_id)
         result = await self.db.execute(query)
         script = result.scalar_one_or_none()
         
@@ -328,12 +561,27 @@ class ScriptService:
             return None
         
         update_data = data.model_dump(exclude_unset=True)
+        # Stats are only kept while enabled, so turning them on rebuilds them
+        rebuild_durations = update_data.get("calculate_average_time") and not script.calculate_average_time
         for field, value in update_data.items():
             setattr(script, field, value)
         
+        # Schedule fields may have changed, so the due time must follow
+        # (updated_at first: it keys the compiled schedule rule)
         script.updated_at = datetime.utcnow()
+        if script.state is None:
+            script.state = ScriptState(execution_count=0)
+        script.state.next_due_at = self._get_next_due_at(script, script.state.last_executed_at)
+        script.state.missed_next_check_at = self._get_next_missed_check_at(
+            script, self._get_missed_check_after(script, script.state)
+        )
+        if rebuild_durations:
+            await DurationStatsService(self.db).rebuild(script.id)
+        
         await self.db.commit()
         await self.db.refresh(script)
+        script_tokens.put(script.webhook_token, ScriptToken.from_model(script))
+        dashboard_cache.invalidate()
         return script
     
     async def delete(self, script_id: int) -> bool:
@@ -347,6 +595,9 @@ class ScriptService:
         
         await self.db.delete(script)
         await self.db.commit()
+        script_tokens.remove(script_id)
+        schedule_rules.discard(script_id)
+        dashboard_cache.invalidate()
         return True
     
     async def regenerate_token(self, script_id: int) -> Optional[Script]:
@@ -364,6 +615,7 @@ class ScriptService:
         script.updated_at = datetime.utcnow()
         await self.db.commit()
         await self.db.refresh(script)
+        script_tokens.put(script.webhook_token, ScriptToken.from_model(script))
         return script
 
 
@@ -377,26 +629,82 @@ class ExecutionService:
         self,
         script_id: int,
         skip: int = 0,
-        limit: int = 50
-    ) -> tuple[list[Execution], int]:
-        """Get executions for a script."""
-        # Count
-        count_query = select(func.count(Execution.id)).where(Execution.script_id == script_id)
-        total_result = await self.db.execute(count_query)
-        total = total_result.scalar() or 0
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        with_total: str = "exact",
+        include_payload: bool = False,
+    ) -> tuple[list[Row], Optional[int], Optional[str]]:
+        """
+        Get a page of executions for a script, newest first.
+        
+        Following pages are read with a keyset cursor over (executed_at, id),
+        so a page costs the same however deep it is (`skip` is still honoured
+        when no cursor is given). The total is optional: "exact" counts the
+        rows (cached for HISTORY_TOTAL_CACHE_TTL seconds), "estimate" takes
+        the script's lifetime execution counter less the executions retention
+        folded into daily stats, and "none" skips it. Payloads are
+        only loaded with include_payload; otherwise rows have has_payload.
+        
+        Items are row tuples, for build_fields. Returns (items, total,
+        next_cursor). Raises InvalidCursor.
+        """
+        columns = [
+            Execution.id,
+            Execution.script_id,
+            Execution.executed_at,
+            Execution.status,
+            Execution.duration_ms,
+            Execution.error_message,
+        ]
+        if include_payload:
+            columns += [Execution.payload_data, Execution.payload]
+        else:
+            has_payload = Execution.payload_data.isnot(None) | Execution.payload.isnot(None)
+            columns.append(has_payload.label("has_payload"))
+        query = select(*columns).where(Execution.script_id == script_id)
+        if cursor:
+            executed_at, execution_id = decode_cursor(cursor, datetime, int)
+            query = query.where(tuple_(Execution.executed_at, Execution.id) < (executed_at, execution_id))
+        elif skip:
+            query = query.offset(skip)
+        query = query.order_by(desc(Execution.executed_at), desc(Execution.id)).limit(limit + 1)
         
-        # Get executions
-        query = (
-            select(Execution)
-            .where(Execution.script_id == script_id)
-            .order_by(desc(Execution.executed_at))
-            .offset(skip)
-            .limit(limit)
-        )
         result = await self.db.execute(query)
-        executions = result.scalars().all()
+        executions = result.all()
+        
+        # The extra row only tells whether there is a next page
+        next_cursor = None
+        if len(executions) > limit:
+            executions = executions[:limit]
+            next_cursor = encode_cursor(executions[-1].executed_at, executions[-1].id)
         
-        return list(executions), total
+        total = await self._count_by_script(script_id, with_total)
+        return executions, total, next_cursor
+    
+    async def _count_by_script(self, script_id: int, with_total: str) -> Optional[int]:
+        """Helper to get the total a page of executions reports."""
+        if with_total == "none":
+            return None
+        
+        if with_total == "estimate":
+            # execution_count is a lifetime total; retention folds pruned rows into daily stats
+            pruned = (
+                select(func.coalesce(func.sum(ExecutionDailyStats.execution_count), 0))
+                .where(ExecutionDailyStats.script_id == script_id)
+                .scalar_subquery()
+            )
+            result = await self.db.execute(
+                select(ScriptState.execution_count - pruned).where(ScriptState.script_id == script_id)
+            )
+            return max(result.scalar() or 0, 0)
+        
+        async def count():
+            result = await self.db.execute(
+                select(func.count(Execution.id)).where(Execution.script_id == script_id)
+            )
+            return result.scalar() or 0
+        
+        return await history_totals.get_or_set(("executions", script_id), count)
     
     async def get_by_id(self, execution_id: int) -> Optional[Execution]:
         """Get execution by ID."""
@@ -404,42 +712,114 @@ class ExecutionService:
         result = await self.db.execute(query)
         return result.scalar_one_or_none()
     
-    async def create_from_webhook(self, script: Script, payload: WebhookPayload) -> Execution:
-        """Create execution from webhook payload."""
+    @staticmethod
+    def build_fields(execution: Union[Execution, Row], include_payload: bool = True) -> dict:
+        """
+        Build the ExecutionResponse fields of an execution (or a get_by_script
+        row), in schema order, decoding its payload unless not include_payload.
+        """
+        payload = None
+        if include_payload:
+            payload = decode_payload(execution.payload_data, execution.payload)
+        return {
+            "id": execution.id,
+            "script_id": execution.script_id,
+            "executed_at": execution.executed_at,
+            "status": execution.status,
+            "payload": payload,
+            "has_payload": payload is not None if include_payload else bool(execution.has_payload),
+            "duration_ms": execution.duration_ms,
+            "error_message": execution.error_message,
+        }
+    
+    @staticmethod
+    def build_response(execution: Execution) -> ExecutionResponse:
+        """Build the response for an execution, with its payload."""
+        return ExecutionResponse(**ExecutionService.build_fields(execution))
+    
+    @staticmethod
+    def build_execution(
+        script: ScriptToken,
+        payload: WebhookPayload,
+        received_at: Optional[datetime] = None,
+    ) -> Execution:
+        """Build (without saving) the execution a webhook payload describes."""
+        received_at = received_at or datetime.utcnow()
+        
         # Calculate duration if start_time is provided
         duration_ms = payload.duration_ms
         if payload.start_time and not duration_ms:
-            now = datetime.utcnow()
             # Ensure start_time is aware or both are naive
             start = payload.start_time.replace(tzinfo=None)
-            diff = now - start
+            diff = received_at - start
             duration_ms = int(diff.total_seconds() * 1000)
 
-        # Serialize full payload to JSON
-        payload_json = json.dumps(payload.model_dump(), default=str)
-        
-        execution = Execution(
+        return Execution(
             script_id=script.id,
+            executed_at=received_at,
             status=payload.status or "success",
-            payload=payload_json,
             duration_ms=duration_ms,
             error_message=payload.error_message,
+            # Only the fields without a column of their own
+            payload_data=encode_payload(payload_fields(payload.model_dump())),
+        )
+    
+    async def save_executions(self, items: list[tuple[ScriptToken, Execution]]) -> list[Execution]:
+        """
+        Persist built executions in a single transaction.
+        
+        Updates each script's timestamp and summary row, then sends one
+        notification per script for its latest execution.
+        """
+        if not items:
+            return []
+        
+        by_script: dict[int, tuple[ScriptToken, list[Execution]]] = {}
+        for script, execution in items:
+            self.db.add(execution)
+            by_script.setdefault(script.id, (script, []))[1].append(execution)
+        
+        # Update script timestamps
+        await self.db.execute(
+            update(Script)
+            .where(Script.id.in_(list(by_script)))
+            .values(updated_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
         )
         
-        self.db.add(execution)
-        
-        # Update script timestamp
-        script.updated_at = datetime.utcnow()
+        # Flush to get the execution ids, then fold them into the summary rows
+        # (and the duration stats, which need the summary row locked first)
+        await self.db.flush()
+        state_service = ScriptStateService(self.db)
+        duration_service = DurationStatsService(self.db)
+        summaries = {}
+        durations = {}
+        for script, executions in by_script.values():
+            summaries[script.id] = await state_service.record(script, executions)
+            durations[script.id] = await duration_service.record(script, executions)
         
         await self.db.commit()
-        await self.db.refresh(execution)
-        
-        # Notify subscribers about the new execution
-        await notification_manager.broadcast("webhook_received", {
-            "script_id": script.id,
-            "script_name": script.name,
-            "execution_id": execution.id,
-            "status": execution.status
-        })
+        dashboard_cache.invalidate()
+        for script_id in by_script:
+            history_totals.invalidate(("executions", script_id))
+        
+        # Notify subscribers about the new executions, with the script's new
+        # computed fields so clients don't need to refetch
+        now = datetime.utcnow()
+        for script, executions in by_script.values():
+            execution = max(executions, key=lambda e: (e.executed_at, e.id))
+            await notification_manager.broadcast("webhook_received", {
+                "script_id": script.id,
+                "script_name": script.name,
+                "execution_id": execution.id,
+                "status": execution.status,
+                "script": ScriptService._build_delta(script, summaries[script.id], now, durations[script.id]),
+            })
 
+        return [execution for _, execution in items]
+    
+    async def create_from_webhook(self, script: ScriptToken, payload: WebhookPayload) -> Execution:
+        """Create execution from webhook payload."""
+        execution = self.build_execution(script, payload)
+        await self.save_executions([(script, execution)])
         return execution
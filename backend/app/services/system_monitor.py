@@ -1,73 +1,233 @@
 """
 System Monitor Service
 
-Background service that periodically checks systems and marks them as stopped
-if they haven't received a ping within their timeout_interval.
+Background service that marks systems as stopped if they haven't received a
+ping within their timeout_interval.
+
+Each active system has an expiry deadline (last_ping + timeout_interval) kept
+in a min-heap. Pings reschedule their system's deadline and the loop sleeps
+exactly until the earliest one, so timeouts are detected on time and idle
+systems cost nothing.
+
+With several workers the loop runs in the leader, and deadlines scheduled in
+the other workers are relayed to it.
 """
 import asyncio
+import heapq
+import time
 from datetime import datetime, timedelta
+from typing import Optional
 from sqlalchemy import select
 
-from app.database import async_session
-from app.models import System
+from app.core.bulk import insert_rows
+from app.database import async_session, read_session
+from app.models import System, SystemPing
+from app.schemas import SystemResponse
+from app.core.cache import dashboard_cache, history_totals
+from app.core.cluster import cluster
+from app.core.metrics import metrics, monitor_pass_seconds, monitor_rows
+from app.core.notifications import notification_manager
+from app.core.token_index import system_tokens
+
+# How long a failed expiry pass waits before checking its systems again
+RETRY_DELAY = timedelta(seconds=5)
+
+
+class DeadlineScheduler:
+    """Min-heap of per-system expiry deadlines with lazy cancellation."""
+    def __init__(self):
+        self._heap: list[tuple[datetime, int]] = []
+        self._deadlines: dict[int, datetime] = {}
+        self._wakeup = asyncio.Event()
+
+    def __len__(self) -> int:
+        return len(self._deadlines)
+
+    def __contains__(self, system_id: int) -> bool:
+        return system_id in self._deadlines
+
+    def schedule(self, system_id: int, deadline: datetime, relay: bool = True):
+        """Set (or move) a system's deadline."""
+        if relay:
+            cluster.publish("deadlines", {"system_id": system_id, "deadline": deadline.isoformat()})
+        current_next = self.next_deadline()
+        self._deadlines[system_id] = deadline
+        heapq.heappush(self._heap, (deadline, system_id))
+
+        # Superseded entries stay in the heap until popped; compact if they pile up
+        if len(self._heap) > 2 * len(self._deadlines) + 64:
+            self._heap = [(d, i) for i, d in self._deadlines.items()]
+            heapq.heapify(self._heap)
+
+        if current_next is None or deadline < current_next:
+            self._wakeup.set()
+
+    def cancel(self, system_id: int):
+        """Remove a system's deadline."""
+        self._deadlines.pop(system_id, None)
+
+    def _drop_stale(self):
+        while self._heap and self._deadlines.get(self._heap[0][1]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+
+    def next_deadline(self) -> Optional[datetime]:
+        """Earliest pending deadline, if any."""
+        self._drop_stale()
+        return self._heap[0][0] if self._heap else None
+
+    def pop_expired(self, now: datetime) -> list[int]:
+        """Remove and return the systems whose deadline has passed."""
+        expired = []
+        self._drop_stale()
+        while self._heap and self._heap[0][0] <= now:
+            _, system_id = heapq.heappop(self._heap)
+            del self._deadlines[system_id]
+            expired.append(system_id)
+            self._drop_stale()
+        return expired
+
+    async def wait(self):
+        """Sleep until the next deadline or until an earlier one is scheduled."""
+        self._wakeup.clear()
+        next_deadline = self.next_deadline()
+        timeout = None
+        if next_deadline is not None:
+            timeout = max((next_deadline - datetime.utcnow()).total_seconds(), 0)
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+
+
+# Global instances
+system_deadlines = DeadlineScheduler()
+metrics.gauge("system_deadlines", "Active systems with a pending timeout deadline", collect=lambda: len(system_deadlines))
 
+cluster.subscribe("deadlines", lambda message: system_deadlines.schedule(
+    message["system_id"], datetime.fromisoformat(message["deadline"]), relay=False
+))
 
-async def check_system_timeouts():
-    """Check all systems and mark as stopped if timeout exceeded."""
+
+def system_deadline(last_ping: datetime, timeout_interval: int) -> datetime:
+    """Moment a system expires if it doesn't ping again."""
+    return last_ping + timedelta(minutes=timeout_interval)
+
+
+def _retry_later(system_ids: list[int]):
+    """Reschedule expired systems whose pass failed, unless a ping already did."""
+    retry_at = datetime.utcnow() + RETRY_DELAY
+    for system_id in system_ids:
+        if system_id not in system_deadlines:
+            system_deadlines.schedule(system_id, retry_at, relay=False)
+
+
+def _mark_stopped(system: System, now: datetime) -> dict:
+    """Stop a system; returns its 'stopped' history row."""
+    system.is_active = False
+    system.updated_at = now
+    system.version = (system.version or 0) + 1
+
+    return {
+        "system_id": system.id,
+        "timestamp": now,
+        "status": False,
+        "client_info": "System timeout detector",
+    }
+
+
+async def expire_systems(system_ids: list[int]):
+    """Mark expired systems as stopped, re-checking their last ping in the database."""
     async with async_session() as db:
         try:
             result = await db.execute(
-                select(System).where(System.is_active == True)
+                select(System).where(System.id.in_(system_ids), System.is_active == True)
             )
             systems = result.scalars().all()
-            
+            monitor_rows.inc(len(systems), monitor="system_timeouts")
+
             now = datetime.utcnow()
-            
+            stopped = []
+            stopped_pings = []
+
             for system in systems:
                 if system.last_ping:
-                    timeout_threshold = system.last_ping + timedelta(minutes=system.timeout_interval)
-                    if now > timeout_threshold:
-                        system.is_active = False
-                        system.updated_at = now
-                        
-                        # Record 'stopped' event in history
-                        from app.models import SystemPing
-                        ping_record = SystemPing(
-                            system_id=system.id,
-                            status=False,
-                            client_info="System timeout detector"
-                        )
-                        db.add(ping_record)
-                        
-                        from app.core.notifications import notification_manager
-                        asyncio.create_task(notification_manager.broadcast("system_ping", {
-                            "system_id": system.id,
-                            "system_name": system.name,
-                            "is_active": False,
-                            "status_changed": True
-                        }))
-                        
-                        print(f"[SystemMonitor] System '{system.name}' marked as stopped (timeout)")
-                else:
-                    # No ping received yet, mark as stopped
-                    system.is_active = False
-                    system.updated_at = now
-            
+                    deadline = system_deadline(system.last_ping, system.timeout_interval)
+                    if now < deadline:
+                        # Pinged in the meantime: keep watching
+                        system_deadlines.schedule(system.id, deadline, relay=False)
+                        continue
+                stopped_ping = _mark_stopped(system, now)
+                stopped.append(system)
+                # A system that never pinged is just marked stopped, without
+                # a timeout in its history
+                if system.last_ping:
+                    stopped_pings.append(stopped_ping)
+
+            # Record the 'stopped' events in history
+            await insert_rows(await db.connection(), SystemPing.__table__, stopped_pings)
             await db.commit()
         except Exception as e:
-            print(f"[SystemMonitor] Error checking system timeouts: {e}")
+            print(f"[SystemMonitor] Error expiring systems: {e}")
             await db.rollback()
+            _retry_later(system_ids)
+            return
+
+    for system in stopped:
+        system_tokens.update(system.id, is_active=False)
+        history_totals.invalidate(("pings", system.id))
+    if stopped:
+        dashboard_cache.invalidate()
+
+    for system in stopped:
+        await notification_manager.broadcast("system_ping", {
+            "system_id": system.id,
+            "system_name": system.name,
+            "is_active": False,
+            "status_changed": True,
+            "system": SystemResponse.model_validate(system).model_dump(mode="json"),
+        })
+        print(f"[SystemMonitor] System '{system.name}' marked as stopped (timeout)")
+
+
+async def load_system_deadlines():
+    """Schedule every active system's deadline; systems that never pinged are marked stopped."""
+    async with read_session() as db:
+        result = await db.execute(
+            select(System.id, System.last_ping, System.timeout_interval).where(System.is_active == True)
+        )
+        never_pinged = []
+        for system_id, last_ping, timeout_interval in result.all():
+            if last_ping:
+                system_deadlines.schedule(system_id, system_deadline(last_ping, timeout_interval), relay=False)
+            else:
+                never_pinged.append(system_id)
+
+    # No ping received yet, mark as stopped
+    if never_pinged:
+        await expire_systems(never_pinged)
 
 
 async def system_monitor_loop():
-    """Main monitoring loop."""
+    """Main monitoring loop: sleep until the next deadline, then expire what is due."""
     print("[SystemMonitor] Starting system monitor...")
+    try:
+        await load_system_deadlines()
+    except Exception as e:
+        print(f"[SystemMonitor] Error loading system deadlines: {e}")
+
     while True:
+        expired = []
         try:
-            await check_system_timeouts()
+            await system_deadlines.wait()
+            expired = system_deadlines.pop_expired(datetime.utcnow())
+            if expired:
+                started = time.perf_counter()
+                await expire_systems(expired)
+                monitor_pass_seconds.observe(time.perf_counter() - started, monitor="system_timeouts")
         except Exception as e:
             print(f"[SystemMonitor] Unexpected error in loop: {e}")
-        await asyncio.sleep(30)  # Check every 30 seconds
+            _retry_later(expired)
+            await asyncio.sleep(1)
 
 
 def start_system_monitor():
@@ -0,0 +1,74 @@
+"""
+Benchmark comparison.
+
+Compares two result files written by benchmarks.run (e.g. from two commits):
+
+    python -m benchmarks.compare baseline.json candidate.json [--threshold 10]
+
+Prints the change in throughput and latency of each scenario, and exits with
+status 1 if a scenario lost more than --threshold percent of its throughput
+or its p95 latency grew by more than --threshold percent.
+"""
+import argparse
+import json
+import sys
+
+
+def _change(before: float, after: float) -> float:
+    """Percent change from before to after."""
+    if not before:
+        return 0.0
+    return (after - before) / before * 100
+
+
+def compare(baseline: dict, candidate: dict, threshold: float) -> int:
+    """Print the comparison and return the number of regressed scenarios."""
+    print(f"baseline  {baseline['meta']['commit']} ({baseline['meta']['created_at']})")
+    print(f"candidate {candidate['meta']['commit']} ({candidate['meta']['created_at']})")
+    setup = ("mode", "workers", "database", "scale", "concurrency", "requests")
+    different = [key for key in setup if baseline["meta"].get(key) != candidate["meta"].get(key)]
+    if different:
+        print(f"warning: the runs differ in {', '.join(different)}")
+    print()
+
+    regressions = 0
+    for name, before in baseline["results"].items():
+        after = candidate["results"].get(name)
+        if after is None:
+            print(f"{name:<16} missing from the candidate")
+            continue
+        throughput = _change(before["throughput_rps"], after["throughput_rps"])
+        p50 = _change(before["p50_ms"], after["p50_ms"])
+        p95 = _change(before["p95_ms"], after["p95_ms"])
+        p99 = _change(before["p99_ms"], after["p99_ms"])
+        regressed = throughput < -threshold or p95 > threshold
+        regressions += regressed
+        print(
+            f"{name:<16} {before['throughput_rps']:>9.1f} -> {after['throughput_rps']:>9.1f} req/s ({throughput:+6.1f}%)   "
+            f"p50 {p50:+6.1f}%   p95 {p95:+6.1f}%   p99 {p99:+6.1f}%"
+            + ("   REGRESSION" if regressed else "")
+        )
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files.")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=10.0, help="percent of tolerated slowdown")
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+
+    regressions = compare(baseline, candidate, args.threshold)
+    if regressions:
+        print(f"\n{regressions} scenario(s) regressed by more than {args.threshold:g}%")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,404 @@
+"""
+Benchmark suite.
+
+Seeds a throwaway database, starts the app (in-process through httpx's ASGI
+transport, or a local uvicorn with --server) and drives each scenario with a
+fixed number of concurrent clients, reporting throughput and p50/p95/p99
+latency:
+
+    webhook          POST /webhook/{token}
+    webhook_batch    POST /webhook/batch with --batch-size executions of one script
+    ping             POST /system/{token}
+    scripts_list     GET /api/scripts with --page-size scripts
+    executions_page  GET /api/scripts/{id}/executions
+    systems_list     GET /api/systems
+    system_pings     GET /api/systems/{id}/pings
+    dashboard        GET /api/dashboard/stats
+    sse_fanout       webhooks sent one at a time, timed until every SSE
+                     subscriber has received the event
+
+Results are printed and, with --output, written as JSON for
+benchmarks.compare. Needs httpx (pip install httpx). Run from the backend
+directory:
+
+    python -m benchmarks.run [--scripts 200] [--concurrency 32] [--requests 2000] [--server [--workers 4]] [--output results.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime
+
+import httpx
+
+SCENARIOS = [
+    "webhook", "webhook_batch", "ping", "scripts_list", "executions_page", "systems_list", "system_pings",
+    "dashboard", "sse_fanout",
+]
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Nearest-rank percentile of sorted values."""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def summarize(latencies: list[float], errors: int, seconds: float) -> dict:
+    latencies = sorted(latencies)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "seconds": round(seconds, 3),
+        "throughput_rps": round(len(latencies) / seconds, 1) if seconds else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50), 3),
+        "p95_ms": round(percentile(latencies, 0.95), 3),
+        "p99_ms": round(percentile(latencies, 0.99), 3),
+        "max_ms": round(latencies[-1], 3) if latencies else 0.0,
+    }
+
+
+async def drive(send, requests: int, concurrency: int) -> dict:
+    """Call send(i) for i in range(requests) from `concurrency` workers; send returns False on failure."""
+    latencies = []
+    errors = 0
+    pending = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for i in pending:
+            started = time.perf_counter()
+            ok = await send(i)
+            latencies.append((time.perf_counter() - started) * 1000)
+            if not ok:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - started)
+
+
+def request_scenarios(
+    client: httpx.AsyncClient,
+    scripts: list[dict],
+    systems: list[dict],
+    rng: random.Random,
+    batch_size: int,
+    page_size: int,
+) -> dict:
+    """send(i) coroutine functions of the request/response scenarios."""
+    async def webhook(i):
+        token = scripts[i % len(scripts)]["webhook_token"]
+        response = await client.post(f"/webhook/{token}", json={"status": "success", "duration_ms": rng.randint(100, 60000)})
+        return response.is_success
+
+    async def webhook_batch(i):
+        # A robot flushing the results it buffered
+        token = scripts[i % len(scripts)]["webhook_token"]
+        items = [{"status": "success", "duration_ms": rng.randint(100, 60000)} for _ in range(batch_size)]
+        response = await client.post("/webhook/batch", params={"token": token}, json=items)
+        return response.is_success and not response.json()["rejected"]
+
+    async def ping(i):
+        token = systems[i % len(systems)]["webhook_token"]
+        response = await client.post(f"/system/{token}", json={"status": True})
+        return response.is_success
+
+    async def scripts_list(i):
+        response = await client.get("/api/scripts", params={"limit": page_size})
+        return response.is_success
+
+    async def executions_page(i):
+        script_id = scripts[i % len(scripts)]["id"]
+        response = await client.get(f"/api/scripts/{script_id}/executions", params={"limit": 50})
+        return response.is_success
+
+    async def systems_list(i):
+        response = await client.get("/api/systems", params={"limit": 100})
+        return response.is_success
+
+    async def system_pings(i):
+        system_id = systems[i % len(systems)]["id"]
+        response = await client.get(f"/api/systems/{system_id}/pings", params={"limit": 50})
+        return response.is_success
+
+    async def dashboard(i):
+        response = await client.get("/api/dashboard/stats")
+        return response.is_success
+
+    return {
+        "webhook": webhook,
+        "webhook_batch": webhook_batch,
+        "ping": ping,
+        "scripts_list": scripts_list,
+        "executions_page": executions_page,
+        "systems_list": systems_list,
+        "system_pings": system_pings,
+        "dashboard": dashboard,
+    }
+
+
+async def sse_fanout(client: httpx.AsyncClient, subscribe, scripts: list[dict], events: int, subscribers: int) -> dict:
+    """Time from sending a webhook until all subscribers received its event; requests = events delivered."""
+    complete = [asyncio.Event() for _ in range(events)]
+    arrivals = [0] * events
+    last_arrival = [0.0] * events
+
+    async def reader():
+        seen = 0
+        async for chunk in subscribe():
+            if "webhook_received" not in chunk:
+                continue
+            arrivals[seen] += 1
+            last_arrival[seen] = time.perf_counter()
+            if arrivals[seen] == subscribers:
+                complete[seen].set()
+            seen += 1
+            if seen == events:
+                return
+
+    readers = [asyncio.create_task(reader()) for _ in range(subscribers)]
+    try:
+        # Wait until every stream is registered before the first event
+        for _ in range(100):
+            health = (await client.get("/health")).json()
+            if health["events"]["subscribers"] >= subscribers:
+                break
+            await asyncio.sleep(0.05)
+
+        latencies = []
+        errors = 0
+        started = time.perf_counter()
+        for n in range(events):
+            sent_at = time.perf_counter()
+            token = scripts[n % len(scripts)]["webhook_token"]
+            await client.post(f"/webhook/{token}", json={"status": "success"})
+            try:
+                await asyncio.wait_for(complete[n].wait(), timeout=10)
+                latencies.append((last_arrival[n] - sent_at) * 1000)
+            except asyncio.TimeoutError:
+                errors += 1
+        result = summarize(latencies, errors, time.perf_counter() - started)
+    finally:
+        for task in readers:
+            task.cancel()
+        await asyncio.gather(*readers, return_exceptions=True)
+
+    result["subscribers"] = subscribers
+    result["deliveries_per_second"] = round(result["throughput_rps"] * subscribers, 1)
+    return result
+
+
+def subscribe_in_process():
+    from app.core.notifications import notification_manager
+
+    async def frames():
+        subscriber = await notification_manager.subscribe()
+        try:
+            while True:
+                frame = await subscriber.get()
+                if frame is None:
+                    return
+                yield frame.decode()
+        finally:
+            notification_manager.unsubscribe(subscriber)
+    return frames
+
+
+def subscribe_http(client: httpx.AsyncClient):
+    async def frames():
+        async with client.stream("GET", "/api/events") as response:
+            async for line in response.aiter_lines():
+                yield line
+    return frames
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@asynccontextmanager
+async def app_client(args):
+    """An httpx client for the app, and the SSE subscribe function to use with it."""
+    limits = httpx.Limits(max_connections=args.concurrency + args.subscribers + 10)
+    if not args.server:
+        from app.main import app, lifespan
+
+        async with lifespan(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench", limits=limits) as client:
+                # ASGITransport buffers whole responses, so SSE is read in-process
+                yield client, subscribe_in_process()
+        return
+
+    port = _free_port()
+    server = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning",
+            "--workers", str(args.workers),
+        ],
+        env=os.environ.copy(),
+    )
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=30) as client:
+            for _ in range(300):
+                try:
+                    await client.get("/health")
+                    break
+                except httpx.TransportError:
+                    await asyncio.sleep(0.1)
+            else:
+                raise RuntimeError("uvicorn did not start")
+            yield client, subscribe_http(client)
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+async def _list_all(client: httpx.AsyncClient, path: str, page_size: int) -> list[dict]:
+    items = []
+    while True:
+        page = (await client.get(path, params={"skip": len(items), "limit": page_size})).json()
+        items.extend(page["items"])
+        if len(items) >= page["total"] or not page["items"]:
+            return items
+
+
+async def run(args) -> dict:
+    from benchmarks.seed import seed
+
+    await seed(args.scripts, args.systems, args.executions, args.pings, seed=args.seed)
+
+    results = {}
+    async with app_client(args) as (client, subscribe):
+        scripts = await _list_all(client, "/api/scripts", 500)
+        systems = await _list_all(client, "/api/systems", 100)
+        sends = request_scenarios(client, scripts, systems, random.Random(args.seed), args.batch_size, args.page_size)
+
+        for name in args.scenarios:
+            if name == "sse_fanout":
+                result = await sse_fanout(client, subscribe, scripts, args.events, args.subscribers)
+            else:
+                await drive(sends[name], args.warmup, args.concurrency)
+                result = await drive(sends[name], args.requests, args.concurrency)
+                if name == "webhook_batch":
+                    result["batch_size"] = args.batch_size
+                    result["executions_per_second"] = round(result["throughput_rps"] * args.batch_size, 1)
+            results[name] = result
+            print(
+                f"{name:<16} {result['throughput_rps']:>9.1f} req/s   p50 {result['p50_ms']:>8.2f} ms   "
+                f"p95 {result['p95_ms']:>8.2f} ms   p99 {result['p99_ms']:>8.2f} ms   errors {result['errors']}"
+            )
+    return results
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark webhook ingestion and read endpoints.")
+    parser.add_argument("--scripts", type=int, default=200)
+    parser.add_argument("--systems", type=int, default=50)
+    parser.add_argument("--executions", type=int, default=200, help="executions per script")
+    parser.add_argument("--pings", type=int, default=200, help="pings per system")
+    parser.add_argument("--concurrency", type=int, default=32, help="concurrent clients")
+    parser.add_argument("--requests", type=int, default=2000, help="measured requests per scenario")
+    parser.add_argument("--warmup", type=int, default=100, help="unmeasured requests per scenario")
+    parser.add_argument("--batch-size", type=int, default=50, help="executions per request in webhook_batch")
+    parser.add_argument("--page-size", type=int, default=100, help="scripts per page in scripts_list (at most 500)")
+    parser.add_argument("--subscribers", type=int, default=50, help="SSE clients in sse_fanout")
+    parser.add_argument("--events", type=int, default=200, help="events sent in sse_fanout")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="comma-separated subset of: " + ", ".join(SCENARIOS))
+    parser.add_argument("--server", action="store_true", help="run against a local uvicorn instead of in-process")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers with --server (WORKER_MODE=multi if > 1)")
+    parser.add_argument("--database-url", help="empty database to seed (default: a temporary SQLite file)")
+    parser.add_argument("--dashboard-cache-ttl", type=float, default=0, help="seconds (0 computes the stats on every request)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    args = parser.parse_args()
+    args.scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    if args.workers > 1 and not args.server:
+        parser.error("--workers needs --server")
+
+    # Settings are read on import, so configure the app before loading it
+    db_dir = None
+    if not args.database_url:
+        db_dir = tempfile.mkdtemp()
+        args.database_url = f"sqlite+aiosqlite:///{os.path.join(db_dir, 'bench.db')}"
+    os.environ["DATABASE_URL"] = args.database_url
+    os.environ["DASHBOARD_CACHE_TTL"] = str(args.dashboard_cache_ttl)
+    os.environ["DEBUG"] = "False"
+    if args.workers > 1:
+        os.environ["WORKER_MODE"] = "multi"
+        os.environ["WORKER_LOCK_FILE"] = os.path.join(db_dir or tempfile.gettempdir(), "bench.lock")
+
+    try:
+        results = asyncio.run(run(args))
+    finally:
+        if db_dir:
+            for name in os.listdir(db_dir):
+                os.remove(os.path.join(db_dir, name))
+            os.rmdir(db_dir)
+
+    from app.config import get_settings
+    settings = get_settings()
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "created_at": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "mode": "server" if args.server else "in-process",
+            "workers": args.workers,
+            "database": args.database_url.split(":", 1)[0],
+            "scale": {
+                "scripts": args.scripts,
+                "systems": args.systems,
+                "executions_per_script": args.executions,
+                "pings_per_system": args.pings,
+            },
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "settings": {
+                name: getattr(settings, name)
+                for name in (
+                    "WEBHOOK_INGESTION_MODE",
+                    "SYSTEM_PING_STORAGE",
+                    "DASHBOARD_CACHE_TTL",
+                    "SQLITE_JOURNAL_MODE",
+                    "SQLITE_SYNCHRONOUS",
+                    "DB_POOL_SIZE",
+                    "DB_READ_POOL_SIZE",
+                )
+            },
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
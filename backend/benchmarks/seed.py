@@ -0,0 +1,68 @@
+"""
+Benchmark data.
+
+Fills the configured database (DATABASE_URL) with a reproducible fleet of
+scripts and systems and their history. Summary rows and duration stats are
+left to the app's startup backfill, as for a database being upgraded.
+"""
+import random
+from datetime import datetime, timedelta
+
+from app.core.bulk import insert_rows
+from app.database import async_session, init_db
+from app.models import Execution, Script, System, SystemPing
+
+FREQUENCIES = ["daily", "weekly", "monthly", "custom", "scheduled", None]
+STATUSES = ["success"] * 8 + ["error", "warning"]
+
+
+async def seed(scripts: int, systems: int, executions_per_script: int, pings_per_system: int, seed: int = 42):
+    """Create the schema and insert the benchmark data (the same for a given seed)."""
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    await init_db()
+
+    async with async_session() as db:
+        script_rows = []
+        for i in range(scripts):
+            frequency = FREQUENCIES[i % len(FREQUENCIES)]
+            script_rows.append(Script(
+                name=f"Bench script {i}",
+                frequency=frequency,
+                expected_interval=60 if frequency in ("custom", None) else None,
+                scheduled_times="09:00,14:00" if frequency == "scheduled" else None,
+                calculate_average_time=i % 2 == 0,
+                created_at=now - timedelta(days=90),
+            ))
+        system_rows = [
+            System(name=f"Bench system {i}", is_active=True, last_ping=now, timeout_interval=60)
+            for i in range(systems)
+        ]
+        db.add_all(script_rows + system_rows)
+        await db.flush()
+
+        connection = await db.connection()
+        span = timedelta(days=60).total_seconds()
+        for script in script_rows:
+            await insert_rows(connection, Execution.__table__, [
+                {
+                    "script_id": script.id,
+                    "executed_at": now - timedelta(seconds=span * (j + rng.random()) / executions_per_script),
+                    "status": rng.choice(STATUSES),
+                    "payload": None,
+                    "duration_ms": int(rng.lognormvariate(9, 0.8)),
+                    "error_message": None,
+                }
+                for j in range(executions_per_script)
+            ])
+        for system in system_rows:
+            await insert_rows(connection, SystemPing.__table__, [
+                {
+                    "system_id": system.id,
+                    "timestamp": now - timedelta(minutes=j),
+                    "status": True,
+                    "client_info": None,
+                }
+                for j in range(pings_per_system)
+            ])
+        await db.commit()
@@ -0,0 +1,255 @@
+"""
+Response serialization benchmark.
+
+Times how long the list and dashboard endpoints take to turn rows into a
+response body, for --rows rows per response, two ways:
+
+    models   response models built per row, then validated and dumped by
+             FastAPI against the route's response_model (the dashboard,
+             which has none, through jsonable_encoder and JSONResponse)
+    fast     plain dicts built from the row tuples and encoded in one pass
+             by app.core.responses.dumps (orjson if installed)
+
+Rows are generated in memory, so this measures serialization alone; the
+end-to-end effect is in benchmarks.run (scripts_list, executions_page,
+systems_list, system_pings, dashboard). Run from the backend directory:
+
+    python -m benchmarks.serialization [--rows 1000,10000] [--repeat 5]
+"""
+import argparse
+import asyncio
+import random
+import sys
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute, serialize_response
+
+from app.core.responses import dumps, orjson
+from app.routers import executions_router, scripts_router, systems_router
+from app.schemas import (
+    ExecutionListResponse,
+    ExecutionResponse,
+    ResponsibleResponse,
+    ScriptListResponse,
+    ScriptResponse,
+    SystemListResponse,
+    SystemPingListResponse,
+)
+from app.services import ExecutionService, ScriptService
+
+ScriptRow = namedtuple("ScriptRow", [
+    "id", "name", "description", "webhook_token", "expected_interval", "is_active", "responsible_id",
+    "frequency", "scheduled_times", "calculate_average_time", "created_at", "updated_at",
+    "last_executed_at", "last_status", "execution_count", "version", "duration_count", "duration_sum_ms",
+    "duration_min_ms", "duration_max_ms", "duration_p50_ms", "duration_p95_ms", "duration_p99_ms",
+    "responsible_name", "responsible_created_at",
+])
+ExecutionRow = namedtuple("ExecutionRow", [
+    "id", "script_id", "executed_at", "status", "duration_ms", "error_message", "has_payload",
+])
+SystemRow = namedtuple("SystemRow", [
+    "name", "description", "timeout_interval", "id", "webhook_token", "is_active", "last_ping",
+    "created_at", "updated_at", "version",
+])
+PingRow = namedtuple("PingRow", [
+    "id", "system_id", "timestamp", "status", "client_info", "kind", "ping_count", "first_ping", "last_ping",
+])
+
+
+def _response_field(router, path: str):
+    for route in router.routes:
+        if isinstance(route, APIRoute) and route.path == path and "GET" in route.methods:
+            return route.response_field
+    raise LookupError(path)
+
+
+def _script_rows(count: int, rng: random.Random, now: datetime) -> list[ScriptRow]:
+    rows = []
+    for i in range(count):
+        frequency, interval, times = rng.choice([(None, 60, None), ("daily", None, "09:00,14:00"), (None, None, None)])
+        ran = i % 10 != 0
+        durations = rng.randint(1, 500) if ran and i % 2 == 0 else 0
+        rows.append(ScriptRow(
+            i + 1, f"Script {i}", "Nightly job" if i % 3 else None, f"token-{i:08d}", interval, i % 7 != 0,
+            i % 5 or None, frequency, times, i % 2 == 0, now - timedelta(days=30), now - timedelta(minutes=i),
+            now - timedelta(minutes=rng.randint(1, 600)) if ran else None,
+            rng.choice(["success", "error", "missed"]) if ran else None, rng.randint(0, 5000), rng.randint(0, 5000),
+            durations, durations * 1500, 100 if durations else None, 9000 if durations else None,
+            1200.5 if durations else None, 4000.25 if durations else None, 8800.0 if durations else None,
+            f"Owner {i % 5}" if i % 5 else None, now - timedelta(days=60) if i % 5 else None,
+        ))
+    return rows
+
+
+def _execution_rows(count: int, rng: random.Random, now: datetime) -> list[ExecutionRow]:
+    return [
+        ExecutionRow(
+            count - i, 1, now - timedelta(seconds=i * 60), "error" if i % 20 == 0 else "success",
+            rng.randint(100, 60000), "Connection timeout" if i % 20 == 0 else None, i % 3 == 0,
+        )
+        for i in range(count)
+    ]
+
+
+def _system_rows(count: int, now: datetime) -> list[SystemRow]:
+    return [
+        SystemRow(
+            f"System {i}", "Production server" if i % 2 else None, 5, i + 1, f"token-{i:08d}", i % 4 != 0,
+            now - timedelta(seconds=i), now - timedelta(days=30), now - timedelta(minutes=i), i,
+        )
+        for i in range(count)
+    ]
+
+
+def _ping_rows(count: int, now: datetime) -> list[PingRow]:
+    rows = []
+    for i in range(count):
+        timestamp = now - timedelta(seconds=i * 30)
+        if i % 10 == 0:
+            rows.append(PingRow(count - i, 1, timestamp, True, None, "rollup", 30, timestamp - timedelta(minutes=15), timestamp))
+        else:
+            rows.append(PingRow(count - i, 1, timestamp, i % 50 != 1, "10.0.0.7" if i % 2 else None, "ping", 1, None, None))
+    return rows
+
+
+def _dashboard_stats(count: int, now: datetime) -> dict:
+    # Shaped like _compute_dashboard_stats, with `count` delayed scripts
+    return {
+        "scripts": {"active": count, "total": count},
+        "systems": {"active": 40, "total": 50},
+        "executions_today": count * 12,
+        "alerts": count + 10,
+        "details": {
+            "most_executed_script": {"id": 1, "name": "Script 0", "count": 5000},
+            "last_executed_script": {"id": 2, "name": "Script 1", "executed_at": now.isoformat()},
+            "stopped_systems": [
+                {"id": i, "name": f"System {i}", "last_ping": (now - timedelta(hours=i)).isoformat()}
+                for i in range(10)
+            ],
+            "delayed_scripts": [
+                {
+                    "id": i,
+                    "name": f"Script {i}",
+                    "delay_seconds": i * 61.5 if i % 3 else None,
+                    "status": "delayed" if i % 3 else "missed",
+                    "last_execution": (now - timedelta(minutes=i)).isoformat(),
+                }
+                for i in range(count)
+            ],
+        },
+    }
+
+
+def cases(count: int, seed: int) -> dict:
+    """(models, fast) callables per endpoint, each turning `count` rows into a response body."""
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    script_service = ScriptService(None)
+    script_rows = _script_rows(count, rng, now)
+    execution_rows = _execution_rows(count, rng, now)
+    system_rows = _system_rows(count, now)
+    ping_rows = _ping_rows(count, now)
+    stats = _dashboard_stats(count, now)
+    # The model path read ORM objects; plain objects stand in for them
+    system_objects = [SimpleNamespace(**row._asdict()) for row in system_rows]
+    ping_objects = [SimpleNamespace(**row._asdict()) for row in ping_rows]
+
+    scripts_field = _response_field(scripts_router, "/scripts")
+    executions_field = _response_field(executions_router, "/scripts/{script_id}/executions")
+    systems_field = _response_field(systems_router, "/systems")
+    pings_field = _response_field(systems_router, "/systems/{system_id}/pings")
+
+    def responsible(row):
+        if row.responsible_name is None:
+            return None
+        return {"name": row.responsible_name, "id": row.responsible_id, "created_at": row.responsible_created_at}
+
+    async def scripts_models():
+        items = [
+            ScriptResponse(**script_service._build_fields(
+                row, row, ResponsibleResponse(**responsible(row)) if row.responsible_name else None, now,
+            ))
+            for row in script_rows
+        ]
+        content = ScriptListResponse(items=items, total=count)
+        return await serialize_response(field=scripts_field, response_content=content, dump_json=True)
+
+    async def scripts_fast():
+        items = [script_service._build_fields(row, row, responsible(row), now) for row in script_rows]
+        return dumps({"items": items, "total": count})
+
+    async def executions_models():
+        items = [ExecutionResponse(**ExecutionService.build_fields(row, False)) for row in execution_rows]
+        content = ExecutionListResponse(items=items, total=count, next_cursor=None)
+        return await serialize_response(field=executions_field, response_content=content, dump_json=True)
+
+    async def executions_fast():
+        items = [ExecutionService.build_fields(row, False) for row in execution_rows]
+        return dumps({"items": items, "total": count, "next_cursor": None})
+
+    async def systems_models():
+        content = SystemListResponse(items=system_objects, total=count)
+        return await serialize_response(field=systems_field, response_content=content, dump_json=True)
+
+    async def systems_fast():
+        return dumps({"items": [row._asdict() for row in system_rows], "total": count})
+
+    async def pings_models():
+        content = SystemPingListResponse(items=ping_objects, total=count, next_cursor=None)
+        return await serialize_response(field=pings_field, response_content=content, dump_json=True)
+
+    async def pings_fast():
+        return dumps({"items": [row._asdict() for row in ping_rows], "total": count, "next_cursor": None})
+
+    async def dashboard_models():
+        return JSONResponse(await serialize_response(response_content=stats)).body
+
+    async def dashboard_fast():
+        return dumps(stats)
+
+    return {
+        "scripts": (scripts_models, scripts_fast),
+        "executions": (executions_models, executions_fast),
+        "systems": (systems_models, systems_fast),
+        "pings": (pings_models, pings_fast),
+        "dashboard": (dashboard_models, dashboard_fast),
+    }
+
+
+async def best_of(function, repeat: int) -> float:
+    """Fastest of `repeat` calls, in milliseconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await function()
+        best = min(best, (time.perf_counter() - started) * 1000)
+    return best
+
+
+async def run(rows: list[int], repeat: int, seed: int):
+    print(f"encoder: {'orjson ' + orjson.__version__ if orjson else 'pydantic-core (orjson not installed)'}")
+    print(f"{'endpoint':<12} {'rows':>7} {'models':>12} {'fast':>12} {'speedup':>8}")
+    for count in rows:
+        for name, (models, fast) in cases(count, seed).items():
+            models_ms = await best_of(models, repeat)
+            fast_ms = await best_of(fast, repeat)
+            print(f"{name:<12} {count:>7} {models_ms:>9.2f} ms {fast_ms:>9.2f} ms {models_ms / fast_ms:>7.1f}x")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark response serialization of the list and dashboard endpoints.")
+    parser.add_argument("--rows", default="1000,10000", help="comma-separated rows per response")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per case (the fastest is reported)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    rows = [int(value) for value in args.rows.split(",") if value.strip()]
+    asyncio.run(run(rows, args.repeat, args.seed))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
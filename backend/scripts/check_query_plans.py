@@ -0,0 +1,260 @@
+"""
+Query plan check.
+
+Seeds a throwaway SQLite database, runs the service and router code paths
+and captures every SQL statement they issue, then runs EXPLAIN QUERY PLAN
+on each one. Exits with status 1 if a hot path (webhooks, listings, history
+pages, dashboard, monitors) scans a history table instead of searching an
+index. Startup-only paths are reported but not enforced.
+
+Run from the backend directory:
+
+    python -m scripts.check_query_plans [-v]
+"""
+import asyncio
+import json
+import os
+import re
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), "query_plans.db")
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{DB_PATH}"
+
+from sqlalchemy import event, select  # noqa: E402
+
+from app.database import async_session, engine, init_db  # noqa: E402
+from app.models import Execution, Script, System, SystemPing, SystemPingRollup  # noqa: E402
+from app.routers.dashboard import _compute_dashboard_stats  # noqa: E402
+from app.routers.executions import get_daily_stats, get_duration_stats, get_execution, list_executions  # noqa: E402
+from app.routers.scripts import list_scripts  # noqa: E402
+from app.routers.system_webhook import receive_ping  # noqa: E402
+from app.routers.systems import get_system, get_system_daily_stats, list_system_pings, list_systems  # noqa: E402
+from app.schemas import ScriptCreate, SystemPingPayload, WebhookPayload  # noqa: E402
+from app.services import ExecutionService, ScriptService, ScriptStateService  # noqa: E402
+from app.services.duration_stats_service import DurationStatsService  # noqa: E402
+from app.services.export_service import ExportService  # noqa: E402
+from app.services.monitoring_service import record_missed_executions  # noqa: E402
+from app.services.retention_service import RetentionService  # noqa: E402
+from app.services.system_monitor import expire_systems  # noqa: E402
+
+# Tables that grow with history: a hot query must never scan them
+HISTORY_TABLES = ("executions", "system_pings", "system_ping_rollups")
+FULL_SCAN = re.compile(rf"^SCAN ({'|'.join(HISTORY_TABLES)})(_\d+)?\b")
+
+SCRIPTS = 40
+EXECUTIONS_PER_SCRIPT = 100
+SYSTEMS = 10
+PINGS_PER_SYSTEM = 200
+
+# (label, hot, statement, parameters) of every statement issued
+captured: list[tuple[str, bool, str, object]] = []
+current = {"label": None, "hot": True}
+
+
+def _capture(conn, cursor, statement, parameters, context, executemany):
+    if current["label"] and not executemany:
+        captured.append((current["label"], current["hot"], statement, parameters))
+
+
+class step:
+    """Label the statements issued inside the block."""
+    def __init__(self, label: str, hot: bool = True):
+        self.label = label
+        self.hot = hot
+
+    async def __aenter__(self):
+        current.update(label=self.label, hot=self.hot)
+
+    async def __aexit__(self, *exc):
+        current.update(label=None, hot=True)
+
+
+async def seed():
+    now = datetime.utcnow()
+    async with async_session() as db:
+        frequencies = ["daily", "weekly", "monthly", "custom", "scheduled", None]
+        for i in range(SCRIPTS):
+            frequency = frequencies[i % len(frequencies)]
+            script = Script(
+                name=f"Script {i}",
+                frequency=frequency,
+                expected_interval=30 if frequency in ("custom", None) else None,
+                scheduled_times="09:00,14:00" if frequency == "scheduled" else None,
+                calculate_average_time=i % 2 == 0,
+                created_at=now - timedelta(days=60),
+            )
+            db.add(script)
+            await db.flush()
+            db.add_all([
+                Execution(
+                    script_id=script.id,
+                    status="error" if j % 7 == 0 else "success",
+                    executed_at=now - timedelta(days=60) + timedelta(hours=j * 12),
+                    duration_ms=1000 + j * 10,
+                )
+                for j in range(EXECUTIONS_PER_SCRIPT)
+            ])
+        for i in range(SYSTEMS):
+            system = System(name=f"System {i}", is_active=True, last_ping=now, timeout_interval=5)
+            db.add(system)
+            await db.flush()
+            db.add_all([
+                SystemPing(system_id=system.id, timestamp=now - timedelta(minutes=j), status=True)
+                for j in range(PINGS_PER_SYSTEM)
+            ])
+            db.add_all([
+                SystemPingRollup(
+                    system_id=system.id,
+                    period_start=now - timedelta(hours=j + 1),
+                    first_ping=now - timedelta(hours=j + 1),
+                    last_ping=now - timedelta(hours=j),
+                    ping_count=60,
+                )
+                for j in range(PINGS_PER_SYSTEM // 4)
+            ])
+        await db.commit()
+
+
+async def workload():
+    """Run each hot code path once; statements are captured per step."""
+    now = datetime.utcnow()
+    async with async_session() as db:
+        async with step("startup: backfill script states", hot=False):
+            await ScriptStateService(db).backfill()
+        async with step("startup: refresh schedules", hot=False):
+            await ScriptStateService(db).refresh_schedules()
+        async with step("startup: backfill duration stats", hot=False):
+            await DurationStatsService(db).backfill()
+
+        script = (await db.execute(select(Script).order_by(Script.id).limit(1))).scalar_one()
+        system = (await db.execute(select(System).order_by(System.id).limit(1))).scalar_one()
+
+        async with step("scripts: list"):
+            await list_scripts(search=None, filter_type=None, skip=0, limit=100, db=db)
+        for filter_type in ("never_ran", "ran_today", "with_error", "delayed"):
+            async with step(f"scripts: list ({filter_type})"):
+                await list_scripts(search=None, filter_type=filter_type, skip=0, limit=100, db=db)
+        async with step("scripts: create"):
+            await ScriptService(db).create(ScriptCreate(name="Plan check"))
+
+        async with step("executions: first page"):
+            page = json.loads((await list_executions(script.id, skip=0, limit=50, cursor=None, with_total="exact", include_payload=False, db=db)).body)
+        async with step("executions: next page"):
+            await list_executions(script.id, skip=0, limit=50, cursor=page["next_cursor"], with_total="estimate", include_payload=False, db=db)
+        async with step("executions: detail"):
+            await get_execution(page["items"][0]["id"], db=db)
+
+        async with step("executions: daily stats"):
+            await get_daily_stats(script.id, days=30, db=db)
+        async with step("executions: duration stats"):
+            await get_duration_stats(script.id, days=30, db=db)
+
+        async with step("webhook: record execution"):
+            token = await ScriptService(db).get_by_token(script.webhook_token)
+            await ExecutionService(db).create_from_webhook(token, WebhookPayload(status="success", duration_ms=1500))
+
+        async with step("dashboard: stats"):
+            await _compute_dashboard_stats(db)
+
+        async with step("systems: list"):
+            await list_systems(search=None, skip=0, limit=50, db=db)
+        async with step("systems: detail"):
+            await get_system(system.id, db=db)
+        async with step("pings: first page"):
+            page = json.loads((await list_system_pings(system.id, skip=0, limit=50, cursor=None, with_total="exact", db=db)).body)
+        async with step("pings: next page"):
+            await list_system_pings(system.id, skip=0, limit=50, cursor=page["next_cursor"], with_total="none", db=db)
+        async with step("systems: daily stats"):
+            await get_system_daily_stats(system.id, days=30, db=db)
+        async with step("system webhook: ping"):
+            await receive_ping(system.webhook_token, SystemPingPayload(status=True), db=db, read_db=db)
+
+        async with step("monitor: missed executions (full pass)"):
+            await record_missed_executions(db, now, full=True)
+        async with step("monitor: missed executions"):
+            await record_missed_executions(db, now + timedelta(days=2))
+
+    async with step("monitor: expire systems"):
+        await expire_systems([system.id])
+
+    cutoff = now - timedelta(days=30)
+    async with async_session() as db:
+        async with step("retention: executions batch"):
+            await RetentionService(db).prune_executions(cutoff, 100)
+        async with step("retention: pings batch"):
+            await RetentionService(db).prune_pings(cutoff, 100)
+
+    # Exports end a read transaction per chunk, which expires loaded objects
+    async with async_session() as db:
+        script_id = (await db.execute(select(Script.id).order_by(Script.id).limit(1))).scalar_one()
+        system_id = (await db.execute(select(System.id).order_by(System.id).limit(1))).scalar_one()
+        # Small chunks, so the keyset continuation queries are checked too
+        export = ExportService(db, chunk_size=50)
+        async with step("export: executions (range)"):
+            [rows async for rows in export.executions(since=now - timedelta(days=10))]
+        async with step("export: executions (script, status)"):
+            [rows async for rows in export.executions(script_id=script_id, status="error")]
+        async with step("export: executions (status)"):
+            [rows async for rows in export.executions(status="error", since=now - timedelta(days=40))]
+        async with step("export: pings (range)"):
+            [rows async for rows in export.pings(since=now - timedelta(hours=2))]
+        async with step("export: pings (system)"):
+            [rows async for rows in export.pings(system_id=system_id)]
+
+
+async def explain() -> int:
+    """Print the plan of each distinct statement and return the number of failures."""
+    verbose = "-v" in sys.argv
+    failures = 0
+    seen = set()
+    async with engine.connect() as conn:
+        for label, hot, statement, parameters in captured:
+            if not re.match(r"\s*(SELECT|UPDATE|DELETE|WITH)\b", statement, re.IGNORECASE):
+                continue
+            if (label, statement) in seen:
+                continue
+            seen.add((label, statement))
+
+            result = await conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+            plan = [row[-1] for row in result.all()]
+            scans = [detail for detail in plan if FULL_SCAN.match(detail)]
+
+            if scans and hot:
+                failures += 1
+                status = "FAIL"
+            elif scans:
+                status = "scan"
+            else:
+                status = "ok"
+            print(f"[{status}] {label}")
+            if verbose or status == "FAIL":
+                print("    " + " ".join(statement.split()))
+                for detail in plan:
+                    print(f"      {detail}")
+    return failures
+
+
+async def main() -> int:
+    await init_db()
+    await seed()
+    event.listen(engine.sync_engine, "before_cursor_execute", _capture)
+    try:
+        await workload()
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", _capture)
+
+    failures = await explain()
+    await engine.dispose()
+    os.remove(DB_PATH)
+
+    if failures:
+        print(f"\n{failures} hot queries scan a history table")
+        return 1
+    print("\nNo hot query scans a history table")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
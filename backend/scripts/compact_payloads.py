@@ -0,0 +1,91 @@
+"""
+Execution payload compaction.
+
+Executions stored before payload_data existed keep their whole webhook body
+as JSON text in the legacy payload column. This rewrites them in the compact
+form new executions use (see app.core.payload), a batch of rows per short
+transaction, so it can run while the service is up. Rows whose legacy
+payload isn't valid JSON are left as they are.
+
+Run from the backend directory (uses DATABASE_URL):
+
+    python -m scripts.compact_payloads [--batch-size 1000]
+
+On SQLite the freed pages are given back to the file system as it goes if
+the database uses incremental auto_vacuum (new databases do; older ones need
+a one-time VACUUM).
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+
+from sqlalchemy import select, update
+
+from app.core.payload import encode_payload, payload_fields
+from app.database import async_session, engine, init_db
+from app.models import Execution
+from app.services.retention_service import RetentionService
+
+
+async def compact(batch_size: int) -> int:
+    await init_db()
+    started = time.monotonic()
+    compacted = skipped = saved = 0
+    last_id = 0
+    try:
+        while True:
+            async with async_session() as db:
+                result = await db.execute(
+                    select(Execution.id, Execution.payload)
+                    .where(Execution.id > last_id, Execution.payload.isnot(None))
+                    .order_by(Execution.id)
+                    .limit(batch_size)
+                )
+                rows = result.all()
+                if not rows:
+                    break
+                last_id = rows[-1].id
+
+                values = []
+                for row in rows:
+                    try:
+                        fields = json.loads(row.payload)
+                    except ValueError:
+                        skipped += 1
+                        continue
+                    if not isinstance(fields, dict):
+                        fields = {"data": fields}
+                    data = encode_payload(payload_fields(fields))
+                    values.append({"id": row.id, "payload": None, "payload_data": data})
+                    saved += len(row.payload.encode()) - len(data or b"")
+                if values:
+                    # Bulk UPDATE by primary key
+                    await db.execute(update(Execution), values)
+                await db.commit()
+                await RetentionService(db).reclaim_space(batch_size)
+                compacted += len(values)
+                print(f"  {compacted} executions compacted, {saved / 1e6:.1f} MB saved", end="\r", flush=True)
+
+        async with async_session() as db:
+            while await RetentionService(db).reclaim_space(batch_size):
+                pass
+    finally:
+        await engine.dispose()
+
+    note = f", {skipped} left as they were (not JSON)" if skipped else ""
+    print(f"  {compacted} executions compacted, {saved / 1e6:.1f} MB saved{note}" + " " * 10)
+    print(f"\nDone in {time.monotonic() - started:.1f}s")
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Convert legacy execution payloads to the compact format.")
+    parser.add_argument("--batch-size", type=int, default=1000, help="executions rewritten per transaction")
+    args = parser.parse_args()
+    return asyncio.run(compact(args.batch_size))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
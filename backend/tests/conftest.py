@@ -0,0 +1,40 @@
+import asyncio
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.database import Base
+from app.migrations import run_migrations
+
+
+def migrate(path) -> list[int]:
+    """Bring a database file to the current schema the way init_db does. Returns the migrations applied."""
+    engine = create_engine(f"sqlite:///{path}")
+    try:
+        with engine.begin() as conn:
+            Base.metadata.create_all(conn)
+            return run_migrations(conn)
+    finally:
+        engine.dispose()
+
+
+def run_with_session(path, work):
+    """Run `await work(session)` on an AsyncSession bound to a database file."""
+    async def main():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+        try:
+            async with async_sessionmaker(engine, expire_on_commit=False)() as db:
+                return await work(db)
+        finally:
+            await engine.dispose()
+
+    return asyncio.run(main())
+
+
+@pytest.fixture
+def database(tmp_path):
+    """Path of a new database with the current schema."""
+    path = tmp_path / "monitor_rpa.db"
+    migrate(path)
+    return path
@@ -0,0 +1,40 @@
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.metrics import MetricsMiddleware, http_requests
+
+
+def test_requests_are_labelled_with_the_route_template():
+    router = APIRouter(prefix="/metrics-test")
+
+    @router.get("/items/{item_id}")
+    async def get_item(item_id: int):
+        return {"id": item_id}
+
+    @router.get("/files/{file_path:path}")
+    async def get_file(file_path: str):
+        return {"path": file_path}
+
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+    app.include_router(router, prefix="/api")
+
+    @app.get("/metrics-test-health")
+    async def health():
+        return {}
+
+    client = TestClient(app)
+
+    assert client.get("/api/metrics-test/items/5").status_code == 200
+    assert client.get("/api/metrics-test/files/reports/2026/october.csv").status_code == 200
+    assert client.get("/metrics-test-health").status_code == 200
+    assert client.get("/api/metrics-test/nothing-here").status_code == 404
+
+    labels = {dict(zip(http_requests.labels, key))["route"] for key in http_requests._values}
+    assert {
+        "/api/metrics-test/items/{item_id}",
+        "/api/metrics-test/files/{file_path:path}",
+        "/metrics-test-health",
+        "unmatched",
+    } <= labels
+    assert not any("reports" in label or label.endswith("/5") for label in labels)
@@ -0,0 +1,176 @@
+import sqlite3
+from datetime import date, datetime
+
+from sqlalchemy import delete, select
+
+from app.migrations import MIGRATIONS, schema_migrations
+from app.models import Execution, ExecutionDailyStats, Script, ScriptState
+from app.services.script_service import ScriptStateService
+from tests.conftest import migrate, run_with_session
+
+# Schema of a database created before the first migration
+PRE_SERIES_SCHEMA = """
+CREATE TABLE responsibles (
+    id INTEGER NOT NULL,
+    name VARCHAR(255) NOT NULL,
+    created_at DATETIME,
+    PRIMARY KEY (id)
+);
+CREATE INDEX ix_responsibles_id ON responsibles (id);
+CREATE UNIQUE INDEX ix_responsibles_name ON responsibles (name);
+CREATE TABLE systems (
+    id INTEGER NOT NULL,
+    name VARCHAR(255) NOT NULL,
+    description TEXT,
+    webhook_token VARCHAR(36) NOT NULL,
+    timeout_interval INTEGER NOT NULL,
+    is_active BOOLEAN,
+    last_ping DATETIME,
+    created_at DATETIME,
+    updated_at DATETIME,
+    PRIMARY KEY (id)
+);
+CREATE INDEX ix_systems_name ON systems (name);
+CREATE INDEX ix_systems_id ON systems (id);
+CREATE UNIQUE INDEX ix_systems_webhook_token ON systems (webhook_token);
+CREATE TABLE scripts (
+    id INTEGER NOT NULL,
+    name VARCHAR(255) NOT NULL,
+    description TEXT,
+    webhook_token VARCHAR(36) NOT NULL,
+    expected_interval INTEGER,
+    is_active BOOLEAN,
+    responsible_id INTEGER,
+    frequency VARCHAR(50),
+    scheduled_times TEXT,
+    calculate_average_time BOOLEAN,
+    created_at DATETIME,
+    updated_at DATETIME,
+    PRIMARY KEY (id),
+    FOREIGN KEY(responsible_id) REFERENCES responsibles (id) ON DELETE SET NULL
+);
+CREATE INDEX ix_scripts_id ON scripts (id);
+CREATE UNIQUE INDEX ix_scripts_webhook_token ON scripts (webhook_token);
+CREATE INDEX ix_scripts_name ON scripts (name);
+CREATE TABLE system_pings (
+    id INTEGER NOT NULL,
+    system_id INTEGER NOT NULL,
+    timestamp DATETIME,
+    status BOOLEAN,
+    client_info TEXT,
+    PRIMARY KEY (id),
+    FOREIGN KEY(system_id) REFERENCES systems (id) ON DELETE CASCADE
+);
+CREATE INDEX ix_system_pings_timestamp ON system_pings (timestamp);
+CREATE INDEX ix_system_pings_id ON system_pings (id);
+CREATE TABLE executions (
+    id INTEGER NOT NULL,
+    script_id INTEGER NOT NULL,
+    executed_at DATETIME,
+    status VARCHAR(50),
+    payload TEXT,
+    duration_ms INTEGER,
+    error_message TEXT,
+    PRIMARY KEY (id),
+    FOREIGN KEY(script_id) REFERENCES scripts (id) ON DELETE CASCADE
+);
+CREATE INDEX ix_executions_id ON executions (id);
+CREATE INDEX ix_executions_status ON executions (status);
+CREATE INDEX ix_executions_executed_at ON executions (executed_at);
+"""
+
+
+def create_pre_series_database(path):
+    conn = sqlite3.connect(path)
+    conn.executescript(PRE_SERIES_SCHEMA)
+    conn.execute(
+        "INSERT INTO scripts (id, name, webhook_token, is_active, frequency, scheduled_times, created_at)"
+        " VALUES (1, 'Robo', 'token-1', 1, 'scheduled', '09:00', '2026-09-01 00:00:00')"
+    )
+    conn.executemany(
+        "INSERT INTO executions (script_id, executed_at, status, payload, duration_ms)"
+        " VALUES (1, ?, 'success', '{\"rows\": 3}', 1000)",
+        [(f"2026-09-{day:02d} 12:00:00",) for day in range(1, 11)],
+    )
+    conn.execute(
+        "INSERT INTO systems (id, name, webhook_token, timeout_interval, is_active)"
+        " VALUES (1, 'ERP', 'token-2', 5, 1)"
+    )
+    conn.commit()
+    conn.close()
+
+
+def columns(conn, table: str) -> set[str]:
+    return {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+
+
+def indexes(conn, table: str) -> set[str]:
+    return {row[1] for row in conn.execute(f"PRAGMA index_list({table})")}
+
+
+def test_migrations_upgrade_a_pre_series_database(tmp_path):
+    path = tmp_path / "monitor_rpa.db"
+    create_pre_series_database(path)
+
+    assert migrate(path) == [version for version, _, _ in MIGRATIONS]
+
+    conn = sqlite3.connect(path)
+    try:
+        assert {"payload_data"} <= columns(conn, "executions")
+        assert {"version"} <= columns(conn, "systems")
+        assert {"version", "missed_next_check_at", "duration_sketch"} <= columns(conn, "script_states")
+        assert "ix_executions_script_id_executed_at" in indexes(conn, "executions")
+        assert "ix_system_pings_system_id_timestamp" in indexes(conn, "system_pings")
+        assert conn.execute("SELECT COUNT(*) FROM executions").fetchone() == (10,)
+    finally:
+        conn.close()
+
+    # Nothing left to apply
+    assert migrate(path) == []
+
+    async def backfill(db):
+        assert await ScriptStateService(db).backfill() == 1
+        return (await db.execute(select(ScriptState))).scalar_one()
+
+    state = run_with_session(path, backfill)
+    assert state.execution_count == 10
+    assert state.last_executed_at == datetime(2026, 9, 10, 12)
+
+
+def test_fresh_database_records_every_migration(database):
+    conn = sqlite3.connect(database)
+    try:
+        versions = [row[0] for row in conn.execute(f"SELECT version FROM {schema_migrations.name} ORDER BY version")]
+    finally:
+        conn.close()
+    assert versions == [version for version, _, _ in MIGRATIONS]
+
+
+def test_lifetime_execution_count_migration_restores_pruned_executions(database):
+    async def seed(db):
+        db.add_all([
+            Script(id=1, name="Pruned", webhook_token="token-1"),
+            Script(id=2, name="Untouched", webhook_token="token-2"),
+        ])
+        await db.flush()
+        # Retention used to leave only the remaining executions in the counter
+        db.add_all([
+            ScriptState(script_id=1, execution_count=2),
+            ScriptState(script_id=2, execution_count=5),
+            Execution(script_id=1, executed_at=datetime(2026, 10, 1, 12)),
+            Execution(script_id=1, executed_at=datetime(2026, 10, 2, 12)),
+            ExecutionDailyStats(script_id=1, day=date(2026, 6, 1), execution_count=4),
+            ExecutionDailyStats(script_id=1, day=date(2026, 6, 2), execution_count=3),
+        ])
+        await db.execute(delete(schema_migrations).where(schema_migrations.c.version == 6))
+        await db.commit()
+
+    run_with_session(database, seed)
+
+    assert migrate(database) == [6]
+
+    async def counts(db):
+        result = await db.execute(select(ScriptState.script_id, ScriptState.execution_count))
+        return dict(result.all())
+
+    assert run_with_session(database, counts) == {1: 9, 2: 5}
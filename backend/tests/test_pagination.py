@@ -0,0 +1,52 @@
+import base64
+import json
+from datetime import datetime
+
+import pytest
+
+from app.core.pagination import InvalidCursor, decode_cursor, encode_cursor
+
+PING_KINDS = ("ping", "rollup")
+TIMESTAMP = {"dt": "2026-10-01T12:30:00.123456"}
+
+
+def raw_cursor(values) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip("=")
+
+
+def test_execution_cursor_round_trip():
+    executed_at = datetime(2026, 10, 1, 12, 30, 0, 123456)
+    assert decode_cursor(encode_cursor(executed_at, 42), datetime, int) == [executed_at, 42]
+
+
+def test_ping_cursor_round_trip():
+    timestamp = datetime(2026, 10, 1, 12, 30)
+    cursor = encode_cursor(timestamp, "rollup", 7)
+    assert decode_cursor(cursor, datetime, PING_KINDS, int) == [timestamp, "rollup", 7]
+
+
+@pytest.mark.parametrize("cursor", [
+    "",
+    "not a cursor",
+    raw_cursor({"dt": "2026-10-01T12:30:00"}),
+    raw_cursor([TIMESTAMP, "ping"]),
+    raw_cursor([TIMESTAMP, "ping", 1, 2]),
+    raw_cursor([TIMESTAMP, 5, "x"]),
+    raw_cursor([TIMESTAMP, "pong", 1]),
+    raw_cursor([TIMESTAMP, ["ping"], 1]),
+    raw_cursor([TIMESTAMP, "ping", "1"]),
+    raw_cursor([TIMESTAMP, "ping", 1.5]),
+    raw_cursor([TIMESTAMP, "ping", True]),
+    raw_cursor([TIMESTAMP, "ping", None]),
+    raw_cursor(["2026-10-01T12:30:00", "ping", 1]),
+    raw_cursor([{"dt": 5}, "ping", 1]),
+    raw_cursor([{"dt": "yesterday"}, "ping", 1]),
+])
+def test_malformed_ping_cursors_are_rejected(cursor):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor, datetime, PING_KINDS, int)
+
+
+def test_invalid_cursor_is_a_value_error():
+    with pytest.raises(ValueError):
+        decode_cursor(raw_cursor([TIMESTAMP, "1"]), datetime, int)
@@ -0,0 +1,75 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models import System, SystemPing, SystemPingRollup
+from app.services.ping_history import ping_history_query
+from tests.conftest import run_with_session
+
+START = datetime(2026, 10, 1, 12)
+
+
+async def seed(db):
+    db.add_all([
+        System(id=1, name="ERP", webhook_token="token-1", timeout_interval=5),
+        System(id=2, name="CRM", webhook_token="token-2", timeout_interval=5),
+    ])
+    await db.flush()
+    # Pings and rollups sharing timestamps, to exercise the (timestamp, kind, id) ties
+    for minute in range(4):
+        at = START + timedelta(minutes=minute)
+        db.add_all([
+            SystemPing(system_id=1, timestamp=at, status=minute % 2 == 0),
+            SystemPing(system_id=1, timestamp=at, status=True),
+            SystemPingRollup(system_id=1, period_start=at, first_ping=at - timedelta(seconds=30), last_ping=at, ping_count=3),
+            SystemPing(system_id=2, timestamp=at, status=True),
+        ])
+    await db.commit()
+
+
+def key(row) -> tuple:
+    return row.timestamp, row.kind, row.id
+
+
+async def read_pages(db, page_size: int, **filters) -> list[tuple]:
+    """Every row of the history, a keyset page at a time."""
+    keys = []
+    after = None
+    while True:
+        query = ping_history_query(page_size, after=after, **filters).limit(page_size)
+        rows = (await db.execute(query)).all()
+        keys += [key(row) for row in rows]
+        if len(rows) < page_size:
+            return keys
+        after = keys[-1]
+
+
+@pytest.mark.parametrize("descending", [False, True])
+def test_keyset_pages_match_the_full_history(database, descending):
+    async def work(db):
+        await seed(db)
+        full = (await db.execute(ping_history_query(100, descending=descending, system_id=1))).all()
+        paged = await read_pages(db, 2, descending=descending, system_id=1)
+        return [key(row) for row in full], paged
+
+    full, paged = run_with_session(database, work)
+    assert len(full) == 12
+    assert paged == full
+    if descending:
+        assert full == sorted(full, key=lambda k: (-k[0].timestamp(), k[1], -k[2]))
+    else:
+        assert full == sorted(full)
+
+
+def test_filters(database):
+    async def work(db):
+        await seed(db)
+        stopped = (await db.execute(ping_history_query(100, system_id=1, status=False))).all()
+        window = await read_pages(db, 3, since=START + timedelta(minutes=1), until=START + timedelta(minutes=3))
+        return stopped, window
+
+    stopped, window = run_with_session(database, work)
+    # Rollups only hold running pings
+    assert [(row.kind, row.status) for row in stopped] == [("ping", False), ("ping", False)]
+    assert len(window) == 8
+    assert {timestamp for timestamp, _, _ in window} == {START + timedelta(minutes=1), START + timedelta(minutes=2)}
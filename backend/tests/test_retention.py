@@ -0,0 +1,59 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select
+
+from app.core.cache import history_totals
+from app.models import Execution, ExecutionDailyStats, Script, ScriptState
+from app.services.retention_service import RetentionService
+from app.services.script_service import ExecutionService, ScriptStateService
+from tests.conftest import run_with_session
+
+CUTOFF = datetime(2026, 9, 1)
+
+
+async def seed(db, old: int, recent: int):
+    db.add(Script(id=1, name="Robo", webhook_token="token-1", frequency="daily"))
+    await db.flush()
+    db.add_all(
+        Execution(script_id=1, executed_at=CUTOFF - timedelta(days=10, hours=i), status="success", duration_ms=1000)
+        for i in range(old)
+    )
+    db.add_all(
+        Execution(script_id=1, executed_at=CUTOFF + timedelta(hours=i), status="error")
+        for i in range(recent)
+    )
+    await db.commit()
+    await ScriptStateService(db).backfill()
+
+
+def test_pruning_keeps_the_lifetime_execution_count(database):
+    async def work(db):
+        await seed(db, old=5, recent=3)
+
+        service = RetentionService(db)
+        removed = []
+        while pruned := await service.prune_executions(CUTOFF, batch_size=2):
+            removed.append(pruned)
+        assert removed == [2, 2, 1]
+
+        assert (await db.execute(select(ScriptState.execution_count))).scalar() == 8
+        assert (await db.execute(select(func.sum(ExecutionDailyStats.execution_count)))).scalar() == 5
+        assert (await db.execute(select(func.count(Execution.id)))).scalar() == 3
+
+        history_totals.invalidate(("executions", 1))
+        executions = ExecutionService(db)
+        _, exact, _ = await executions.get_by_script(1, with_total="exact")
+        _, estimate, _ = await executions.get_by_script(1, with_total="estimate")
+        _, none, _ = await executions.get_by_script(1, with_total="none")
+        return exact, estimate, none
+
+    assert run_with_session(database, work) == (3, 3, None)
+
+
+def test_pruning_nothing_leaves_state_alone(database):
+    async def work(db):
+        await seed(db, old=0, recent=2)
+        assert await RetentionService(db).prune_executions(CUTOFF, batch_size=10) == 0
+        return (await db.execute(select(ScriptState.execution_count))).scalar()
+
+    assert run_with_session(database, work) == 2
@@ -0,0 +1,103 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.core.schedule import NO_RULE, CalendarRule, IntervalRule, ScheduledRule, compile_rule, to_utc
+
+GRACE = timedelta(minutes=15)
+
+
+def local(*args) -> datetime:
+    """UTC moment of a local wall-clock time."""
+    return to_utc(datetime(*args))
+
+
+@pytest.mark.parametrize("frequency, expected_interval, scheduled_times, rule", [
+    ("daily", None, None, CalendarRule("daily")),
+    (" Weekly ", 30, None, CalendarRule("weekly")),
+    ("biweekly", None, None, CalendarRule("biweekly")),
+    ("monthly", None, None, CalendarRule("monthly")),
+    ("custom", 30, None, IntervalRule(30)),
+    ("custom", None, None, NO_RULE),
+    ("scheduled", None, "14:00, 09:00,bad,09:00", ScheduledRule((timedelta(hours=9), timedelta(hours=14)))),
+    ("scheduled", None, "", NO_RULE),
+    ("scheduled", None, "25:00", NO_RULE),
+    ("scheduled", None, "-1:00", NO_RULE),
+    ("scheduled", None, "09:60", NO_RULE),
+    ("scheduled", None, "24:00,23:59,00:00,12:-5", ScheduledRule((timedelta(0), timedelta(hours=23, minutes=59)))),
+    (None, 10, None, IntervalRule(10)),
+    (None, None, None, NO_RULE),
+])
+def test_compile_rule(frequency, expected_interval, scheduled_times, rule):
+    assert compile_rule(frequency, expected_interval, scheduled_times) == rule
+
+
+def test_compile_rule_shares_identical_rules():
+    assert compile_rule("scheduled", None, "09:00") is compile_rule("scheduled", None, "09:00")
+
+
+def test_scheduled_times_are_missed_after_the_grace():
+    rule = compile_rule("scheduled", None, "09:00,14:00")
+    after = local(2026, 10, 1, 8)
+
+    # The 09:00 slot is within its grace until 09:15
+    assert rule.periods_between(after, local(2026, 10, 1, 9, 10), GRACE) == ([], local(2026, 10, 1, 8, 55))
+    assert rule.periods_between(after, local(2026, 10, 1, 9, 20), GRACE) == (
+        [local(2026, 10, 1, 9)], local(2026, 10, 1, 9, 5),
+    )
+    assert rule.periods_between(after, local(2026, 10, 2, 10), GRACE) == (
+        [local(2026, 10, 1, 9), local(2026, 10, 1, 14), local(2026, 10, 2, 9)], local(2026, 10, 2, 9, 45),
+    )
+
+
+def test_scheduled_run_reported_within_the_grace_is_not_missed():
+    rule = compile_rule("scheduled", None, "09:00")
+    # A long run that started at 09:00 reports at 09:10
+    assert rule.periods_between(local(2026, 10, 1, 9, 10), local(2026, 10, 1, 9, 30), GRACE)[0] == []
+
+
+def test_scheduled_next_missed_check():
+    rule = compile_rule("scheduled", None, "09:00,14:00")
+    assert rule.next_missed_check(local(2026, 10, 1, 8), GRACE) == local(2026, 10, 1, 9, 15)
+    assert rule.next_missed_check(local(2026, 10, 1, 9), GRACE) == local(2026, 10, 1, 14, 15)
+    assert rule.next_missed_check(local(2026, 10, 1, 15), timedelta(0)) == local(2026, 10, 2, 9)
+
+
+def test_calendar_periods_between():
+    rule = compile_rule("daily", None, None)
+    after = local(2026, 10, 1, 12)
+
+    # October 2nd ends at midnight and is missed once the grace passes
+    assert rule.periods_between(after, local(2026, 10, 3, 0, 10), GRACE) == ([], local(2026, 10, 2))
+    assert rule.periods_between(after, local(2026, 10, 3, 0, 20), GRACE) == (
+        [local(2026, 10, 2, 23, 59, 59)], local(2026, 10, 3),
+    )
+    assert rule.next_missed_check(after, GRACE) == local(2026, 10, 3, 0, 15)
+
+
+@pytest.mark.parametrize("frequency, at, period_start, next_start", [
+    ("weekly", datetime(2026, 10, 15, 10), datetime(2026, 10, 12), datetime(2026, 10, 19)),
+    ("biweekly", datetime(2026, 10, 15, 10), datetime(2026, 10, 1), datetime(2026, 10, 16)),
+    ("biweekly", datetime(2026, 10, 16), datetime(2026, 10, 16), datetime(2026, 11, 1)),
+    ("monthly", datetime(2026, 12, 31, 23), datetime(2026, 12, 1), datetime(2027, 1, 1)),
+])
+def test_calendar_periods(frequency, at, period_start, next_start):
+    rule = compile_rule(frequency, None, None)
+    assert rule.period_start(at) == period_start
+    assert rule.next_period_start(period_start) == next_start
+
+
+def test_monthly_periods_between_spans_months():
+    rule = compile_rule("monthly", None, None)
+    missed, checked_through = rule.periods_between(local(2026, 1, 20), local(2026, 5, 2), timedelta(0))
+    assert missed == [local(2026, 2, 28, 23, 59, 59), local(2026, 3, 31, 23, 59, 59), local(2026, 4, 30, 23, 59, 59)]
+    assert checked_through == local(2026, 5, 1)
+
+
+def test_interval_rules_never_miss():
+    rule = compile_rule("custom", 30, None)
+    now = datetime(2026, 10, 1, 12)
+    assert rule.periods_between(now - timedelta(days=3), now, GRACE) == ([], now)
+    assert rule.next_missed_check(now, GRACE) is None
+    assert rule.next_due(now, now - timedelta(days=1)) == now + timedelta(minutes=30)
+    assert rule.next_due(None, now) == now
@@ -0,0 +1,88 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.core.bulk import insert_rows
+from app.models import System
+from app.services import system_monitor
+from app.services.system_monitor import RETRY_DELAY, expire_systems, system_deadlines
+
+
+def run_monitor(database, monkeypatch, work):
+    """Run `await work(session_factory)` with the monitor's sessions bound to a database file."""
+    async def main():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{database}")
+        session_factory = async_sessionmaker(engine, expire_on_commit=False)
+        monkeypatch.setattr(system_monitor, "async_session", session_factory)
+        try:
+            return await work(session_factory)
+        finally:
+            await engine.dispose()
+
+    return asyncio.run(main())
+
+
+async def add_expired_system(session_factory) -> int:
+    async with session_factory() as db:
+        system = System(
+            name="ERP",
+            webhook_token="token-1",
+            timeout_interval=5,
+            is_active=True,
+            last_ping=datetime.utcnow() - timedelta(minutes=10),
+        )
+        db.add(system)
+        await db.commit()
+        return system.id
+
+
+async def failing_insert(*args, **kwargs):
+    raise TimeoutError("write pool exhausted")
+
+
+async def is_active(session_factory, system_id: int) -> bool:
+    async with session_factory() as db:
+        return (await db.execute(select(System.is_active).where(System.id == system_id))).scalar()
+
+
+def test_failed_expiry_keeps_the_deadline_pending(database, monkeypatch):
+    async def work(session_factory):
+        system_id = await add_expired_system(session_factory)
+        system_deadlines.schedule(system_id, datetime.utcnow() - timedelta(minutes=5), relay=False)
+        expired = system_deadlines.pop_expired(datetime.utcnow())
+        assert expired == [system_id]
+
+        monkeypatch.setattr(system_monitor, "insert_rows", failing_insert)
+        before = datetime.utcnow()
+        await expire_systems(expired)
+
+        assert system_id in system_deadlines
+        assert before + RETRY_DELAY <= system_deadlines.next_deadline() <= datetime.utcnow() + RETRY_DELAY
+        assert await is_active(session_factory, system_id)
+
+        # The retry succeeds once the database recovers
+        monkeypatch.setattr(system_monitor, "insert_rows", insert_rows)
+        await expire_systems(system_deadlines.pop_expired(datetime.utcnow() + RETRY_DELAY))
+        assert system_id not in system_deadlines
+        assert not await is_active(session_factory, system_id)
+
+    run_monitor(database, monkeypatch, work)
+
+
+def test_failed_expiry_keeps_a_newer_deadline(database, monkeypatch):
+    async def work(session_factory):
+        system_id = await add_expired_system(session_factory)
+        # A ping moved the deadline while the pass was running
+        pinged_deadline = datetime.utcnow() + timedelta(minutes=5)
+        system_deadlines.schedule(system_id, pinged_deadline, relay=False)
+
+        monkeypatch.setattr(system_monitor, "insert_rows", failing_insert)
+        await expire_systems([system_id])
+        try:
+            assert system_deadlines.next_deadline() == pinged_deadline
+        finally:
+            system_deadlines.cancel(system_id)
+
+    run_monitor(database, monkeypatch, work)
@@ -0,0 +1,64 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.database import get_db, get_read_db
+from app.main import app
+from app.models import Script
+from tests.conftest import run_with_session
+
+
+@pytest.fixture
+def client(database):
+    async def seed(db):
+        db.add_all([
+            Script(id=1, name="Robo", webhook_token="token-1"),
+            Script(id=2, name="Parado", webhook_token="token-2", is_active=False),
+        ])
+        await db.commit()
+
+    run_with_session(database, seed)
+
+    # NullPool: each request may run in its own event loop
+    engine = create_async_engine(f"sqlite+aiosqlite:///{database}", poolclass=NullPool)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+
+    async def get_test_db():
+        async with session_factory() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = get_test_db
+    app.dependency_overrides[get_read_db] = get_test_db
+    try:
+        yield TestClient(app)
+    finally:
+        app.dependency_overrides.clear()
+        asyncio.run(engine.dispose())
+
+
+def test_batch_rejects_invalid_items_without_failing_the_others(client):
+    response = client.post("/webhook/batch?token=token-1", json=[
+        {"token": ["x"]},
+        {"status": "success", "duration_ms": 1000},
+        {"token": 5, "status": "success"},
+        {"token": "unknown"},
+        {"token": "token-2"},
+        {"token": "token-1", "duration_ms": "slow"},
+        "success",
+        {"token": "token-1", "status": "error", "error_message": "Timeout"},
+    ])
+
+    assert response.status_code == 200
+    body = response.json()
+    assert [result["status"] for result in body["results"]] == [422, 200, 422, 404, 403, 422, 422, 200]
+    assert body["results"][0]["error"].startswith("token:")
+    assert "execution_id" in body["results"][1] and "execution_id" in body["results"][7]
+    assert (body["accepted"], body["rejected"], body["queued"]) == (2, 6, False)
+
+
+def test_batch_items_without_any_token_are_not_found(client):
+    response = client.post("/webhook/batch", json=[{"status": "success"}])
+    assert response.json()["results"] == [{"status": 404, "error": "Invalid webhook token"}]
@@ -1,11 +1,28 @@
 import { useState, useMemo } from 'react';
 import { ChevronDown, ChevronUp, FileCode, Calendar, Clock, ArrowDownRight } from 'lucide-react';
 import StatusBadge from './StatusBadge';
+import { executionsApi } from '../services/api';
 import { formatDateTime, formatDuration, formatRelativeTime } from '../utils/helpers';
 
 export default function ExecutionHistory({ executions, isLoading, showDuration }) {
     const [expandedId, setExpandedId] = useState(null);
     const [expandedDays, setExpandedDays] = useState({});
+    // Payloads aren't sent with the history; loaded when an execution is expanded
+    const [payloads, setPayloads] = useState({});
+
+    const toggleExecution = async (exec) => {
+        const isOpening = expandedId !== exec.id;
+        setExpandedId(isOpening ? exec.id : null);
+        if (!isOpening || !exec.has_payload || exec.payload || payloads[exec.id] !== undefined) return;
+        try {
+            const { data } = await executionsApi.getById(exec.id);
+            setPayloads(prev => ({ ...prev, [exec.id]: data.payload }));
+        } catch (error) {
+            console.error('Error fetching execution payload:', error);
+        }
+    };
+
+    const payloadOf = (exec) => exec.payload ?? payloads[exec.id];
 
     const groupedExecutions = useMemo(() => {
         const groups = {};
@@ -59,7 +76,7 @@ export default function ExecutionHistory({ executions, isLoading, showDuration }
         >
             {/* Header */}
             <button
-                onClick={() => setExpandedId(expandedId === exec.id ? null : exec.id)}
+                onClick={() => toggleExecution(exec)}
                 className="w-full px-4 py-3 flex items-center justify-between hover:bg-white/5 transition-colors"
             >
                 <div className="flex items-center gap-4">
@@ -108,13 +125,13 @@ export default function ExecutionHistory({ executions, isLoading, showDuration }
                     )}
 
                     {/* Payload */}
-                    {exec.payload && (
+                    {payloadOf(exec) && (
                         <div>
                             <span className="text-xs font-medium text-gray-500 uppercase">
                                 Payload
                             </span>
                             <pre className="mt-1 p-3 bg-black/40 rounded-xl text-xs text-gray-300 overflow-x-auto border border-white/5 font-mono">
-                                {JSON.stringify(JSON.parse(exec.payload), null, 2)}
+                                {JSON.stringify(JSON.parse(payloadOf(exec)), null, 2)}
                             </pre>
                         </div>
                     )}
@@ -47,7 +47,7 @@ export default function Dashboard() {
                 if (event.data.trim() === ': heartbeat') return;
                 const data = JSON.parse(event.data);
                 // Refresh on any webhook event (script or system)
-                if (data.type === 'webhook_received' || data.type === 'system_ping') {
+                if (['webhook_received', 'script_updated', 'system_ping', 'resync'].includes(data.type)) {
                     console.log('[Dashboard] Real-time update received');
                     fetchStats(true);
                 }
@@ -9,7 +9,7 @@ import { useHeader } from '../context/HeaderContext';
 import StatusBadge from '../components/StatusBadge';
 import ExecutionHistory from '../components/ExecutionHistory';
 import ScriptForm from '../components/ScriptForm';
-import { formatDateTime, formatRelativeTime, copyToClipboard } from '../utils/helpers';
+import { formatDateTime, formatDuration, formatRelativeTime, copyToClipboard } from '../utils/helpers';
 
 export default function ScriptDetails() {
     const { id } = useParams();
@@ -265,6 +265,25 @@ export default function ScriptDetails() {
                             </div>
                         </div>
 
+                        {/* Duration Stats (Conditional) */}
+                        {script.calculate_average_time && script.duration_stats && (
+                            <div className="grid grid-cols-2 sm:grid-cols-4 gap-4 mb-6">
+                                {[
+                                    ['Tempo médio', script.duration_stats.avg_ms],
+                                    ['Mediana (p50)', script.duration_stats.p50_ms],
+                                    ['p95', script.duration_stats.p95_ms],
+                                    ['Máximo', script.duration_stats.max_ms],
+                                ].map(([label, value]) => (
+                                    <div key={label} className="bg-black/30 rounded-xl p-4 border border-white/5">
+                                        <div className="text-sm text-gray-500 mb-1">{label}</div>
+                                        <div className="font-semibold text-white">
+                                            {formatDuration(Math.round(value))}
+                                        </div>
+                                    </div>
+                                ))}
+                            </div>
+                        )}
+
                         {/* Frequency Details (Conditional) */}
                         {script.frequency === 'scheduled' && script.scheduled_times && (
                             <div className="mb-6 p-4 bg-purple-500/5 border border-purple-500/10 rounded-xl">
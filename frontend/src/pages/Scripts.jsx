@@ -65,13 +65,30 @@ export default function Scripts() {
     useEffect(() => {
         const eventSource = new EventSource('/api/events');
 
+        // Apply the recomputed fields sent with the event, ignoring stale versions
+        const patchScript = (delta) => {
+            setScripts((current) => current.map((script) => (
+                script.id === delta.id && delta.version > (script.version ?? 0)
+                    ? { ...script, ...delta }
+                    : script
+            )));
+        };
+
         eventSource.onmessage = (event) => {
             try {
                 if (event.data.trim() === ': heartbeat') return;
 
                 const data = JSON.parse(event.data);
-                if (data.type === 'webhook_received') {
-                    console.log('[Real-time] Webhook received for script_id:', data.data.script_id);
+                if (data.type === 'webhook_received' || data.type === 'script_updated') {
+                    console.log('[Real-time] Update received for script_id:', data.data.script_id);
+                    // Status filters may include/exclude the script now, so only those refetch
+                    if (filter || !data.data.script) {
+                        fetchScripts(true);
+                    } else {
+                        patchScript(data.data.script);
+                    }
+                } else if (data.type === 'resync') {
+                    // Missed events could not be replayed after a reconnect
                     fetchScripts(true);
                 }
             } catch (err) {
@@ -86,7 +103,7 @@ export default function Scripts() {
         return () => {
             eventSource.close();
         };
-    }, [fetchScripts]);
+    }, [fetchScripts, filter]);
 
     const handleCreateScript = async (data) => {
         try {
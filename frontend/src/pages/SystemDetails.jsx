@@ -320,16 +320,20 @@ export default function SystemDetails() {
                                         let currentGroup = null;
 
                                         pings.forEach((ping) => {
+                                            // Rollups aggregate many heartbeats in a single entry
+                                            const count = ping.ping_count || 1;
                                             if (!currentGroup || currentGroup.status !== ping.status) {
                                                 currentGroup = {
-                                                    id: ping.id,
+                                                    id: `${ping.kind || 'ping'}-${ping.id}`,
                                                     status: ping.status,
                                                     pings: [ping],
+                                                    count,
                                                     timestamp: ping.timestamp
                                                 };
                                                 groups.push(currentGroup);
                                             } else {
                                                 currentGroup.pings.push(ping);
+                                                currentGroup.count += count;
                                             }
                                         });
 
@@ -345,7 +349,7 @@ export default function SystemDetails() {
                                                                 {group.status ? 'Sistema Online' : 'Sistema Parou de Rodar'}
                                                             </span>
                                                             <span className="text-xs text-gray-500">
-                                                                ({group.pings.length} {group.pings.length === 1 ? 'evento' : 'eventos'})
+                                                                ({group.count} {group.count === 1 ? 'evento' : 'eventos'})
                                                             </span>
                                                         </div>
                                                         <div className="text-xs text-gray-500 flex items-center gap-2">
@@ -358,11 +362,13 @@ export default function SystemDetails() {
                                                     {group.status && (
                                                         <div className="divide-y divide-white/5 bg-black/20 max-h-80 overflow-y-auto">
                                                             {group.pings.map((ping) => (
-                                                                <div key={ping.id} className="p-3 pl-4 flex items-center justify-between hover:bg-white/5 transition-colors">
+                                                                <div key={`${ping.kind || 'ping'}-${ping.id}`} className="p-3 pl-4 flex items-center justify-between hover:bg-white/5 transition-colors">
                                                                     <div className="flex items-center gap-3">
                                                                         <div className="w-1.5 h-1.5 rounded-full bg-green-500/50" />
                                                                         <span className="text-xs text-gray-300 font-mono">
-                                                                            Ping recebido
+                                                                            {ping.kind === 'rollup'
+                                                                                ? `${ping.ping_count} pings recebidos desde ${formatDateTime(ping.first_ping)}`
+                                                                                : 'Ping recebido'}
                                                                         </span>
                                                                         {ping.client_info && (
                                                                             <span className="text-[10px] px-2 py-0.5 rounded-md bg-white/5 text-gray-500 font-mono">
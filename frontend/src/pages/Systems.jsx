@@ -56,8 +56,37 @@ export default function Systems() {
 
     useEffect(() => {
         fetchSystems();
-        const interval = setInterval(() => fetchSystems(true), 10000);
-        return () => clearInterval(interval);
+    }, [fetchSystems]);
+
+    // Real-time updates via SSE (pings carry the updated system)
+    useEffect(() => {
+        const eventSource = new EventSource('/api/events');
+
+        eventSource.onmessage = (event) => {
+            try {
+                const data = JSON.parse(event.data);
+                if (data.type === 'system_ping' && data.data.system) {
+                    const updated = data.data.system;
+                    setSystems((current) => current.map((system) => (
+                        system.id === updated.id && updated.version > (system.version ?? 0)
+                            ? { ...system, ...updated }
+                            : system
+                    )));
+                } else if (data.type === 'resync') {
+                    fetchSystems(true);
+                }
+            } catch (err) {
+                // Skip non-JSON or malformed messages
+            }
+        };
+
+        eventSource.onerror = () => {
+            console.error('[Systems] SSE Connection error. Reconnecting...');
+        };
+
+        return () => {
+            eventSource.close();
+        };
     }, [fetchSystems]);
 
     const handleCreate = async (data) => {